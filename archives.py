@@ -0,0 +1,152 @@
+"""
+Streaming zip/tar (and plain folder) input and output for zwoToFitConverter.convert_archive
+
+Members are read and written one at a time and nothing is extracted to disk. Tar
+archives are streamed with constant memory; zip archives keep only their central
+directory (a small record per member) in memory, as the format requires.
+"""
+import gzip
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+from io import BytesIO
+
+# Output path suffix -> tarfile stream mode
+TAR_WRITE_MODES = {
+    '.tar': 'w|',
+    '.tar.gz': 'w|gz',
+    '.tgz': 'w|gz',
+    '.tar.bz2': 'w|bz2',
+    '.tar.xz': 'w|xz',
+}
+ARCHIVE_SUFFIXES = ('.zip',) + tuple(TAR_WRITE_MODES)
+
+
+def is_archive_path(path):
+    """Return True if path names a zip or tar archive (by suffix, or by content if it exists)"""
+    if path.lower().endswith(ARCHIVE_SUFFIXES):
+        return True
+    return os.path.isfile(path) and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+
+def member_path(name):
+    """
+    Normalize an archive member name to a relative POSIX path
+
+    Absolute paths and '..' components are dropped so a member can never be written
+    outside the output folder.
+    """
+    parts = [part for part in posixpath.normpath(name.replace('\\', '/')).split('/') if part not in ('', '.', '..')]
+    return '/'.join(parts)
+
+
+def iter_members(input_path, suffix='.zwo'):
+    """
+    Yield (member path, bytes) for every file with the given suffix in a zip or tar
+    archive or a folder, one member at a time and in archive order (sorted for folders)
+    """
+    if os.path.isdir(input_path):
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.endswith(suffix):
+                    path = os.path.join(root, file_name)
+                    with open(path, 'rb') as f:
+                        yield os.path.relpath(path, input_path).replace(os.sep, '/'), f.read()
+    elif zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(suffix):
+                    yield member_path(info.filename), archive.read(info)
+    else:
+        # Stream mode reads the archive front to back without seeking or an index in memory
+        with tarfile.open(input_path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(suffix):
+                    yield member_path(member.name), archive.extractfile(member).read()
+                archive.members = []  # TarFile otherwise keeps every member's TarInfo
+
+
+class ArchiveWriter:
+    """
+    Write files into a zip or tar archive, or a folder, chosen by the output path suffix
+
+    Use as a context manager; the archive is complete once it is closed.
+
+    Args:
+        output_path: Archive to create, or folder
+        file_writer: main.OutputWriter that writes the files of a folder output (atomically,
+            with its durability); it is flushed on close
+        mtime: Time stamped in a .tar.gz/.tgz gzip header, in seconds since the epoch
+            (default: now)
+    """
+
+    def __init__(self, output_path, file_writer=None, mtime=None):
+        self.output_path = output_path
+        self.file_writer = file_writer
+        lower = output_path.lower()
+        self._zip = self._tar = self._gzip = None
+        if lower.endswith('.zip'):
+            self._zip = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        elif lower.endswith(tuple(TAR_WRITE_MODES)):
+            mode = next(mode for suffix, mode in TAR_WRITE_MODES.items() if lower.endswith(suffix))
+            if mode == 'w|gz':
+                # tarfile's own gzip stream always stamps the current time
+                self._gzip = gzip.GzipFile(output_path, 'wb', mtime=int(time.time() if mtime is None else mtime))
+                self._tar = tarfile.open(fileobj=self._gzip, mode='w|')
+            else:
+                self._tar = tarfile.open(output_path, mode)
+        else:
+            if file_writer is None:
+                raise ValueError("Writing to a folder needs a file_writer")
+            os.makedirs(output_path, exist_ok=True)
+
+    def write(self, name, data, mtime=None):
+        """
+        Store data under the relative POSIX path name
+
+        Args:
+            mtime: Modification time of an archive entry in seconds since the epoch
+                (default: now); zip entries store it as UTC so the archive doesn't
+                depend on the time zone
+        """
+        if mtime is None:
+            mtime = time.time()
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.gmtime(mtime)[:6])
+            info.external_attr = 0o600 << 16  # What writestr gives a bare name
+            self._zip.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+        elif self._tar is not None:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            self._tar.addfile(info, BytesIO(data))
+            self._tar.members = []  # Not needed for writing, and would grow with the archive
+        else:
+            path = os.path.join(self.output_path, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file_writer.write(path, data)
+
+    def location(self, name):
+        """Human readable location of a written member, for logging"""
+        if self._zip is None and self._tar is None:
+            return os.path.join(self.output_path, *name.split('/'))
+        return f"{self.output_path}:{name}"
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        elif self._tar is not None:
+            self._tar.close()
+            if self._gzip is not None:
+                self._gzip.close()
+        else:
+            self.file_writer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,55 @@
+"""
+Validation of athlete settings from outside the program
+
+Roster files (main.load_roster) and the HTTP service's query parameters both let
+users override zwoToFitConverter settings. check_setting() holds the one set of
+rules for their values; the service first turns its query strings into numbers,
+bools or None, a roster's JSON already has those types.
+"""
+import math
+
+
+def _number(value, minimum, inclusive=True):
+    """Return value as a float if it is a finite number of at least (or, not inclusive, above) minimum"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) \
+            or value < minimum or (value == minimum and not inclusive):
+        bound = f">= {minimum:g}" if inclusive else f"> {minimum:g}"
+        raise ValueError(f"Expected a number {bound}, got {value!r}")
+    return float(value)
+
+
+def _flag(value):
+    if not isinstance(value, bool):
+        raise ValueError(f"Expected true or false, got {value!r}")
+    return value
+
+
+# Setting name -> check returning the accepted value (ValueError if invalid)
+SETTING_CHECKS = {
+    'ftp_watts': lambda value: _number(value, 0, inclusive=False),
+    'power_buffer_percent': lambda value: _number(value, 0),
+    'force_warmup_power': lambda value: None if value is None else _number(value, 0),
+    'use_power_for_cycling': _flag,
+    'use_absolute_power': _flag,
+    'warmup_manual_advance': _flag,
+    'cooldown_manual_advance': _flag,
+    'compact_intervals': _flag,
+}
+
+
+def check_setting(name, value):
+    """
+    Validate one athlete setting
+
+    Returns:
+        The value to pass to zwoToFitConverter
+
+    Raises:
+        ValueError: If name is not a setting or value is out of range or of the wrong type
+    """
+    if name not in SETTING_CHECKS:
+        raise ValueError(f"Unknown setting {name!r}")
+    try:
+        return SETTING_CHECKS[name](value)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
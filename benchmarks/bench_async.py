@@ -0,0 +1,85 @@
+"""
+Compare convert_folder with convert_folder_async on slow storage
+
+Network shares are simulated by sleeping for --latency-ms on every file open (and
+ZWO parse from a path), which is where the sequential converter spends its time
+waiting. The output file names and sizes are checked to match.
+
+    python benchmarks/bench_async.py [--latency-ms 5] [--backend native]
+"""
+import argparse
+import asyncio
+import builtins
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+
+
+def simulate_latency(latency):
+    """Make every file access from main.py wait `latency` seconds first"""
+    def slow_open(*args, **kwargs):
+        time.sleep(latency)
+        return builtins.open(*args, **kwargs)
+
+    def slow_parse(source, *args, **kwargs):
+        time.sleep(latency)
+        return ET.parse(source, *args, **kwargs)
+
+    zwo2fit.open = slow_open
+    zwo2fit.ET = types.SimpleNamespace(parse=slow_parse, fromstring=ET.fromstring)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio conversion pipeline")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--backend', choices=zwo2fit.BACKENDS, default='native')
+    parser.add_argument('--concurrency', type=int, default=8, help="Read and write concurrency")
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    simulate_latency(args.latency_ms / 1000)
+    converter = zwo2fit.zwoToFitConverter(force_warmup_power=0.5, backend=args.backend)
+    files = len(glob.glob(os.path.join(args.zwo_folder, '*.zwo')))
+
+    work_dir = tempfile.mkdtemp(prefix='zwo_bench_async_')
+    try:
+        sequential_dir = os.path.join(work_dir, 'sequential')
+        start = time.perf_counter()
+        converter.convert_folder(args.zwo_folder, sequential_dir)
+        sequential = time.perf_counter() - start
+
+        pipeline_dir = os.path.join(work_dir, 'pipeline')
+        start = time.perf_counter()
+        asyncio.run(converter.convert_folder_async(args.zwo_folder, pipeline_dir, read_concurrency=args.concurrency,
+                                                   write_concurrency=args.concurrency))
+        pipeline = time.perf_counter() - start
+
+        print(f"{files} files, {args.latency_ms:g} ms per file access, backend {args.backend}")
+        print(f"convert_folder        {sequential * 1000:8.1f} ms  ({files / sequential:7.1f} files/s)")
+        print(f"convert_folder_async  {pipeline * 1000:8.1f} ms  ({files / pipeline:7.1f} files/s)  "
+              f"{sequential / pipeline:.1f}x")
+
+        # time_created differs between runs, so compare the file sets and sizes
+        outputs = sorted(os.listdir(sequential_dir))
+        same = outputs == sorted(os.listdir(pipeline_dir)) and all(
+            os.path.getsize(os.path.join(sequential_dir, name)) == os.path.getsize(os.path.join(pipeline_dir, name))
+            for name in outputs)
+        print("Outputs match" if same else "OUTPUTS DIFFER")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
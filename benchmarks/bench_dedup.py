@@ -0,0 +1,119 @@
+"""
+Compare convert_folder with and without dedup
+
+Both runs use a fixed time_created, so every .fit file written with dedup (encoded
+or hardlinked) must be byte-identical to the one written without it. Reports the
+time, distinct structures and disk blocks of both runs. A three-file folder where a
+later workout overwrites the output an earlier structure would be linked from is
+checked the same way.
+
+    python benchmarks/bench_dedup.py [--zwo-folder ./zwo] [--backend native]
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+# a.zwo and b.zwo share a name (so an output) but not a structure; c.zwo repeats a.zwo's
+# structure under another name, so it must not be linked to what b.zwo left in X.fit
+OVERWRITE_CASE = (('a.zwo', 'X', 0.5), ('b.zwo', 'X', 0.9), ('c.zwo', 'Y', 0.5))
+
+OVERWRITE_TEMPLATE = """<workout_file>
+    <name>{name}</name>
+    <sportType>bike</sportType>
+    <workout>
+        <SteadyState Duration="600" Power="{power}"/>
+    </workout>
+</workout_file>
+"""
+
+
+def compare_folders(plain_dir, dedup_dir):
+    """True if both folders hold the same .fit names with the same bytes"""
+    names = sorted(os.listdir(plain_dir))
+    same = names == sorted(os.listdir(dedup_dir))
+    for name in names if same else ():
+        with open(os.path.join(plain_dir, name), 'rb') as a, open(os.path.join(dedup_dir, name), 'rb') as b:
+            same = same and a.read() == b.read()
+    return same
+
+
+def check_overwrite_case(converter, work_dir):
+    """Convert OVERWRITE_CASE with and without dedup and compare the outputs"""
+    zwo_dir = os.path.join(work_dir, 'overwrite_zwo')
+    os.makedirs(zwo_dir)
+    for file_name, name, power in OVERWRITE_CASE:
+        with open(os.path.join(zwo_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(OVERWRITE_TEMPLATE.format(name=name, power=power))
+    outputs = []
+    for dedup in (False, True):
+        output_dir = os.path.join(work_dir, 'overwrite_dedup' if dedup else 'overwrite_plain')
+        converter.convert_folder(zwo_dir, output_dir, dedup=dedup)
+        outputs.append(output_dir)
+    return compare_folders(*outputs)
+
+
+def disk_usage(folder):
+    """Bytes of the folder's files, counting each inode once"""
+    inodes = {}
+    for entry in os.scandir(folder):
+        stat = entry.stat()
+        inodes[stat.st_ino] = stat.st_size
+    return sum(inodes.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark structural dedup in convert_folder")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--backend', choices=zwo2fit.BACKENDS, default='native')
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    zwo2fit.datetime = types.SimpleNamespace(datetime=FixedDatetime)
+    converter = zwo2fit.zwoToFitConverter(force_warmup_power=0.5, backend=args.backend)
+
+    work_dir = tempfile.mkdtemp(prefix='zwo_bench_dedup_')
+    try:
+        timings = {}
+        for dedup in (False, True):
+            output_dir = os.path.join(work_dir, 'dedup' if dedup else 'plain')
+            start = time.perf_counter()
+            converter.convert_folder(args.zwo_folder, output_dir, dedup=dedup)
+            timings[dedup] = (time.perf_counter() - start, output_dir)
+
+        plain_dir, dedup_dir = timings[False][1], timings[True][1]
+        names = sorted(os.listdir(plain_dir))
+        same = compare_folders(plain_dir, dedup_dir)
+        structures = len({os.stat(os.path.join(dedup_dir, name)).st_ino for name in names})
+
+        print(f"{len(names)} .fit files, {structures} distinct structures, backend {args.backend}")
+        for dedup, label in ((False, 'plain'), (True, 'dedup')):
+            elapsed, output_dir = timings[dedup]
+            print(f"{label:<6} {elapsed * 1000:8.1f} ms  {disk_usage(output_dir):8d} bytes on disk")
+        print("Outputs identical" if same else "OUTPUTS DIFFER")
+        overwrite_same = check_overwrite_case(converter, work_dir)
+        print("Overwritten output case identical" if overwrite_same else "OVERWRITTEN OUTPUT CASE DIFFERS")
+        return 0 if same and overwrite_same else 1
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
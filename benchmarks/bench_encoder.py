@@ -0,0 +1,69 @@
+"""
+Compare the fit_tool and native FIT encoder backends
+
+Parses every workout in ./zwo once, then times encode_fit_workout for each backend
+over the whole corpus and checks that both produce identical bytes.
+
+    python benchmarks/bench_encoder.py [--zwo-folder ./zwo] [--rounds 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import zwoToFitConverter, BACKENDS  # noqa: E402
+
+TIME_CREATED = 1_000_000_000_000
+
+
+def load_workouts(zwo_folder):
+    converter = zwoToFitConverter()
+    return [converter.parse_zwo_file(path) for path in sorted(glob.glob(os.path.join(zwo_folder, '*.zwo')))]
+
+
+def encode_all(converter, workouts):
+    """Encode every workout, returning the bytes (or the error text for workouts that fail)"""
+    outputs = []
+    for workout in workouts:
+        try:
+            outputs.append(converter.encode_fit_workout(workout, TIME_CREATED))
+        except Exception as e:
+            outputs.append(str(e))
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--zwo-folder', default='./zwo')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    workouts = load_workouts(args.zwo_folder)
+    total_steps = sum(len(workout['steps']) for workout in workouts)
+    print(f"{len(workouts)} workouts, {total_steps} steps, best of {args.rounds} rounds")
+
+    outputs = {}
+    timings = {}
+    for backend in BACKENDS:
+        converter = zwoToFitConverter(backend=backend)
+        best = float('inf')
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            outputs[backend] = encode_all(converter, workouts)
+            best = min(best, time.perf_counter() - start)
+        timings[backend] = best
+        print(f"  {backend:<9} {best * 1000:8.1f} ms  {best / len(workouts) * 1e6:8.1f} us/file")
+
+    print(f"Speedup: {timings['fit_tool'] / timings['native']:.1f}x")
+    if outputs['fit_tool'] != outputs['native']:
+        print("MISMATCH: backends produced different output")
+        return 1
+    print("Outputs identical")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Round-trip check and throughput of the FIT -> ZWO decoder (fit_to_zwo)
+
+For several converter profiles, every ./zwo workout is encoded, decoded back to ZWO
+with fit_to_zwo and encoded again; both FIT files must be byte-identical (fixed
+time_created). Then fit_to_zwo is timed over --files encoded workouts.
+
+    python benchmarks/bench_fit_to_zwo.py [--files 20000]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+
+PROFILES = (
+    {'force_warmup_power': 0.5},
+    {'compact_intervals': True},
+    {'use_absolute_power': False, 'ftp_watts': 287},
+    {'use_power_for_cycling': False},
+    {'power_buffer_percent': 0, 'warmup_manual_advance': False, 'cooldown_manual_advance': True},
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fit_to_zwo")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--files', type=int, default=20000)
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    sources = []
+    for path in sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo'))):
+        with open(path, 'rb') as f:
+            sources.append(f.read())
+
+    failures = 0
+    fit_files = []
+    for profile in PROFILES:
+        converter = zwo2fit.zwoToFitConverter(backend='native', time_created=zwo2fit.FIXED_TIME_CREATED, **profile)
+        round_trips = identical = 0
+        for zwo in sources:
+            try:
+                fit = converter.convert_bytes(zwo)
+            except Exception:
+                continue  # Not encodable in the first place
+            fit_files.append((converter, fit))
+            round_trips += 1
+            try:
+                identical += converter.convert_bytes(converter.fit_to_zwo(fit)) == fit
+            except Exception:
+                pass
+        failures += round_trips - identical
+        print(f"{profile}: {identical}/{round_trips} round trips identical")
+
+    count = 0
+    start = time.perf_counter()
+    while count < args.files:
+        for converter, fit in fit_files[:args.files - count]:
+            converter.fit_to_zwo(fit)
+        count += min(len(fit_files), args.files - count)
+    elapsed = time.perf_counter() - start
+    print(f"{count} FIT files decoded to ZWO in {elapsed * 1000:.1f} ms ({count / elapsed:.0f} files/s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Cost of console logging in convert_folder
+
+Converts ./zwo (several times over) at each verbosity level, with the log going to
+a file so the numbers are not dominated by a particular terminal. Verbosity 2 is
+what the converter used to print unconditionally; 0 is the default CLI mode.
+
+    python benchmarks/bench_logging.py [--zwo-folder ./zwo] [--rounds 3] [--backend native]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BACKENDS, configure_logging, zwoToFitConverter  # noqa: E402
+
+LEVELS = ((2, 'verbose -vv (old print output)'), (1, 'verbose -v'), (0, 'default'), (-1, 'quiet -q'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--zwo-folder', default='./zwo')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--backend', choices=BACKENDS, default='native')
+    args = parser.parse_args()
+
+    converter = zwoToFitConverter(force_warmup_power=0.5, backend=args.backend)
+    work_dir = tempfile.mkdtemp(prefix='bench_logging_')
+    try:
+        log_path = os.path.join(work_dir, 'log.txt')
+        results = []
+        for verbosity, label in LEVELS:
+            best = float('inf')
+            for _ in range(args.rounds):
+                with open(log_path, 'w') as log_file, mock.patch.object(sys, 'stdout', log_file):
+                    configure_logging(verbosity)
+                    start = time.perf_counter()
+                    converter.convert_folder(args.zwo_folder, os.path.join(work_dir, 'fit'))
+                    best = min(best, time.perf_counter() - start)
+                log_size = os.path.getsize(log_path)
+            results.append((label, best, log_size))
+    finally:
+        shutil.rmtree(work_dir)
+
+    baseline = results[0][1]
+    for label, best, log_size in results:
+        print(f"  {label:<32} {best * 1000:8.1f} ms  {log_size / 1024:8.1f} KiB logged  "
+              f"({(1 - best / baseline) * 100:5.1f}% saved)")
+
+
+if __name__ == '__main__':
+    main()
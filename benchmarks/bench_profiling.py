@@ -0,0 +1,58 @@
+"""
+Overhead of the per-phase timers
+
+Times convert_folder over ./zwo with no phase timer and with a PhaseTimer (best
+of --repeat runs each, native backend so the encoder doesn't drown the
+difference), then prints the phase table of the timed run.
+
+    python benchmarks/bench_profiling.py [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+from profiling import PhaseTimer, format_phase_table  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the phase timer overhead")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    work_dir = tempfile.mkdtemp(prefix='zwo_bench_profiling_')
+    try:
+        best = {}
+        for label in ('off', 'on', 'off', 'on'):  # Interleaved so warm-up favours neither
+            timer = PhaseTimer() if label == 'on' else None
+            converter = zwo2fit.zwoToFitConverter(backend='native', phase_timer=timer)
+            for _ in range(args.repeat):
+                if timer is not None:
+                    timer.take()
+                start = time.perf_counter()
+                converter.convert_folder(args.zwo_folder, os.path.join(work_dir, label),
+                                         writer=zwo2fit.OutputWriter('none'))
+                elapsed = time.perf_counter() - start
+                best[label] = min(best.get(label, elapsed), elapsed)
+
+        print(f"timers off {best['off'] * 1000:8.1f} ms")
+        print(f"timers on  {best['on'] * 1000:8.1f} ms  ({best['on'] / best['off'] - 1:+.1%})")
+        print()
+        for line in format_phase_table(timer):
+            print(line)
+        return 0
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
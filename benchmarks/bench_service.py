@@ -0,0 +1,124 @@
+"""
+Benchmark the local HTTP conversion service against one-process-per-file CLI runs
+
+Starts the service on a free localhost port, POSTs every corpus workout from
+--clients threads, checks the responses against convert_bytes (sizes; time_created
+differs), and prints the service's /metrics. Everything stays on 127.0.0.1.
+
+    python benchmarks/bench_service.py [--jobs 0] [--clients 4] [--rounds 3] [--backend native]
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+import service  # noqa: E402
+
+PROFILE = dict(ftp_watts=240, power_buffer_percent=5, force_warmup_power=0.5)
+
+
+def post_all(port, workouts, clients, query=''):
+    """POST every workout, one keep-alive connection per client thread; return (status, body) per workout"""
+    local = threading.local()
+
+    def post(zwo):
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection('127.0.0.1', port)
+        local.connection.request('POST', '/convert' + query, body=zwo)
+        response = local.connection.getresponse()
+        return response.status, response.read()
+
+    with ThreadPoolExecutor(clients) as pool:
+        return list(pool.map(post, workouts))
+
+
+def cli_per_file(paths, backend):
+    """Time a cold `python main.py` run per file, as a script calling the CLI would"""
+    start = time.perf_counter()
+    for path in paths:
+        with tempfile.TemporaryDirectory() as zwo_dir, tempfile.TemporaryDirectory() as fit_dir:
+            os.symlink(path, os.path.join(zwo_dir, os.path.basename(path)))
+            subprocess.run([sys.executable, 'main.py', '--zwo-folder', zwo_dir, '--fit-folder', fit_dir,
+                            '--backend', backend, '-q'], cwd=ROOT, check=False, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTTP conversion service")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--jobs', type=int, default=0, help="Service worker processes (0 = in-process)")
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--backend', choices=zwo2fit.BACKENDS, default='native')
+    parser.add_argument('--cli-files', type=int, default=10, help="Files to time through the cold CLI")
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    paths = sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo')))
+    workouts = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            workouts.append(f.read())
+    profile = dict(PROFILE, backend=args.backend)
+
+    server = service.make_server('127.0.0.1', 0, profile, workers=args.jobs)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            responses = post_all(port, workouts, args.clients)
+        elapsed = time.perf_counter() - start
+        requests = len(workouts) * args.rounds
+
+        mismatches = 0
+        for zwo, (status, body) in zip(workouts, responses):
+            try:
+                expected = zwo2fit.convert_bytes(zwo, **profile)
+            except Exception:
+                expected = None
+            if (status == 200) != (expected is not None) or (expected is not None and len(body) != len(expected)):
+                mismatches += 1
+
+        # Per-request overrides must reach the converter
+        sample = next(zwo for zwo, (status, _) in zip(workouts, responses) if status == 200)
+        status, body = post_all(port, [sample], 1, '?ftp_watts=300&use_absolute_power=false')[0]
+        override_ok = status == 200 and len(body) == len(
+            zwo2fit.convert_bytes(sample, **dict(profile, ftp_watts=300, use_absolute_power=False)))
+        bad_status, _ = post_all(port, [b'<not xml'], 1)[0]
+
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.request('GET', '/metrics')
+        metrics = json.loads(connection.getresponse().read())
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.close()
+
+    cli_paths = paths[:args.cli_files]
+    cli = cli_per_file(cli_paths, args.backend) if cli_paths else 0
+
+    print(f"{requests} requests, {args.clients} clients, service jobs {args.jobs}, backend {args.backend}")
+    print(f"service   {elapsed * 1000:8.1f} ms  ({requests / elapsed:7.1f} req/s)")
+    if cli_paths:
+        print(f"cold CLI  {cli * 1000:8.1f} ms  ({len(cli_paths) / cli:7.1f} files/s) for {len(cli_paths)} files")
+    print(f"metrics   {json.dumps(metrics)}")
+    print(f"Responses match convert_bytes: {'yes' if not mismatches else f'NO ({mismatches} differ)'}")
+    print(f"Per-request overrides: {'ok' if override_ok else 'BROKEN'}; malformed XML -> HTTP {bad_status}")
+    sys.exit(1 if mismatches or not override_ok or bad_status != 400 else 0)
+
+
+if __name__ == '__main__':
+    main()
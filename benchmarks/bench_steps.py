@@ -0,0 +1,119 @@
+"""
+Memory and encode-time comparison of dict steps vs slotted WorkoutStep records
+
+Builds a large synthetic workout both ways, measures the bytes allocated per step
+with tracemalloc, and times the per-step field reads the encoder does: the old
+dict probing ('key' in step / step.get) against plain attribute access. The
+native encoder is also timed end to end on the slotted steps.
+
+    python benchmarks/bench_steps.py [--steps 20000] [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import WorkoutStep, zwoToFitConverter  # noqa: E402
+from fit_profile import Intensity, WorkoutStepDuration, WorkoutStepTarget  # noqa: E402
+
+OPTIONAL_FIELDS = ('custom_target_value_low', 'custom_target_value_high', 'intensity', 'notes', 'equipment')
+
+
+def make_dict_steps(count):
+    return [{
+        'wkt_step_name': f'Interval {i + 1} - Work',
+        'intensity': Intensity.ACTIVE,
+        'duration_type': WorkoutStepDuration.TIME,
+        'duration_value': 60000,
+        'target_type': WorkoutStepTarget.POWER,
+        'target_value': 0,
+        'custom_target_value_low': 1200 + i % 50,
+        'custom_target_value_high': 1250 + i % 50,
+    } for i in range(count)]
+
+
+def make_slotted_steps(count):
+    return [WorkoutStep(
+        wkt_step_name=f'Interval {i + 1} - Work',
+        intensity=Intensity.ACTIVE,
+        duration_type=WorkoutStepDuration.TIME,
+        duration_value=60000,
+        target_type=WorkoutStepTarget.POWER,
+        target_value=0,
+        custom_target_value_low=1200 + i % 50,
+        custom_target_value_high=1250 + i % 50,
+    ) for i in range(count)]
+
+
+def measure_memory(factory, count):
+    """Return bytes allocated per step, excluding the step name strings both forms share"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    steps = factory(count)
+    after = tracemalloc.get_traced_memory()[0]
+    names = sum(sys.getsizeof(step['wkt_step_name'] if isinstance(step, dict) else step.wkt_step_name)
+                for step in steps)
+    tracemalloc.stop()
+    return (after - before - names) / count
+
+
+def read_dict_steps(steps):
+    total = 0
+    for step in steps:
+        total += step['duration_value'] + step['target_value']
+        for name in OPTIONAL_FIELDS:
+            if name in step and isinstance(step[name], int):
+                total += step[name]
+    return total
+
+
+def read_slotted_steps(steps):
+    total = 0
+    for step in steps:
+        total += step.duration_value + step.target_value
+        for value in (step.custom_target_value_low, step.custom_target_value_high,
+                      step.intensity, step.notes, step.equipment):
+            if value is not None and isinstance(value, int):
+                total += value
+    return total
+
+
+def best_of(rounds, func, *args):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    dict_bytes = measure_memory(make_dict_steps, args.steps)
+    slotted_bytes = measure_memory(make_slotted_steps, args.steps)
+    print(f"{args.steps} steps")
+    print(f"Memory per step:  dict {dict_bytes:7.1f} B   WorkoutStep {slotted_bytes:7.1f} B   "
+          f"({dict_bytes / slotted_bytes:.1f}x smaller)")
+
+    dict_steps = make_dict_steps(args.steps)
+    slotted_steps = make_slotted_steps(args.steps)
+    dict_time = best_of(args.rounds, read_dict_steps, dict_steps)
+    slotted_time = best_of(args.rounds, read_slotted_steps, slotted_steps)
+    print(f"Field reads:      dict {dict_time * 1000:7.1f} ms  WorkoutStep {slotted_time * 1000:7.1f} ms  "
+          f"({dict_time / slotted_time:.1f}x faster)")
+
+    converter = zwoToFitConverter(backend='native')
+    workout = {'name': 'Synthetic', 'sport': 'bike', 'steps': slotted_steps[:65000]}
+    encode_time = best_of(args.rounds, converter.encode_fit_workout, workout, 1_000_000_000_000)
+    print(f"Native encode:    {encode_time * 1000:7.1f} ms  ({encode_time / len(workout['steps']) * 1e6:.2f} us/step)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Scalar vs vectorized (assign_targets_batch) step target computation
+
+Parses ./zwo with resolve_targets=False, replicates it into a large library, then
+times the scalar per-step path against the NumPy batch path for absolute-watt and
+%FTP power encodings. Every step's targets are compared; any difference is a failure.
+
+    python benchmarks/bench_targets.py [--zwo-folder ./zwo] [--copies 200]
+"""
+import argparse
+import copy
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import WorkoutStep, zwoToFitConverter  # noqa: E402
+from fit_profile import Intensity, WorkoutStepDuration, WorkoutStepTarget  # noqa: E402
+
+
+def synthetic_workout(step_count, seed=0):
+    """A workout of random power fractions, half power and half heart rate steps"""
+    rng = random.Random(seed)
+    steps = []
+    for i in range(step_count):
+        power_low = rng.uniform(0.3, 2.5)
+        power_high = power_low if i % 3 else rng.uniform(power_low, 2.5)
+        steps.append(WorkoutStep(
+            wkt_step_name='Synthetic', intensity=Intensity.ACTIVE,
+            duration_type=WorkoutStepDuration.TIME, duration_value=60000,
+            target_type=WorkoutStepTarget.POWER if i % 2 else WorkoutStepTarget.HEART_RATE,
+            target_value=0, power_low=power_low, power_high=power_high))
+    return {'name': 'Synthetic', 'description': '', 'sport': 'bike', 'steps': steps}
+
+
+def target_fields(workouts):
+    return [(step.target_value, step.custom_target_value_low, step.custom_target_value_high)
+            for workout in workouts for step in workout['steps']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--zwo-folder', default='./zwo')
+    parser.add_argument('--copies', type=int, default=200, help="How many times to replicate the corpus")
+    parser.add_argument('--synthetic-steps', type=int, default=100000)
+    args = parser.parse_args()
+
+    failures = 0
+    zwoToFitConverter().assign_targets_batch([])  # Pay the NumPy import before timing
+    for settings in ({'use_absolute_power': True}, {'use_absolute_power': False, 'ftp_watts': 287},
+                     {'use_absolute_power': True, 'power_buffer_percent': 3.5, 'ftp_watts': 313}):
+        converter = zwoToFitConverter(**settings)
+        corpus = [converter.parse_zwo_file(path, resolve_targets=False)
+                  for path in sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo')))]
+        library = [copy.deepcopy(workout) for _ in range(args.copies) for workout in corpus]
+        library.append(synthetic_workout(args.synthetic_steps))
+        scalar_library = copy.deepcopy(library)
+        step_count = sum(len(workout['steps']) for workout in library)
+
+        start = time.perf_counter()
+        for workout in scalar_library:
+            for step in workout['steps']:
+                converter._assign_targets(step)
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        converter.assign_targets_batch(library)
+        batch_time = time.perf_counter() - start
+
+        identical = target_fields(library) == target_fields(scalar_library)
+        failures += not identical
+        print(f"{settings}: {step_count} steps  scalar {scalar_time * 1000:8.1f} ms  "
+              f"batch {batch_time * 1000:7.1f} ms  ({scalar_time / batch_time:.1f}x)  "
+              f"{'identical' if identical else 'MISMATCH'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Throughput and detection check for the FIT verifier (fit_reader)
+
+Converts ./zwo with the native encoder, copies the outputs into a folder of
+--files files and times verify_folder over it. Then every single-bit flip and
+every truncation of one output must be reported as invalid.
+
+    python benchmarks/bench_verify.py [--files 20000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+from fit_reader import FitVerifyError, verify_fit, verify_folder  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FIT verifier")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--files', type=int, default=20000)
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    work_dir = tempfile.mkdtemp(prefix='zwo_bench_verify_')
+    try:
+        corpus_dir = os.path.join(work_dir, 'corpus')
+        zwo2fit.zwoToFitConverter(backend='native').convert_folder(args.zwo_folder, corpus_dir)
+        outputs = sorted(os.listdir(corpus_dir))
+        library_dir = os.path.join(work_dir, 'library')
+        os.makedirs(library_dir)
+        for i in range(args.files):
+            shutil.copyfile(os.path.join(corpus_dir, outputs[i % len(outputs)]), os.path.join(library_dir, f'{i:06d}.fit'))
+
+        start = time.perf_counter()
+        results = verify_folder(library_dir)
+        elapsed = time.perf_counter() - start
+        invalid = sum(problem is not None for _, problem in results)
+        print(f"{len(results)} files verified in {elapsed * 1000:.1f} ms ({len(results) / elapsed:.0f} files/s), "
+              f"{invalid} invalid")
+
+        with open(os.path.join(corpus_dir, outputs[0]), 'rb') as f:
+            data = f.read()
+        missed = 0
+        corruptions = [data[:size] for size in range(len(data))]
+        for position in range(len(data)):
+            for bit in range(8):
+                corrupt = bytearray(data)
+                corrupt[position] ^= 1 << bit
+                corruptions.append(bytes(corrupt))
+        for corrupt in corruptions:
+            try:
+                verify_fit(corrupt)
+                missed += 1
+            except FitVerifyError:
+                pass
+        print(f"{len(corruptions)} truncations and bit flips of {outputs[0]}: {missed} undetected")
+        return 1 if invalid or missed else 0
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cost and crash safety of the OutputWriter durability levels
+
+Replicates the workouts in ./zwo that convert into a folder of --files workouts,
+each with its own name (the loop index) and so its own output, and times
+convert_folder with each durability level, reporting the number of syncs each one
+issued; every level must write all --files outputs. Then a
+conversion is killed (SIGKILL) part way through, and every .fit file it left
+behind must pass fit_reader's verification: atomic renames mean a file is either
+complete or absent. Its temporary files are then aged past STALE_TEMP_SECONDS and a
+second run must sweep them away, but leave a fresh one alone.
+
+    python benchmarks/bench_writer.py [--files 2000] [--fsync-batch 64]
+"""
+import argparse
+import glob
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as zwo2fit  # noqa: E402
+from fit_reader import verify_folder  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the atomic output writer")
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--fsync-batch', type=int, default=64)
+    args = parser.parse_args()
+
+    zwo2fit.configure_logging(-1)
+    zwo2fit.logging.getLogger('zwo2fit').setLevel(zwo2fit.logging.CRITICAL)
+    work_dir = tempfile.mkdtemp(prefix='zwo_bench_writer_')
+    try:
+        converter = zwo2fit.zwoToFitConverter(backend='native')
+        # Only copy workouts that convert (and have a name to make unique), so every
+        # copy produces an output
+        sources = []
+        for path in sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo'))):
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+            try:
+                converter.convert_bytes(content.encode('utf-8'))
+            except Exception:
+                continue
+            if '<name>' in content:
+                sources.append(content)
+
+        # Copies get their own workout names, so every file has its own output
+        zwo_dir = os.path.join(work_dir, 'zwo')
+        os.makedirs(zwo_dir)
+        for i in range(args.files):
+            content = sources[i % len(sources)].replace('<name>', f'<name>{i:05d} ', 1)
+            with open(os.path.join(zwo_dir, f'{i:05d}.zwo'), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        failures = []
+        for durability in zwo2fit.DURABILITY_LEVELS:
+            fit_dir = os.path.join(work_dir, f'fit_{durability}')
+            writer = zwo2fit.OutputWriter(durability, args.fsync_batch)
+            start = time.perf_counter()
+            converter.convert_folder(zwo_dir, fit_dir, writer=writer)
+            elapsed = time.perf_counter() - start
+            written = len(os.listdir(fit_dir))
+            print(f"{durability:<6} {elapsed * 1000:8.1f} ms  {written} files  {writer.syncs} syncs")
+            if written != args.files:
+                failures.append(durability)
+
+        # Kill a conversion mid-batch and check what it left behind
+        fit_dir = os.path.join(work_dir, 'fit_killed')
+        process = subprocess.Popen([sys.executable, 'main.py', '--zwo-folder', zwo_dir, '--fit-folder', fit_dir,
+                                    '--backend', 'fit_tool', '-q'], cwd=ROOT, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        while not os.path.isdir(fit_dir) or len(os.listdir(fit_dir)) < args.fsync_batch * 2:
+            time.sleep(0.01)
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+        results = verify_folder(fit_dir)
+        invalid = [path for path, problem in results if problem is not None]
+        leftovers = len(os.listdir(fit_dir)) - len(results)
+        print(f"Killed run left {len(results)} .fit files ({len(invalid)} invalid) and {leftovers} temporary files")
+
+        # Age its temporary files (plus a planted one) past the sweep cutoff; a fresh one
+        # could belong to a run still going and must stay
+        with open(os.path.join(fit_dir, '.planted.fit.1-0.tmp'), 'wb'):
+            pass
+        stale = time.time() - zwo2fit.STALE_TEMP_SECONDS - 60
+        for name in os.listdir(fit_dir):
+            if not name.endswith('.fit'):
+                os.utime(os.path.join(fit_dir, name), (stale, stale))
+        with open(os.path.join(fit_dir, '.fresh.fit.1-0.tmp'), 'wb'):
+            pass
+        converter.convert_folder(zwo_dir, fit_dir, writer=zwo2fit.OutputWriter())
+        remaining = sorted(name for name in os.listdir(fit_dir) if not name.endswith('.fit'))
+        print(f"Rerun left {remaining}")
+        if failures:
+            print(f"FAIL: {', '.join(failures)} wrote fewer than {args.files} files")
+        return 1 if failures or invalid or remaining != ['.fresh.fit.1-0.tmp'] else 0
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Startup cost regression check
+
+Runs `python -X importtime` for `import main` and for `main.py --list` / `--dry-run`
+and fails (exit status 1) if any of them imports fit_tool, NumPy or multiprocessing,
+or if importing main takes longer than the budget. Each command is run several times
+and the fastest run is used, so a busy machine doesn't cause false failures.
+
+The budget is relative to a baseline measured in the same run: importing the standard
+library modules main can't do without (BASELINE_COMMAND), times --headroom. A fixed
+number of milliseconds would depend on the machine. The project's modules are
+byte-compiled first, so with PYTHONDONTWRITEBYTECODE set the check doesn't time
+compiling main.py on every import, which a normal install never does.
+
+    python benchmarks/check_startup.py [--headroom 1.5] [--budget-ms MS] [--runs 5]
+"""
+import argparse
+import glob
+import os
+import py_compile
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the encoder, batch targets or parallel conversion may load
+HEAVY_MODULES = ('fit_tool', 'numpy', 'multiprocessing')
+
+COMMANDS = {
+    'import main': ['-c', 'import main'],
+    'main.py --list': ['main.py', '--list', '-q'],
+    'main.py --dry-run': ['main.py', '--dry-run', '-q'],
+}
+
+# The standard library main imports at startup; the budget is measured against this
+BASELINE_COMMAND = ['-c', 'import argparse, logging, xml.etree.ElementTree, datetime']
+
+
+def import_times(args):
+    """Run python -X importtime and return {module: (self microseconds, cumulative microseconds)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(self_us), int(cumulative))
+    return times
+
+
+def total_ms(runs):
+    """Fastest run's total import time in milliseconds"""
+    return min(sum(self_us for self_us, _ in times.values()) for times in runs) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that main.py starts without heavy imports")
+    parser.add_argument('--headroom', type=float, default=1.5,
+                        help="Budget for import main as a multiple of the baseline import time")
+    parser.add_argument('--budget-ms', type=float, help="Fixed budget in milliseconds instead of the baseline")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for path in glob.glob(os.path.join(ROOT, '*.py')):
+        py_compile.compile(path, doraise=True)
+
+    baseline_ms = total_ms([import_times(BASELINE_COMMAND) for _ in range(args.runs)])
+    budget_ms = args.budget_ms if args.budget_ms is not None else baseline_ms * args.headroom
+    print(f"{'baseline':<20} {baseline_ms:6.1f} ms of imports (budget {budget_ms:.1f} ms)")
+
+    failures = []
+    for label, command in COMMANDS.items():
+        runs = [import_times(command) for _ in range(args.runs)]
+        heavy = sorted({module.split('.')[0] for times in runs for module in times} & set(HEAVY_MODULES))
+        command_ms = total_ms(runs)
+        print(f"{label:<20} {command_ms:6.1f} ms of imports{'  heavy: ' + ', '.join(heavy) if heavy else ''}")
+        if heavy:
+            failures.append(f"{label} imports {', '.join(heavy)}")
+        if label == 'import main' and command_ms > budget_ms:
+            failures.append(f"import main took {command_ms:.1f} ms (budget {budget_ms:.1f} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
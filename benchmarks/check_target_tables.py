@@ -0,0 +1,90 @@
+"""
+Check and time the per-profile target lookup tables used by _assign_targets
+
+For several athlete profiles, every power fraction on the table grid (and its
+heart rate zone grid), plus random off-grid and out-of-range values, is assigned
+through _assign_targets (tables) and computed directly with the exact helpers;
+any difference is a failure. Then the corpus steps are timed both ways.
+
+    python benchmarks/check_target_tables.py [--zwo-folder ./zwo] [--copies 50]
+"""
+import argparse
+import copy
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import TARGET_GRID, TARGET_GRID_MAX, WorkoutStep, zwoToFitConverter  # noqa: E402
+from fit_profile import WorkoutStepDuration, WorkoutStepTarget  # noqa: E402
+
+PROFILES = (
+    {},
+    {'use_absolute_power': False, 'ftp_watts': 287},
+    {'power_buffer_percent': 3.5, 'ftp_watts': 313},
+    {'power_buffer_percent': 0, 'ftp_watts': 199.5, 'use_absolute_power': False},
+)
+
+
+def exact_targets(converter, step):
+    """The targets _assign_targets must produce, computed without the tables"""
+    if step.target_type == WorkoutStepTarget.POWER:
+        return 0, converter._fit_power_low(step.power_low), converter._fit_power_high(step.power_high)
+    return converter._power_to_heart_rate_zone((step.power_low + step.power_high) / 2), None, None
+
+
+def test_powers(seed=0):
+    """Every grid value, every half-grid value and random values on and off the grid"""
+    rng = random.Random(seed)
+    size = int(TARGET_GRID_MAX * TARGET_GRID)
+    powers = [i / TARGET_GRID for i in range(size + 1)] + [i / (2 * TARGET_GRID) for i in range(2 * size + 1)]
+    powers += [rng.uniform(0, 3) for _ in range(5000)] + [round(rng.uniform(0, 3), 2) for _ in range(5000)]
+    return powers + [0.1 + 0.2, 2.5000001, 3.0, -0.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--zwo-folder', default='./zwo')
+    parser.add_argument('--copies', type=int, default=50, help="How many times to replicate the corpus for timing")
+    args = parser.parse_args()
+
+    failures = 0
+    powers = test_powers()
+    paths = sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo')))
+    for profile in PROFILES:
+        converter = zwoToFitConverter(**profile)
+        mismatches = 0
+        for target_type in (WorkoutStepTarget.POWER, WorkoutStepTarget.HEART_RATE):
+            for power_low, power_high in zip(powers, powers[1:] + powers[:1]):
+                step = WorkoutStep(wkt_step_name='Check', duration_type=WorkoutStepDuration.TIME, duration_value=0,
+                                   target_type=target_type, target_value=0, power_low=power_low,
+                                   power_high=power_high)
+                converter._assign_targets(step)
+                actual = (step.target_value, step.custom_target_value_low, step.custom_target_value_high)
+                mismatches += actual != exact_targets(converter, step)
+
+        steps = [step for path in paths for step in converter.parse_zwo_file(path, resolve_targets=False)['steps']
+                 if step.target_type is not None]
+        steps = [copy.copy(step) for _ in range(args.copies) for step in steps]
+        fresh = zwoToFitConverter(**profile)  # Time the tables from empty
+        start = time.perf_counter()
+        for step in steps:
+            fresh._assign_targets(step)
+        table_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for step in steps:
+            exact_targets(fresh, step)
+        exact_time = time.perf_counter() - start
+
+        failures += mismatches
+        print(f"{profile or 'defaults'}: {'identical' if not mismatches else f'{mismatches} MISMATCHES'}; "
+              f"{len(steps)} steps  tables {table_time * 1000:6.1f} ms  exact {exact_time * 1000:6.1f} ms  "
+              f"({exact_time / table_time:.1f}x)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
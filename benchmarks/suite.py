@@ -0,0 +1,214 @@
+"""
+Converter benchmark suite
+
+Times each phase of the conversion pipeline over several corpora and stores the
+results as JSON so runs on different commits can be compared.
+
+Corpora:
+    bundled   the .zwo files in ./zwo
+    library   a synthetic plan library (--library-size files, default 10000)
+    repeats   synthetic workouts with one huge IntervalsT block (--repeat-count repeats)
+
+Phases:
+    xml_parse           ET.parse of every file
+    step_parsers        _parse_workout_steps on the already parsed XML
+    parse_zwo_file      both of the above through the public API
+    encode              encode_fit_workout on the parsed workouts
+    create_fit_workout  encode + write to disk
+    convert_zwo_to_fit  parse + encode + write, file by file
+    convert_folder      the whole corpus through convert_folder
+
+Each phase reports wall time, files/sec and (unless --no-memory) the peak traced
+Python allocation from a second tracemalloc pass.
+
+    python benchmarks/suite.py [--corpus bundled,library,repeats] [--output results.json]
+                               [--compare baseline.json] [--backend native]
+"""
+import argparse
+import datetime
+import glob
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import BACKENDS, configure_logging, zwoToFitConverter  # noqa: E402
+from synthetic import generate_library  # noqa: E402
+
+CORPORA = ('bundled', 'library', 'repeats')
+TIME_CREATED = 1_000_000_000_000
+
+
+def _each(files, func):
+    """Apply func to every item, counting (not raising) failures"""
+    failures = 0
+    for item in files:
+        try:
+            func(item)
+        except Exception:
+            failures += 1
+    return failures
+
+
+def build_phases(converter, zwo_files, work_dir):
+    """Return (name, setup, run) triples; setup prepares inputs outside the timed region"""
+    fit_dir = os.path.join(work_dir, 'fit')
+
+    def parsed_trees():
+        return [ET.parse(path).getroot() for path in zwo_files]
+
+    def run_step_parsers(roots):
+        def parse_steps(root):
+            sport = root.find('sportType').text.lower()
+            converter._parse_workout_steps(root.find('workout'), sport)
+        return _each(roots, parse_steps)
+
+    def parsed_workouts():
+        workouts = []
+        for path in zwo_files:
+            try:
+                workouts.append(converter.parse_zwo_file(path))
+            except Exception:
+                pass
+        return workouts
+
+    def run_create(workouts):
+        os.makedirs(fit_dir, exist_ok=True)
+        return _each(workouts, lambda workout: converter.create_fit_workout(
+            workout, converter._output_path(workout, fit_dir)))
+
+    def run_convert(_):
+        os.makedirs(fit_dir, exist_ok=True)
+        return _each(zwo_files, lambda path: converter.convert_zwo_to_fit(path, fit_dir))
+
+    def run_folder(_):
+        converter.convert_folder(os.path.dirname(zwo_files[0]), fit_dir)
+        return 0
+
+    return [
+        ('xml_parse', lambda: None, lambda _: _each(zwo_files, ET.parse)),
+        ('step_parsers', parsed_trees, run_step_parsers),
+        ('parse_zwo_file', lambda: None, lambda _: _each(zwo_files, converter.parse_zwo_file)),
+        ('encode', parsed_workouts,
+         lambda workouts: _each(workouts, lambda workout: converter.encode_fit_workout(workout, TIME_CREATED))),
+        ('create_fit_workout', parsed_workouts, run_create),
+        ('convert_zwo_to_fit', lambda: None, run_convert),
+        ('convert_folder', lambda: None, run_folder),
+    ]
+
+
+def run_phase(setup, run, file_count, measure_memory):
+    inputs = setup()
+    start = time.perf_counter()
+    failures = run(inputs)
+    elapsed = time.perf_counter() - start
+    result = {
+        'seconds': elapsed,
+        'files_per_sec': file_count / elapsed if elapsed else None,
+        'failures': failures,
+    }
+    if measure_memory:
+        inputs = setup()
+        tracemalloc.start()
+        run(inputs)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def prepare_corpus(name, args, work_dir):
+    if name == 'bundled':
+        return sorted(glob.glob(os.path.join(args.zwo_folder, '*.zwo')))
+    folder = os.path.join(work_dir, f'{name}_zwo')
+    if name == 'library':
+        return generate_library(folder, args.library_size)
+    return generate_library(folder, args.repeat_files, repeats=args.repeat_count)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline):
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} (ratio < 1.00 is faster):")
+    for corpus, phases in results['corpora'].items():
+        old_phases = baseline.get('corpora', {}).get(corpus, {}).get('phases', {})
+        for phase, result in phases['phases'].items():
+            old = old_phases.get(phase)
+            if old and old.get('seconds'):
+                print(f"  {corpus:<8} {phase:<20} {result['seconds'] / old['seconds']:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--zwo-folder', default=os.path.join(ROOT, 'zwo'))
+    parser.add_argument('--corpus', default=','.join(CORPORA), help="Comma separated corpora to run")
+    parser.add_argument('--library-size', type=int, default=10000)
+    parser.add_argument('--repeat-files', type=int, default=20)
+    parser.add_argument('--repeat-count', type=int, default=2000)
+    parser.add_argument('--backend', choices=BACKENDS, default='fit_tool')
+    parser.add_argument('--compact-intervals', action='store_true')
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    configure_logging(-1)
+    logging.getLogger('zwo2fit').setLevel(logging.CRITICAL)  # Failures are counted, not printed
+
+    converter = zwoToFitConverter(force_warmup_power=0.5, backend=args.backend,
+                                  compact_intervals=args.compact_intervals)
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'backend': args.backend, 'compact_intervals': args.compact_intervals},
+        'corpora': {},
+    }
+
+    for name in args.corpus.split(','):
+        if name not in CORPORA:
+            parser.error(f"unknown corpus {name!r}")
+        work_dir = tempfile.mkdtemp(prefix=f'zwo_bench_{name}_')
+        try:
+            zwo_files = prepare_corpus(name, args, work_dir)
+            print(f"{name}: {len(zwo_files)} files")
+            corpus_result = {'files': len(zwo_files), 'phases': {}}
+            for phase, setup, run in build_phases(converter, zwo_files, work_dir):
+                result = run_phase(setup, run, len(zwo_files), not args.no_memory)
+                corpus_result['phases'][phase] = result
+                peak = f"{result['peak_bytes'] / 2**20:8.1f} MiB peak" if 'peak_bytes' in result else ''
+                print(f"  {phase:<20} {result['seconds'] * 1000:10.1f} ms  "
+                      f"{result['files_per_sec']:10.1f} files/s  {peak}"
+                      f"{'  (' + str(result['failures']) + ' failed)' if result['failures'] else ''}")
+            results['corpora'][name] = corpus_result
+        finally:
+            shutil.rmtree(work_dir)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Synthetic ZWO workout generator for benchmarks
+
+    python benchmarks/synthetic.py OUTPUT_FOLDER [--count 10000] [--repeats 0] [--seed 0]
+
+Generates deterministic workouts shaped like the bundled plans (warmup, steady
+blocks, interval sets, cooldown; bike and run). --repeats N instead writes
+workouts built around a single IntervalsT block with N repeats.
+"""
+import argparse
+import os
+import random
+
+SPORTS = ('bike', 'run')
+
+TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<workout_file>
+    <name>{name}</name>
+    <description>Synthetic benchmark workout</description>
+    <sportType>{sport}</sportType>
+    <workout>
+{elements}
+    </workout>
+</workout_file>
+"""
+
+
+def _power(rng, low, high):
+    return f"{rng.randint(int(low * 100), int(high * 100)) / 100:.2f}"
+
+
+def workout_elements(rng, repeats=0):
+    """Return the ZWO step elements of one workout as XML lines"""
+    elements = [f'<Warmup Duration="{rng.choice((300, 600, 900))}" '
+                f'PowerLow="{_power(rng, 0.45, 0.55)}" PowerHigh="{_power(rng, 0.6, 0.75)}"/>']
+    if repeats:
+        elements.append(f'<IntervalsT Repeat="{repeats}" OnDuration="30" OffDuration="15" '
+                        f'OnPower="{_power(rng, 1.05, 1.3)}" OffPower="{_power(rng, 0.4, 0.55)}"/>')
+    else:
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.5:
+                elements.append(f'<SteadyState Duration="{rng.choice((300, 480, 600, 720))}" '
+                                f'Power="{_power(rng, 0.55, 0.95)}"/>')
+            else:
+                elements.append(f'<IntervalsT Repeat="{rng.randint(2, 10)}" OnDuration="{rng.choice((60, 120, 180, 240))}" '
+                                f'OffDuration="{rng.choice((60, 90, 120))}" OnPower="{_power(rng, 0.85, 1.2)}" '
+                                f'OffPower="{_power(rng, 0.45, 0.6)}"/>')
+    elements.append(f'<Cooldown Duration="{rng.choice((300, 600))}" '
+                    f'PowerLow="{_power(rng, 0.45, 0.55)}" PowerHigh="{_power(rng, 0.55, 0.65)}"/>')
+    return elements
+
+
+def workout_xml(rng, name, repeats=0):
+    sport = rng.choice(SPORTS)
+    elements = '\n'.join(f"        {element}" for element in workout_elements(rng, repeats))
+    return TEMPLATE.format(name=name, sport=sport, elements=elements)
+
+
+def generate_library(output_folder, count, repeats=0, seed=0):
+    """
+    Write count synthetic .zwo files into output_folder
+
+    Returns:
+        Sorted list of the written file paths
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    rng = random.Random(seed)
+    prefix = f"SYN_R{repeats}" if repeats else "SYN"
+    paths = []
+    for i in range(count):
+        name = f"{prefix}_{i:06d}"
+        path = os.path.join(output_folder, f"{name}.zwo")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(workout_xml(rng, name, repeats))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('output_folder')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=0, help="Repeats of a single IntervalsT block per workout")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_library(args.output_folder, args.count, args.repeats, args.seed)
+    print(f"Wrote {len(paths)} workouts to {args.output_folder}")
+
+
+if __name__ == '__main__':
+    main()
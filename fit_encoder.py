@@ -0,0 +1,265 @@
+"""
+Native FIT encoder for the workout files written by zwoToFitConverter
+
+Only the three message types this tool emits are supported: file_id, workout and
+workout_step. Definition and data records are packed straight into a preallocated
+bytearray with precompiled struct layouts, and the file CRC is updated as each
+record is written.
+
+The output is byte-for-byte what FitFileBuilder(auto_define=True, min_string_size=50)
+produces for the same messages: every message uses local message type 0, a new
+definition record is written whenever the set of present fields changes, and field
+values go through the same profile scaling (e.g. duration_time is stored * 1000).
+"""
+import struct
+from enum import Enum
+
+# FIT timestamps count seconds from 1989-12-31T00:00:00Z
+FIT_EPOCH_OFFSET_MS = -631065600000
+
+# 12-byte header without header CRC, protocol 2.3, profile 21.212 (same as fit_tool)
+HEADER_SIZE = 12
+PROTOCOL_VERSION = 0x23
+PROFILE_VERSION = 21212
+HEADER_STRUCT = struct.Struct('<BBHI4s')
+
+# Global message numbers
+MESG_FILE_ID = 0
+MESG_WORKOUT = 26
+MESG_WORKOUT_STEP = 27
+
+# Base types: (type byte, struct code, size, max valid encoded value)
+ENUM = (0x00, 'B', 1, 0xFF)
+UINT16 = (0x84, 'H', 2, 0xFFFF)
+UINT32 = (0x86, 'I', 4, 0xFFFFFFFF)
+UINT32Z = (0x8C, 'I', 4, 0xFFFFFFFF)
+STRING = (0x07, 's', 1, None)
+
+# Field tables in profile order: (field number, name, base type)
+FILE_ID_FIELDS = (
+    (0, 'type', ENUM),
+    (1, 'manufacturer', UINT16),
+    (2, 'product', UINT16),
+    (3, 'serial_number', UINT32Z),
+    (4, 'time_created', UINT32),
+)
+
+WORKOUT_FIELDS = (
+    (4, 'sport', ENUM),
+    (5, 'capabilities', UINT32Z),
+    (6, 'num_valid_steps', UINT16),
+)
+
+WORKOUT_STEP_FIELDS = (
+    (254, 'message_index', UINT16),
+    (1, 'duration_type', ENUM),
+    (2, 'duration_value', UINT32),
+    (3, 'target_type', ENUM),
+    (4, 'target_value', UINT32),
+    (5, 'custom_target_value_low', UINT32),
+    (6, 'custom_target_value_high', UINT32),
+    (7, 'intensity', ENUM),
+    (8, 'notes', STRING),
+    (9, 'equipment', ENUM),
+)
+
+# Profile sub-field scales, keyed by the duration_type / target_type that selects them
+DURATION_VALUE_SCALES = {0: 1000, 28: 1000, 1: 100}
+TARGET_VALUE_ZONE_TYPES = (0, 1, 3, 4, 11)
+TARGET_VALUE_REPEAT_SCALES = {7: 1000, 8: 100}
+CUSTOM_TARGET_SPEED_TYPES = (0, 12)
+
+
+def _build_crc_table():
+    """Expand the FIT SDK nibble CRC into a 256-entry byte table"""
+    nibble_table = (
+        0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+        0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+    )
+    table = []
+    for byte in range(256):
+        crc = 0
+        for nibble in (byte & 0xF, byte >> 4):
+            tmp = nibble_table[crc & 0xF]
+            crc = (crc >> 4) & 0x0FFF
+            crc = crc ^ tmp ^ nibble_table[nibble]
+        table.append(crc)
+    return tuple(table)
+
+
+CRC_TABLE = _build_crc_table()
+
+
+def crc16(data, crc=0):
+    """FIT CRC-16 of a bytes-like object, continuing from crc"""
+    table = CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class _Layout:
+    """Precompiled definition record and data struct for one set of present fields"""
+    __slots__ = ('definition', 'data_struct', 'limits')
+
+    def __init__(self, global_id, fields):
+        definition = bytearray(struct.pack('<BBBHB', 0x40, 0, 0, global_id, len(fields)))
+        fmt = '<B'
+        for field_id, size, base_type in fields:
+            definition += struct.pack('BBB', field_id, size, base_type[0])
+            fmt += f'{size}s' if base_type is STRING else base_type[1]
+        self.definition = bytes(definition)
+        self.data_struct = struct.Struct(fmt)
+        self.limits = tuple(base_type[3] for _, _, base_type in fields)
+
+
+_layout_cache = {}
+
+
+def _get_layout(global_id, fields):
+    key = (global_id, fields)
+    layout = _layout_cache.get(key)
+    if layout is None:
+        layout = _layout_cache[key] = _Layout(global_id, fields)
+    return layout
+
+
+def _raw(value):
+    """Return the encoded integer for a profile enum or plain number"""
+    return value.value if isinstance(value, Enum) else value
+
+
+def _scale(value, scale):
+    return round(value * scale) if scale != 1 else int(value)
+
+
+def _file_id_record(time_created, file_type, manufacturer, product, serial_number):
+    fields = tuple((field_id, base_type[2], base_type) for field_id, _, base_type in FILE_ID_FIELDS)
+    values = (
+        _raw(file_type),
+        _raw(manufacturer),
+        product,
+        serial_number,
+        round((time_created + FIT_EPOCH_OFFSET_MS) * 0.001),
+    )
+    return _get_layout(MESG_FILE_ID, fields), ('type', 'manufacturer', 'product', 'serial_number', 'time_created'), values
+
+
+def _workout_record(sport, capabilities, num_valid_steps):
+    fields = tuple((field_id, base_type[2], base_type) for field_id, _, base_type in WORKOUT_FIELDS)
+    values = (_raw(sport), _raw(capabilities), num_valid_steps)
+    return _get_layout(MESG_WORKOUT, fields), ('sport', 'capabilities', 'num_valid_steps'), values
+
+
+def _workout_step_record(index, step, min_string_size):
+    duration_type = _raw(step.duration_type)
+    target_type = _raw(step.target_type)
+
+    present = {
+        'message_index': index,
+        'duration_type': duration_type,
+        'duration_value': step.duration_value,
+        'target_type': target_type,
+        'target_value': step.target_value,
+        'custom_target_value_low': step.custom_target_value_low,
+        'custom_target_value_high': step.custom_target_value_high,
+        'intensity': _raw(step.intensity),
+        'notes': step.notes,
+        'equipment': _raw(step.equipment),
+    }
+
+    # Apply the same sub-field scaling fit_tool resolves from duration_type / target_type
+    if present['duration_value'] is not None:
+        present['duration_value'] = _scale(present['duration_value'], DURATION_VALUE_SCALES.get(duration_type, 1))
+    if present['target_value'] is not None:
+        if target_type in TARGET_VALUE_ZONE_TYPES:
+            scale = 1
+        else:
+            scale = TARGET_VALUE_REPEAT_SCALES.get(duration_type, 1)
+        present['target_value'] = _scale(present['target_value'], scale)
+    custom_scale = 1000 if target_type in CUSTOM_TARGET_SPEED_TYPES else 1
+    for name in ('custom_target_value_low', 'custom_target_value_high'):
+        if present[name] is not None:
+            present[name] = _scale(present[name], custom_scale)
+
+    fields = []
+    names = []
+    values = []
+    for field_id, name, base_type in WORKOUT_STEP_FIELDS:
+        value = present[name]
+        if value is None:
+            continue
+        if base_type is STRING:
+            value = value.encode('utf-8') + b'\x00'
+            size = max(len(value), min_string_size)
+        else:
+            size = base_type[2]
+        fields.append((field_id, size, base_type))
+        names.append(name)
+        values.append(value)
+    return _get_layout(MESG_WORKOUT_STEP, tuple(fields)), tuple(names), values
+
+
+def _check_range(names, values, limits):
+    """Raise the same error fit_tool raises for an out-of-range field value"""
+    for name, value, limit in zip(names, values, limits):
+        if limit is not None and not 0 <= value <= limit:
+            raise ValueError(f'{name} encoded value {value} is not in valid range [0, {limit}]')
+
+
+def encode_workout(steps, sport, time_created, capabilities=32, file_type=5,
+                   manufacturer=1, product=0, serial_number=0x12345678, min_string_size=50):
+    """
+    Encode a workout FIT file
+
+    Args:
+        steps: WorkoutStep records as produced by zwoToFitConverter's step parsers
+        sport: FIT sport (enum or int)
+        time_created: Creation time in milliseconds since the Unix epoch
+        capabilities: FIT workout capabilities bit field (default TCX)
+        file_type, manufacturer, product, serial_number: file_id fields
+        min_string_size: Minimum size of string fields, as in FitFileBuilder
+
+    Returns:
+        The complete FIT file as bytes
+    """
+    records = [
+        _file_id_record(time_created, file_type, manufacturer, product, serial_number),
+        _workout_record(sport, capabilities, len(steps)),
+    ]
+    for index, step in enumerate(steps):
+        records.append(_workout_step_record(index, step, min_string_size))
+
+    # Size everything up front so the buffer is allocated exactly once
+    records_size = 0
+    previous = None
+    for layout, _, _ in records:
+        if layout is not previous:
+            records_size += len(layout.definition)
+            previous = layout
+        records_size += layout.data_struct.size
+
+    buffer = bytearray(HEADER_SIZE + records_size + 2)
+    HEADER_STRUCT.pack_into(buffer, 0, HEADER_SIZE, PROTOCOL_VERSION, PROFILE_VERSION, records_size, b'.FIT')
+
+    view = memoryview(buffer)
+    crc = crc16(view[:HEADER_SIZE])
+    offset = HEADER_SIZE
+    previous = None
+    for layout, names, values in records:
+        start = offset
+        if layout is not previous:
+            definition = layout.definition
+            buffer[offset:offset + len(definition)] = definition
+            offset += len(definition)
+            previous = layout
+        try:
+            layout.data_struct.pack_into(buffer, offset, 0, *values)
+        except struct.error:
+            _check_range(names, values, layout.limits)
+            raise
+        offset += layout.data_struct.size
+        crc = crc16(view[start:offset], crc)
+
+    struct.pack_into('<H', buffer, offset, crc)
+    return bytes(buffer)
@@ -0,0 +1,104 @@
+"""
+FIT profile enums used by zwoToFitConverter
+
+A lightweight copy of the fit_tool.profile.profile_type members this tool needs, with
+the same names and values, so parsing workouts does not import fit_tool (whose profile
+module alone dominates startup time). Both encoder backends accept these enums since
+they only use the underlying values.
+"""
+from enum import Enum
+
+
+class FileType(Enum):
+    WORKOUT = 5
+
+
+class Manufacturer(Enum):
+    GARMIN = 1
+
+
+class Sport(Enum):
+    GENERIC = 0
+    RUNNING = 1
+    CYCLING = 2
+    TRANSITION = 3
+    FITNESS_EQUIPMENT = 4
+    SWIMMING = 5
+
+
+class Intensity(Enum):
+    ACTIVE = 0
+    REST = 1
+    WARMUP = 2
+    COOLDOWN = 3
+    RECOVERY = 4
+    INTERVAL = 5
+    OTHER = 6
+
+
+class WorkoutCapabilities(Enum):
+    INTERVAL = 1
+    CUSTOM = 2
+    FITNESS_EQUIPMENT = 4
+    FIRSTBEAT = 8
+    NEW_LEAF = 16
+    TCX = 32
+    SPEED = 128
+    HEART_RATE = 256
+    DISTANCE = 512
+    CADENCE = 1024
+    POWER = 2048
+    GRADE = 4096
+    RESISTANCE = 8192
+    PROTECTED = 16384
+
+
+class WorkoutStepDuration(Enum):
+    TIME = 0
+    DISTANCE = 1
+    HR_LESS_THAN = 2
+    HR_GREATER_THAN = 3
+    CALORIES = 4
+    OPEN = 5
+    REPEAT_UNTIL_STEPS_CMPLT = 6
+    REPEAT_UNTIL_TIME = 7
+    REPEAT_UNTIL_DISTANCE = 8
+    REPEAT_UNTIL_CALORIES = 9
+    REPEAT_UNTIL_HR_LESS_THAN = 10
+    REPEAT_UNTIL_HR_GREATER_THAN = 11
+    REPEAT_UNTIL_POWER_LESS_THAN = 12
+    REPEAT_UNTIL_POWER_GREATER_THAN = 13
+    POWER_LESS_THAN = 14
+    POWER_GREATER_THAN = 15
+    TRAINING_PEAKS_TSS = 16
+    REPEAT_UNTIL_POWER_LAST_LAP_LESS_THAN = 17
+    REPEAT_UNTIL_MAX_POWER_LAST_LAP_LESS_THAN = 18
+    POWER_3S_LESS_THAN = 19
+    POWER_10S_LESS_THAN = 20
+    POWER_30S_LESS_THAN = 21
+    POWER_3S_GREATER_THAN = 22
+    POWER_10S_GREATER_THAN = 23
+    POWER_30S_GREATER_THAN = 24
+    POWER_LAP_LESS_THAN = 25
+    POWER_LAP_GREATER_THAN = 26
+    REPEAT_UNTIL_TRAINING_PEAKS_TSS = 27
+    REPETITION_TIME = 28
+    REPS = 29
+    TIME_ONLY = 31
+
+
+class WorkoutStepTarget(Enum):
+    SPEED = 0
+    HEART_RATE = 1
+    OPEN = 2
+    CADENCE = 3
+    POWER = 4
+    GRADE = 5
+    RESISTANCE = 6
+    POWER_3S = 7
+    POWER_10S = 8
+    POWER_30S = 9
+    POWER_LAP = 10
+    SWIM_STROKE = 11
+    SPEED_LAP = 12
+    HEART_RATE_LAP = 13
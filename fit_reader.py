@@ -0,0 +1,279 @@
+"""
+Fast structural verification of FIT workout files
+
+verify_fit() walks the record headers of a FIT file in place (struct.unpack_from on
+a memoryview, no message objects) and checks what a watch would reject: the header,
+the declared data size against the file size, every record against its definition,
+the header and file CRCs, and the workout's num_valid_steps against the number of
+workout_step messages. verify_file() memory-maps large files and reads small ones.
+
+iter_messages() walks the same records but decodes the data messages, one at a time,
+into {field number: raw value} dicts with a struct compiled per definition.
+"""
+import glob
+import mmap
+import os
+import struct
+
+from fit_encoder import MESG_FILE_ID, MESG_WORKOUT, MESG_WORKOUT_STEP, crc16
+
+WORKOUT_NUM_VALID_STEPS = 6  # Field number of workout.num_valid_steps
+
+# Files at least this large are memory-mapped; mapping costs more than reading a small file
+MMAP_THRESHOLD = 64 * 1024
+
+HEADER = struct.Struct('<BBHI4s')
+DEFINITION = struct.Struct('<xBHB')  # reserved, architecture, global message number (little endian), field count
+
+# FIT base type number (low 5 bits of the base type byte) -> (struct code, size, invalid value)
+BASE_TYPES = {
+    0: ('B', 1, 0xFF),  # enum
+    1: ('b', 1, 0x7F),  # sint8
+    2: ('B', 1, 0xFF),  # uint8
+    3: ('h', 2, 0x7FFF),  # sint16
+    4: ('H', 2, 0xFFFF),  # uint16
+    5: ('i', 4, 0x7FFFFFFF),  # sint32
+    6: ('I', 4, 0xFFFFFFFF),  # uint32
+    8: ('f', 4, None),  # float32
+    9: ('d', 8, None),  # float64
+    10: ('B', 1, 0),  # uint8z
+    11: ('H', 2, 0),  # uint16z
+    12: ('I', 4, 0),  # uint32z
+    14: ('q', 8, 0x7FFFFFFFFFFFFFFF),  # sint64
+    15: ('Q', 8, 0xFFFFFFFFFFFFFFFF),  # uint64
+    16: ('Q', 8, 0),  # uint64z
+}
+BASE_TYPE_STRING = 7
+
+
+class FitVerifyError(ValueError):
+    """A FIT file is malformed"""
+
+
+def verify_fit(data):
+    """
+    Check that data is a well-formed FIT workout file
+
+    Args:
+        data: The file content, any bytes-like object
+
+    Returns:
+        The number of workout_step messages
+
+    Raises:
+        FitVerifyError: Describing the first problem found
+    """
+    view = memoryview(data)
+    header_size, end = _read_header(view)
+    if header_size == 14:
+        header_crc = view[12] | view[13] << 8
+        if header_crc and header_crc != crc16(view[:12]):
+            raise FitVerifyError("header CRC mismatch")
+    if crc16(view[:end]) != (view[end] | view[end + 1] << 8):
+        raise FitVerifyError("file CRC mismatch")
+
+    # local message type -> (global message number, data size, (offset, big endian) of num_valid_steps)
+    definitions = {}
+    offset = header_size
+    messages = {MESG_FILE_ID: 0, MESG_WORKOUT: 0, MESG_WORKOUT_STEP: 0}
+    num_valid_steps = None
+    while offset < end:
+        record_header = view[offset]
+        offset += 1
+        if record_header & 0x80:
+            local_type = (record_header >> 5) & 0x03  # Compressed timestamp header, always a data message
+        elif record_header & 0x40:
+            if offset + 5 > end:
+                raise FitVerifyError(f"definition record truncated at byte {offset - 1}")
+            architecture, global_number, field_count = DEFINITION.unpack_from(view, offset)
+            if architecture:
+                global_number = global_number >> 8 | (global_number & 0xFF) << 8
+            fields_start = offset + 5
+            offset = fields_start + 3 * field_count
+            if record_header & 0x20:  # Developer data fields follow
+                if offset >= end:
+                    raise FitVerifyError(f"definition record truncated at byte {fields_start - 6}")
+                offset += 1 + 3 * view[offset]
+            if offset > end:
+                raise FitVerifyError(f"definition record truncated at byte {fields_start - 6}")
+            data_size = 0
+            steps_field = None
+            for field in range(fields_start, fields_start + 3 * field_count, 3):
+                if global_number == MESG_WORKOUT and view[field] == WORKOUT_NUM_VALID_STEPS and view[field + 1] == 2:
+                    steps_field = (data_size, architecture)
+                data_size += view[field + 1]
+            if record_header & 0x20:
+                developer_start = fields_start + 3 * field_count + 1
+                data_size += sum(view[field + 1] for field in range(developer_start, offset, 3))
+            definitions[record_header & 0x0F] = (global_number, data_size, steps_field)
+            continue
+        else:
+            local_type = record_header & 0x0F
+
+        definition = definitions.get(local_type)
+        if definition is None:
+            raise FitVerifyError(f"data record at byte {offset - 1} uses undefined local message {local_type}")
+        global_number, data_size, steps_field = definition
+        if offset + data_size > end:
+            raise FitVerifyError(f"data record truncated at byte {offset - 1}")
+        if global_number in messages:
+            messages[global_number] += 1
+        if steps_field is not None:
+            position = offset + steps_field[0]
+            num_valid_steps = (view[position] << 8 | view[position + 1] if steps_field[1]
+                               else view[position] | view[position + 1] << 8)
+        offset += data_size
+
+    if not messages[MESG_FILE_ID]:
+        raise FitVerifyError("no file_id message")
+    if not messages[MESG_WORKOUT]:
+        raise FitVerifyError("no workout message")
+    if num_valid_steps is not None and num_valid_steps != 0xFFFF and num_valid_steps != messages[MESG_WORKOUT_STEP]:
+        raise FitVerifyError(f"num_valid_steps is {num_valid_steps} but the file has "
+                             f"{messages[MESG_WORKOUT_STEP]} workout_step messages")
+    return messages[MESG_WORKOUT_STEP]
+
+
+def _read_header(view):
+    """Check the file header and size, returning (header size, end of the records)"""
+    size = len(view)
+    if size == 0:
+        raise FitVerifyError("empty file")
+    if size < 12:
+        raise FitVerifyError(f"truncated header ({size} bytes)")
+    header_size, _, _, data_size, signature = HEADER.unpack_from(view, 0)
+    if signature != b'.FIT' or header_size not in (12, 14):
+        raise FitVerifyError("not a FIT file")
+    if size < header_size:
+        raise FitVerifyError(f"truncated header ({size} bytes)")
+    end = header_size + data_size
+    if size != end + 2:
+        raise FitVerifyError(f"{'truncated' if size < end + 2 else 'trailing data'}: header declares "
+                             f"{end + 2} bytes, file has {size}")
+    return header_size, end
+
+
+def iter_messages(data, global_numbers=None):
+    """
+    Decode the data messages of a FIT file one at a time
+    
+    Records are read in place; nothing but the current message is built. CRCs are not
+    checked (use verify_fit), but the header, the declared size and every record's
+    bounds are.
+    
+    Args:
+        data: The file content, any bytes-like object
+        global_numbers: If given, only messages with these global message numbers are
+            decoded and yielded; the rest are skipped without unpacking
+    
+    Yields:
+        (global message number, {field number: value}) with invalid (unset) fields
+        left out; strings are decoded up to their NUL, arrays and byte fields are bytes
+    
+    Raises:
+        FitVerifyError: If the file is not a FIT file or a record is truncated or undefined
+    """
+    view = memoryview(data)
+    header_size, end = _read_header(view)
+    
+    # local message type -> (global message number, data size, compiled struct or None, fields)
+    definitions = {}
+    offset = header_size
+    while offset < end:
+        record_header = view[offset]
+        offset += 1
+        if record_header & 0x80:
+            local_type = (record_header >> 5) & 0x03  # Compressed timestamp header, always a data message
+        elif record_header & 0x40:
+            if offset + 5 > end:
+                raise FitVerifyError(f"definition record truncated at byte {offset - 1}")
+            architecture, global_number, field_count = DEFINITION.unpack_from(view, offset)
+            if architecture:
+                global_number = global_number >> 8 | (global_number & 0xFF) << 8
+            fields_start = offset + 5
+            offset = fields_start + 3 * field_count
+            developer_size = 0
+            if record_header & 0x20:  # Developer data fields follow
+                if offset >= end:
+                    raise FitVerifyError(f"definition record truncated at byte {fields_start - 6}")
+                developer_count = view[offset]
+                developer_size = sum(view[field + 1] for field in range(offset + 1, min(offset + 1 + 3 * developer_count, end), 3))
+                offset += 1 + 3 * developer_count
+            if offset > end:
+                raise FitVerifyError(f"definition record truncated at byte {fields_start - 6}")
+            definitions[record_header & 0x0F] = _compile_definition(
+                view, fields_start, field_count, architecture, developer_size,
+                global_numbers is None or global_number in global_numbers) + (global_number,)
+            continue
+        else:
+            local_type = record_header & 0x0F
+        
+        definition = definitions.get(local_type)
+        if definition is None:
+            raise FitVerifyError(f"data record at byte {offset - 1} uses undefined local message {local_type}")
+        data_size, record_struct, fields, global_number = definition
+        if offset + data_size > end:
+            raise FitVerifyError(f"data record truncated at byte {offset - 1}")
+        if record_struct is not None:
+            message = {}
+            for (field_number, kind, invalid), value in zip(fields, record_struct.unpack_from(view, offset)):
+                if kind == BASE_TYPE_STRING:
+                    value = value.split(b'\0', 1)[0].decode('utf-8', 'replace')
+                    if not value:
+                        continue
+                elif value == invalid:
+                    continue
+                message[field_number] = value
+            yield global_number, message
+        offset += data_size
+
+
+def _compile_definition(view, fields_start, field_count, architecture, developer_size, wanted):
+    """(data size, struct or None if not wanted, ((field number, base type, invalid value), ...))"""
+    fmt = '>' if architecture else '<'
+    fields = []
+    data_size = developer_size
+    for field in range(fields_start, fields_start + 3 * field_count, 3):
+        field_number, size, base_type = view[field], view[field + 1], view[field + 2] & 0x1F
+        data_size += size
+        code, base_size, invalid = BASE_TYPES.get(base_type, (None, None, None))
+        if base_type == BASE_TYPE_STRING:
+            fmt += f'{size}s'
+        elif code is None or size != base_size:
+            fmt += f'{size}s'  # Arrays and byte fields stay raw
+            base_type = invalid = None
+        else:
+            fmt += code
+        fields.append((field_number, base_type, invalid))
+    if developer_size:
+        fmt += f'{developer_size}x'
+    return data_size, struct.Struct(fmt) if wanted else None, tuple(fields)
+
+
+def verify_file(path):
+    """
+    Verify one FIT file
+
+    Returns:
+        None if the file is well formed, else a description of the problem
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                verify_fit(f.read())
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    verify_fit(view)
+                finally:
+                    view.release()  # The map can't close while a view exports it
+    except (FitVerifyError, OSError) as e:
+        return str(e)
+    return None
+
+
+def verify_folder(fit_folder_path):
+    """Verify every .fit file in a folder, returning sorted (path, problem or None) tuples"""
+    return [(path, verify_file(path)) for path in sorted(glob.glob(os.path.join(fit_folder_path, '*.fit')))]
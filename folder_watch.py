@@ -0,0 +1,128 @@
+"""
+Folder change notification for zwoToFitConverter's watch mode
+
+InotifyWatcher uses Linux inotify through ctypes, so it needs no extra dependency;
+PollingWatcher rescans the folder and works everywhere. open_watcher() prefers inotify
+and falls back to polling.
+
+Both watchers report changes as (file name, deleted, time.monotonic() when seen)
+tuples for files with the watched suffix. A None file name means events were lost
+(inotify queue overflow) and the whole folder should be rescanned.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# inotify event masks and flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Finished writes and renames into the folder are changes; deletes and renames out are removals.
+# IN_CREATE/IN_MODIFY are left out so half-written files are never picked up.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+DELETE_MASK = IN_MOVED_FROM | IN_DELETE
+
+# struct inotify_event header: wd, mask, cookie, len (followed by len bytes of name)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Watch a folder with inotify"""
+    name = 'inotify'
+
+    def __init__(self, folder, suffix='.zwo'):
+        self.suffix = suffix
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), folder)
+
+    def read_events(self, timeout=None):
+        """Wait up to timeout seconds (None: forever) and return the changes seen"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        now = time.monotonic()
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    events.append((None, False, now))
+                elif name.endswith(self.suffix):
+                    events.append((name, bool(mask & DELETE_MASK), now))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Watch a folder by comparing (size, mtime, inode) snapshots every interval seconds"""
+    name = 'polling'
+
+    def __init__(self, folder, suffix='.zwo', interval=0.25):
+        self.folder = folder
+        self.suffix = suffix
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        return snapshot
+
+    def read_events(self, timeout=None):
+        """Wait up to timeout seconds (None: forever) and return the changes seen"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            now = time.monotonic()
+            events = [(name, False, now) for name, signature in current.items() if self.snapshot.get(name) != signature]
+            events += [(name, True, now) for name in self.snapshot if name not in current]
+            self.snapshot = current
+            if events or (deadline is not None and now >= deadline):
+                return events
+            time.sleep(self.interval if deadline is None else min(self.interval, deadline - now))
+
+    def close(self):
+        pass
+
+
+def open_watcher(folder, suffix='.zwo', poll_interval=0.25, use_inotify=True):
+    """Return an InotifyWatcher for folder if inotify is available, else a PollingWatcher"""
+    if use_inotify:
+        try:
+            return InotifyWatcher(folder, suffix)
+        except (OSError, AttributeError, TypeError):
+            pass  # Not Linux, no libc symbol, or out of watches
+    return PollingWatcher(folder, suffix, poll_interval)
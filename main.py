@@ -1,17 +1,195 @@
+import argparse
+import copy
 import datetime
+import logging
 import xml.etree.ElementTree as ET
 import os
+import posixpath
+import re
 import glob
-from fit_tool.fit_file_builder import FitFileBuilder
-from fit_tool.profile.messages.file_id_message import FileIdMessage
-from fit_tool.profile.messages.workout_message import WorkoutMessage
-from fit_tool.profile.messages.workout_step_message import WorkoutStepMessage
-from fit_tool.profile.profile_type import Sport, Intensity, WorkoutStepDuration, WorkoutStepTarget, Manufacturer, FileType, WorkoutCapabilities
+import functools
+import sys
+import time
+import marshal
+import collections
+import itertools
+import threading
+from fit_profile import Sport, Intensity, WorkoutStepDuration, WorkoutStepTarget, Manufacturer, FileType, WorkoutCapabilities
+from fit_encoder import MESG_FILE_ID, MESG_WORKOUT, MESG_WORKOUT_STEP, encode_workout
+
+# Per-subsystem loggers; messages use %-style arguments so disabled levels skip formatting
+parse_logger = logging.getLogger('zwo2fit.parse')
+targets_logger = logging.getLogger('zwo2fit.targets')
+encode_logger = logging.getLogger('zwo2fit.encode')
+batch_logger = logging.getLogger('zwo2fit.batch')
+
+LOGGER_NAMES = ('zwo2fit', 'zwo2fit.parse', 'zwo2fit.targets', 'zwo2fit.encode', 'zwo2fit.batch')
+
+
+def configure_logging(verbosity=0):
+    """
+    Send zwo2fit log messages to stdout
+    
+    Args:
+        verbosity: -1 shows only failures, 0 (default) adds the batch summary,
+            1 adds one line per converted file, 2 adds every step and target detail
+    """
+    root = logging.getLogger('zwo2fit')
+    root.handlers.clear()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    root.addHandler(handler)
+    root.propagate = False
+    
+    if verbosity < 0:
+        root.setLevel(logging.WARNING)
+    elif verbosity == 0:
+        root.setLevel(logging.WARNING)
+        batch_logger.setLevel(logging.INFO)
+    else:
+        root.setLevel(logging.INFO if verbosity == 1 else logging.DEBUG)
+    for name in LOGGER_NAMES[1:]:
+        if name != 'zwo2fit.batch' or verbosity != 0:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+
+
+class _RecordCollector(logging.Handler):
+    """Collects formatted log messages so a worker process can send them back to the parent"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((record.name, record.levelno, record.getMessage()))
+
+
+class WorkoutStep:
+    """
+    A single FIT workout step as produced by the step parsers
+    
+    Slotted so large workouts don't carry a dict per step; fields left as None
+    are not written to the FIT file. Written out by hand rather than as a
+    dataclass so importing main doesn't pull in dataclasses (and inspect).
+    """
+    __slots__ = ('wkt_step_name', 'duration_type', 'duration_value', 'target_type', 'target_value',
+                 'custom_target_value_low', 'custom_target_value_high', 'intensity', 'notes', 'equipment',
+                 'power_low', 'power_high')
+
+    def __init__(self, wkt_step_name, duration_type, duration_value, target_type, target_value,
+                 custom_target_value_low=None, custom_target_value_high=None, intensity=None,
+                 notes=None, equipment=None, power_low=None, power_high=None):
+        self.wkt_step_name = wkt_step_name
+        self.duration_type = duration_type
+        self.duration_value = duration_value
+        self.target_type = target_type
+        self.target_value = target_value
+        self.custom_target_value_low = custom_target_value_low
+        self.custom_target_value_high = custom_target_value_high
+        self.intensity = intensity
+        self.notes = notes
+        self.equipment = equipment
+        # ZWO power as a fraction of FTP; the FIT targets above are computed from these
+        self.power_low = power_low
+        self.power_high = power_high
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"WorkoutStep({fields})"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+
+def time_created_now():
+    """Current time in milliseconds since the Unix epoch, for the FIT file_id time_created"""
+    return round(datetime.datetime.now().timestamp() * 1000)
+
+
+def load_zwo_source(zwo_file_path, data=None):
+    """
+    Read a .zwo file into the settings-independent parts the step parsers work from
+    
+    Args:
+        zwo_file_path: Path to the .zwo file (unused when data is given)
+        data: The file's content as bytes or str, if already in memory
+    
+    Returns:
+        Dict with the workout name, description, lowercased sport and the <workout>
+        element (None if the file has none)
+    """
+    root = ET.parse(zwo_file_path).getroot() if data is None else ET.fromstring(data)
+    
+    # Extract basic workout info
+    name = root.find('name').text if root.find('name') is not None else 'Unnamed Workout'
+    description = root.find('description').text if root.find('description') is not None else ''
+    sport_type = root.find('sportType').text if root.find('sportType') is not None else 'other'
+    
+    return {
+        'name': name,
+        'description': description,
+        'sport': sport_type.lower(),
+        'workout': root.find('workout'),
+    }
+
+
+def _warn_skipped_elements(workout):
+    """Report the ZWO elements of a workout that had no step parser and were left out"""
+    if workout['skipped_elements']:
+        parse_logger.warning("%s: skipped unsupported ZWO elements: %s", workout['name'],
+                             ", ".join(f"{tag} x{count}" for tag, count in sorted(workout['skipped_elements'].items())))
+
+
+# Upper bound (in % FTP) of heart rate zones 1-4; anything above is zone 5
+HR_ZONE_UPPER_BOUNDS = (55, 70, 85, 95)
+
+# Power (fraction of FTP) fit_to_zwo gives steps with a zone target: one inside each heart
+# rate zone above, so it maps back to the same zone, and the middle of each of the 7 power zones
+HR_ZONE_POWER = (0.50, 0.65, 0.80, 0.90, 1.05)
+POWER_ZONE_POWER = (0.50, 0.65, 0.83, 0.98, 1.13, 1.35, 1.60)
+
+# FIT sport -> ZWO sportType, for fit_to_zwo
+ZWO_SPORTS = {Sport.CYCLING.value: 'bike', Sport.RUNNING.value: 'run', Sport.SWIMMING.value: 'swim'}
+
+# ZWO Duration written for FIT steps that end on the lap button, which ZWO can't express
+OPEN_STEP_SECONDS = 600
+
+# Most steps fit_to_zwo expands a workout's repeat steps into
+MAX_DECODED_STEPS = 10000
+
+# file_id product and serial_number both encoders write (with Manufacturer.GARMIN), which
+# fit_to_zwo uses to recognise this converter's own files
+OWN_PRODUCT = 0
+OWN_SERIAL_NUMBER = 0x12345678
+
+# Power fraction grid of the per-profile target lookup tables: multiples of 1 / TARGET_GRID up to TARGET_GRID_MAX
+TARGET_GRID = 200
+TARGET_GRID_MAX = 2.5
+
+# Encoder backends accepted by zwoToFitConverter(backend=...)
+BACKENDS = ('fit_tool', 'native')
+
+# time_created of deterministic output when there is no source file to take it from (2020-01-01T00:00:00Z)
+FIXED_TIME_CREATED = 1577836800000
+
+# Converter settings an athlete profile in a roster may override
+ATHLETE_SETTINGS = ('ftp_watts', 'use_power_for_cycling', 'power_buffer_percent', 'use_absolute_power',
+                    'warmup_manual_advance', 'cooldown_manual_advance', 'force_warmup_power', 'compact_intervals')
+
+# The athlete settings that change the parsed steps themselves rather than just their targets
+STRUCTURE_SETTINGS = ('use_power_for_cycling', 'warmup_manual_advance', 'cooldown_manual_advance',
+                      'force_warmup_power', 'compact_intervals')
 
 
 class zwoToFitConverter:
     def __init__(self, ftp_watts=240, use_power_for_cycling=True, power_buffer_percent=5, use_absolute_power=True, 
-                 warmup_manual_advance=True, cooldown_manual_advance=False, force_warmup_power=None):
+                 warmup_manual_advance=True, cooldown_manual_advance=False, force_warmup_power=None,
+                 backend='fit_tool', compact_intervals=False, parse_cache=None, phase_timer=None,
+                 time_created=None):
         """
         Initialize converter
         
@@ -23,7 +201,20 @@ class zwoToFitConverter:
             warmup_manual_advance: If True, warmup steps require manual lap button press to advance
             cooldown_manual_advance: If True, cooldown steps require manual lap button press to advance
             force_warmup_power: If set (e.g., 0.5), override all warmup power values with this
+            backend: FIT encoder, 'fit_tool' (FitFileBuilder) or 'native' (fit_encoder, same bytes, faster)
+            compact_intervals: If True, write IntervalsT blocks with a FIT repeat step instead of
+                expanding every repeat into its own steps
+            parse_cache: Optional ParseCache that parse_zwo_file reuses parsed workouts from
+            phase_timer: Optional profiling.PhaseTimer that records the time every file spends
+                in each conversion phase
+            time_created: file_id creation time of the FIT files: None for the current time,
+                'mtime' for the .zwo file's modification time (FIXED_TIME_CREATED without a
+                source file), or a fixed time in milliseconds since the Unix epoch. The last
+                two make the output a function of the input alone.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        
         self.ftp_watts = ftp_watts
         self.use_power_for_cycling = use_power_for_cycling
         self.power_buffer_percent = power_buffer_percent / 100.0  # Convert to decimal
@@ -31,6 +222,12 @@ class zwoToFitConverter:
         self.warmup_manual_advance = warmup_manual_advance
         self.cooldown_manual_advance = cooldown_manual_advance
         self.force_warmup_power = force_warmup_power
+        self.backend = backend
+        self.compact_intervals = compact_intervals
+        self.parse_cache = parse_cache
+        self.phase_timer = phase_timer
+        self.time_created = time_created
+        self._target_table_cache = None  # Built by _target_tables on first use
         
         # Mapping zwo sport types to FIT sport types
         self.sport_mapping = {
@@ -41,6 +238,25 @@ class zwoToFitConverter:
             'other': Sport.GENERIC
         }
 
+    def with_settings(self, **settings):
+        """
+        Return a copy of this converter with some settings changed
+        
+        Args:
+            **settings: Any of ATHLETE_SETTINGS, in the same units as __init__
+        """
+        unknown = set(settings) - set(ATHLETE_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown athlete settings: {', '.join(sorted(unknown))}")
+        
+        converter = copy.copy(self)
+        converter._target_table_cache = None  # The tables depend on the settings
+        for name, value in settings.items():
+            if name == 'power_buffer_percent':
+                value = value / 100.0  # Convert to decimal
+            setattr(converter, name, value)
+        return converter
+
     def _convert_power_for_fit(self, watts):
         """
         Convert power value for FIT file format
@@ -59,50 +275,93 @@ class zwoToFitConverter:
             ftp_percentage = (watts / self.ftp_watts) * 100
             return int(round(ftp_percentage * 10))  # Scale to 0-1000 range
 
-    def parse_zwo_file(self, zwo_file_path):
-        """Parse zwo file and extract workout information"""
-        tree = ET.parse(zwo_file_path)
-        root = tree.getroot()
+    def parse_zwo_file(self, zwo_file_path, resolve_targets=True, data=None):
+        """
+        Parse zwo file and extract workout information
+        
+        Args:
+            zwo_file_path: Path to the .zwo file
+            resolve_targets: If False, steps keep their power fractions but their FIT
+                target values are left for assign_targets_batch to fill in
+            data: The file's bytes, if already read
+        """
+        if self.phase_timer is not None:
+            return self._parse_zwo_file_timed(zwo_file_path, resolve_targets, data, self.phase_timer)
+        if self.parse_cache is None:
+            return self.build_workout(load_zwo_source(zwo_file_path, data), resolve_targets)
+        
+        workout = self.parse_cache.load_workout(zwo_file_path, self, data)
+        if resolve_targets:
+            for step in workout['steps']:
+                self._assign_targets(step)
+        return workout
+
+    def _parse_zwo_file_timed(self, zwo_file_path, resolve_targets, data, timer):
+        """parse_zwo_file split into phases: read, xml, steps and targets (or cache, then targets)"""
+        if self.parse_cache is not None:
+            with timer.phase('cache'):
+                workout = self.parse_cache.load_workout(zwo_file_path, self, data)
+        else:
+            if data is None:
+                with timer.phase('read'):
+                    data = _read_file(zwo_file_path)
+            with timer.phase('xml'):
+                source = load_zwo_source(zwo_file_path, data)
+            with timer.phase('steps'):
+                workout = self.build_workout(source, resolve_targets=False)
         
-        # Extract basic workout info
-        name = root.find('name').text if root.find('name') is not None else 'Unnamed Workout'
-        description = root.find('description').text if root.find('description') is not None else ''
-        sport_type = root.find('sportType').text if root.find('sportType') is not None else 'other'
+        if resolve_targets:
+            with timer.phase('targets'):
+                for step in workout['steps']:
+                    self._assign_targets(step)
+        return workout
+
+    def build_workout(self, source, resolve_targets=True):
+        """
+        Build the workout dict (name, description, sport, steps) from a loaded ZWO source
         
-        # Parse workout steps
-        workout_element = root.find('workout')
+        Args:
+            source: Dict returned by load_zwo_source
+            resolve_targets: If False, leave FIT target values for assign_targets_batch
+        """
         steps = []
+        skipped = collections.Counter()
+        if source['workout'] is not None:
+            steps = self._parse_workout_steps(source['workout'], source['sport'], resolve_targets, skipped)
         
-        if workout_element is not None:
-            steps = self._parse_workout_steps(workout_element, sport_type.lower())
-        
-        return {
-            'name': name,
-            'description': description,
-            'sport': sport_type.lower(),
-            'steps': steps
+        workout = {
+            'name': source['name'],
+            'description': source['description'],
+            'sport': source['sport'],
+            'steps': steps,
+            'skipped_elements': dict(skipped)
         }
+        _warn_skipped_elements(workout)
+        return workout
 
-    def _parse_workout_steps(self, workout_element, sport='bike'):
-        """Parse workout steps and expand intervals"""
+    def _parse_workout_steps(self, workout_element, sport='bike', resolve_targets=True, skipped=None):
+        """
+        Parse workout steps and expand intervals
+        
+        Args:
+            workout_element: The ZWO <workout> element
+            sport: ZWO sport type
+            resolve_targets: If False, leave FIT target values for assign_targets_batch
+            skipped: Optional Counter that receives the tags without a STEP_PARSERS handler
+        """
         steps = []
         
+        # The target type only depends on the sport, so resolve it once for the whole workout
+        target_type = self._target_type(sport)
+        parsers = self.STEP_PARSERS
+        
         for element in workout_element:
-            if element.tag == 'Warmup':
-                step = self._parse_warmup(element, sport)
-                steps.append(step)
-                
-            elif element.tag == 'Cooldown':
-                step = self._parse_cooldown(element, sport)
-                steps.append(step)
-                
-            elif element.tag == 'IntervalsT':
-                interval_steps = self._parse_intervals(element, sport)
-                steps.extend(interval_steps)
-                
-            elif element.tag == 'SteadyState':
-                step = self._parse_steady_state(element, sport)
-                steps.append(step)
+            parser = parsers.get(element.tag)
+            if parser is None:
+                if skipped is not None:
+                    skipped[element.tag] += 1
+                continue
+            steps.extend(parser(self, element, target_type, resolve_targets, len(steps)))
         
         return steps
 
@@ -110,6 +369,10 @@ class zwoToFitConverter:
         """Determine if we should use power targets for this sport"""
         return self.use_power_for_cycling and sport in ['bike', 'cycling']
 
+    def _target_type(self, sport):
+        """FIT target type used for steps of this sport"""
+        return WorkoutStepTarget.POWER if self._should_use_power(sport) else WorkoutStepTarget.HEART_RATE
+
     def _apply_power_buffer_watts(self, power_percentage):
         """Convert power percentage to absolute watts and apply buffer"""
         # Convert percentage to absolute watts
@@ -122,7 +385,105 @@ class zwoToFitConverter:
         # Round to integers
         return int(round(low_watts)), int(round(high_watts))
 
-    def _parse_warmup(self, element, sport='bike'):
+    def _assign_targets(self, step):
+        """
+        Fill in a step's FIT target values from its power fractions
+        
+        Power steps get a buffered custom range: the low end is the buffered-down
+        PowerLow and the high end the buffered-up PowerHigh (for a single power
+        value that is just the ± buffer around it). Heart rate steps get the zone of
+        the average power.
+        
+        Power fractions on the TARGET_GRID are looked up in the profile's tables;
+        anything else is computed exactly, so the results are the same either way.
+        """
+        tables = self._target_table_cache or self._target_tables()
+        if step.target_type == WorkoutStepTarget.POWER:
+            step.target_value = 0  # Set to 0 when using custom ranges
+            step.custom_target_value_low = _table_lookup(tables[0], step.power_low, TARGET_GRID, self._fit_power_low)
+            step.custom_target_value_high = _table_lookup(tables[1], step.power_high, TARGET_GRID, self._fit_power_high)
+        elif step.target_type == WorkoutStepTarget.HEART_RATE:
+            power = (step.power_low + step.power_high) / 2
+            if targets_logger.isEnabledFor(logging.DEBUG):
+                step.target_value = self._power_to_heart_rate_zone(power)  # Logs every conversion
+            else:
+                # The average of two grid values lies on a grid twice as fine
+                step.target_value = _table_lookup(tables[2], power, 2 * TARGET_GRID, self._power_to_heart_rate_zone)
+
+    def _target_tables(self):
+        """
+        Create this profile's (FIT power low, FIT power high, heart rate zone) lookup tables
+        
+        The tables are indexed by power fraction * TARGET_GRID (* 2 * TARGET_GRID for
+        zones) and filled in as entries are first needed, so a short conversion
+        doesn't pay for the whole grid.
+        """
+        size = int(TARGET_GRID_MAX * TARGET_GRID) + 1
+        self._target_table_cache = ([None] * size, [None] * size, [None] * (2 * size - 1))
+        return self._target_table_cache
+
+    def _fit_power_low(self, power):
+        """FIT-encoded low end of the buffered range around a power fraction"""
+        return self._convert_power_for_fit(self._apply_power_buffer_watts(power)[0])
+
+    def _fit_power_high(self, power):
+        """FIT-encoded high end of the buffered range around a power fraction"""
+        return self._convert_power_for_fit(self._apply_power_buffer_watts(power)[1])
+
+    def assign_targets_batch(self, workouts):
+        """
+        Fill in the FIT targets of every step in a set of workouts at once
+        
+        Collects the power fractions of all steps parsed with resolve_targets=False
+        into NumPy arrays and computes buffered watts, FIT-encoded power and heart rate
+        zones with vectorized arithmetic. The operations mirror the scalar path
+        step for step (np.rint rounds half to even like round()), so the results are
+        identical. Falls back to the scalar path when NumPy is not installed.
+        
+        Args:
+            workouts: Iterable of workout dicts as returned by parse_zwo_file
+        """
+        power_steps = []
+        hr_steps = []
+        for workout in workouts:
+            for step in workout['steps']:
+                if step.target_type == WorkoutStepTarget.POWER:
+                    power_steps.append(step)
+                elif step.target_type == WorkoutStepTarget.HEART_RATE:
+                    hr_steps.append(step)
+        
+        try:
+            import numpy as np
+        except ImportError:
+            for step in power_steps + hr_steps:
+                self._assign_targets(step)
+            return
+        
+        if power_steps:
+            power_low = np.fromiter((step.power_low for step in power_steps), dtype=np.float64, count=len(power_steps))
+            power_high = np.fromiter((step.power_high for step in power_steps), dtype=np.float64, count=len(power_steps))
+            low_watts = np.rint((power_low * self.ftp_watts) * (1 - self.power_buffer_percent))
+            high_watts = np.rint((power_high * self.ftp_watts) * (1 + self.power_buffer_percent))
+            if self.use_absolute_power:
+                fit_low = low_watts + 1000
+                fit_high = high_watts + 1000
+            else:
+                fit_low = np.rint(((low_watts / self.ftp_watts) * 100) * 10)
+                fit_high = np.rint(((high_watts / self.ftp_watts) * 100) * 10)
+            for step, low, high in zip(power_steps, fit_low.astype(np.int64).tolist(), fit_high.astype(np.int64).tolist()):
+                step.target_value = 0
+                step.custom_target_value_low = low
+                step.custom_target_value_high = high
+        
+        if hr_steps:
+            power_low = np.fromiter((step.power_low for step in hr_steps), dtype=np.float64, count=len(hr_steps))
+            power_high = np.fromiter((step.power_high for step in hr_steps), dtype=np.float64, count=len(hr_steps))
+            power_pct = ((power_low + power_high) / 2) * 100
+            zones = np.searchsorted(HR_ZONE_UPPER_BOUNDS, power_pct, side='left') + 1
+            for step, zone in zip(hr_steps, zones.tolist()):
+                step.target_value = zone
+
+    def _parse_warmup(self, element, target_type, resolve_targets=True, first_step_index=0):
         """Parse warmup step"""
         duration = int(element.get('Duration', 600))  # Duration in seconds
         power_low = float(element.get('PowerLow', 0.60))
@@ -132,7 +493,7 @@ class zwoToFitConverter:
         if self.force_warmup_power is not None:
             power_low = self.force_warmup_power
             power_high = self.force_warmup_power
-            print(f"  Warmup power overridden to {self.force_warmup_power} ({self.force_warmup_power*100:.0f}%)")
+            parse_logger.debug("  Warmup power overridden to %s (%.0f%%)", self.force_warmup_power, self.force_warmup_power * 100)
         
         # Determine duration type based on manual advance setting
         if self.warmup_manual_advance:
@@ -144,50 +505,27 @@ class zwoToFitConverter:
             duration_value = duration * 1000
             step_name = 'Warm up'
         
-        if self._should_use_power(sport):
-            # Convert to absolute watts with buffer
-            if power_low == power_high:
-                # Single power value, apply buffer
-                power_low_watts, power_high_watts = self._apply_power_buffer_watts(power_low)
-            else:
-                # Range provided, convert each to watts and apply individual buffers
-                power_low_watts, _ = self._apply_power_buffer_watts(power_low)
-                _, power_high_watts = self._apply_power_buffer_watts(power_high)
-            
-            # Convert to FIT format
-            fit_power_low = self._convert_power_for_fit(power_low_watts)
-            fit_power_high = self._convert_power_for_fit(power_high_watts)
-            
-            return {
-                'wkt_step_name': step_name,
-                'intensity': Intensity.WARMUP,
-                'duration_type': duration_type,
-                'duration_value': duration_value,
-                'target_type': WorkoutStepTarget.POWER,
-                'target_value': 0,  # Set to 0 when using custom ranges
-                'custom_target_value_low': fit_power_low,
-                'custom_target_value_high': fit_power_high
-            }
-        else:
-            # Use heart rate zones - use the forced power value if set
-            if self.force_warmup_power is not None:
-                hr_zone = self._power_to_heart_rate_zone(self.force_warmup_power)
-                print(f"  Warmup HR zone calculated from forced power {self.force_warmup_power}: Zone {hr_zone}")
-            else:
-                avg_power = (power_low + power_high) / 2
-                hr_zone = self._power_to_heart_rate_zone(avg_power)
-                print(f"  Warmup HR zone calculated from average power {avg_power}: Zone {hr_zone}")
-            
-            return {
-                'wkt_step_name': step_name,
-                'intensity': Intensity.WARMUP,
-                'duration_type': duration_type,
-                'duration_value': duration_value,
-                'target_type': WorkoutStepTarget.HEART_RATE,
-                'target_value': hr_zone
-            }
+        step = WorkoutStep(
+            wkt_step_name=step_name,
+            intensity=Intensity.WARMUP,
+            duration_type=duration_type,
+            duration_value=duration_value,
+            target_type=target_type,
+            target_value=0,
+            power_low=power_low,
+            power_high=power_high
+        )
+        if resolve_targets:
+            self._assign_targets(step)
+            if step.target_type == WorkoutStepTarget.HEART_RATE:
+                # Heart rate zone comes from the forced power value if set, else the average power
+                if self.force_warmup_power is not None:
+                    parse_logger.debug("  Warmup HR zone calculated from forced power %s: Zone %s", self.force_warmup_power, step.target_value)
+                else:
+                    parse_logger.debug("  Warmup HR zone calculated from average power %s: Zone %s", (power_low + power_high) / 2, step.target_value)
+        return [step]
 
-    def _parse_cooldown(self, element, sport='bike'):
+    def _parse_cooldown(self, element, target_type, resolve_targets=True, first_step_index=0):
         """Parse cooldown step"""
         duration = int(element.get('Duration', 600))  # Duration in seconds
         power_low = float(element.get('PowerLow', 0.60))
@@ -203,46 +541,36 @@ class zwoToFitConverter:
             duration_value = duration * 1000
             step_name = 'Cool down'
         
-        if self._should_use_power(sport):
-            # Convert to absolute watts with buffer
-            if power_low == power_high:
-                # Single power value, apply buffer
-                power_low_watts, power_high_watts = self._apply_power_buffer_watts(power_low)
-            else:
-                # Range provided, convert each to watts and apply individual buffers
-                power_low_watts, _ = self._apply_power_buffer_watts(power_low)
-                _, power_high_watts = self._apply_power_buffer_watts(power_high)
-            
-            # Convert to FIT format
-            fit_power_low = self._convert_power_for_fit(power_low_watts)
-            fit_power_high = self._convert_power_for_fit(power_high_watts)
-            
-            return {
-                'wkt_step_name': step_name,
-                'intensity': Intensity.COOLDOWN,
-                'duration_type': duration_type,
-                'duration_value': duration_value,
-                'target_type': WorkoutStepTarget.POWER,
-                'target_value': 0,  # Set to 0 when using custom ranges
-                'custom_target_value_low': fit_power_low,
-                'custom_target_value_high': fit_power_high
-            }
-        else:
-            # Use heart rate zones
-            avg_power = (power_low + power_high) / 2
-            hr_zone = self._power_to_heart_rate_zone(avg_power)
-            
-            return {
-                'wkt_step_name': step_name,
-                'intensity': Intensity.COOLDOWN,
-                'duration_type': duration_type,
-                'duration_value': duration_value,
-                'target_type': WorkoutStepTarget.HEART_RATE,
-                'target_value': hr_zone
-            }
+        step = WorkoutStep(
+            wkt_step_name=step_name,
+            intensity=Intensity.COOLDOWN,
+            duration_type=duration_type,
+            duration_value=duration_value,
+            target_type=target_type,
+            target_value=0,
+            power_low=power_low,
+            power_high=power_high
+        )
+        if resolve_targets:
+            self._assign_targets(step)
+        return [step]
 
-    def _parse_intervals(self, element, sport='bike'):
-        """Parse interval steps and expand into individual work/rest steps"""
+    def _parse_intervals(self, element, target_type, resolve_targets=True, first_step_index=0):
+        """
+        Parse interval steps
+        
+        By default every repeat is expanded into individual work/rest steps. With
+        compact_intervals the block is written as work, recovery, a repeat step and
+        a final work interval, so the step count no longer grows with Repeat while
+        the athlete still does Repeat work intervals and Repeat-1 recoveries.
+        
+        Args:
+            element: IntervalsT element
+            target_type: FIT target type of the workout's sport
+            resolve_targets: If False, leave FIT target values for assign_targets_batch
+            first_step_index: Index of the first returned step within the workout,
+                needed for the repeat step's duration_value
+        """
         repeat = int(element.get('Repeat', 1))
         on_duration = int(element.get('OnDuration', 300))  # Duration in seconds
         off_duration = int(element.get('OffDuration', 120))  # Duration in seconds
@@ -251,113 +579,136 @@ class zwoToFitConverter:
         
         steps = []
         
+        if self.compact_intervals and repeat > 1:
+            steps.append(self._interval_step('Interval - Work', Intensity.ACTIVE, on_duration, on_power, target_type, resolve_targets))
+            steps.append(self._interval_step('Interval - Recovery', Intensity.REST, off_duration, off_power, target_type, resolve_targets))
+            steps.append(WorkoutStep(
+                wkt_step_name=f'Repeat {repeat - 1} times',
+                duration_type=WorkoutStepDuration.REPEAT_UNTIL_STEPS_CMPLT,
+                duration_value=first_step_index,  # Step to jump back to
+                target_type=None,
+                target_value=repeat - 1  # Number of times the work/recovery pair runs
+            ))
+            steps.append(self._interval_step(f'Interval {repeat} - Work', Intensity.ACTIVE, on_duration, on_power, target_type, resolve_targets))
+            return steps
+        
         for i in range(repeat):
             # Work interval
-            if self._should_use_power(sport):
-                # Apply buffer to work interval
-                on_power_low_watts, on_power_high_watts = self._apply_power_buffer_watts(on_power)
-                
-                # Convert to FIT format
-                fit_on_power_low = self._convert_power_for_fit(on_power_low_watts)
-                fit_on_power_high = self._convert_power_for_fit(on_power_high_watts)
-                
-                work_step = {
-                    'wkt_step_name': f'Interval {i+1} - Work',
-                    'intensity': Intensity.ACTIVE,
-                    'duration_type': WorkoutStepDuration.TIME,
-                    'duration_value': on_duration * 1000,
-                    'target_type': WorkoutStepTarget.POWER,
-                    'target_value': 0,  # Set to 0 when using custom ranges
-                    'custom_target_value_low': fit_on_power_low,
-                    'custom_target_value_high': fit_on_power_high
-                }
-            else:
-                on_hr_zone = self._power_to_heart_rate_zone(on_power)
-                work_step = {
-                    'wkt_step_name': f'Interval {i+1} - Work',
-                    'intensity': Intensity.ACTIVE,
-                    'duration_type': WorkoutStepDuration.TIME,
-                    'duration_value': on_duration * 1000,
-                    'target_type': WorkoutStepTarget.HEART_RATE,
-                    'target_value': on_hr_zone
-                }
-            steps.append(work_step)
+            steps.append(self._interval_step(f'Interval {i+1} - Work', Intensity.ACTIVE, on_duration, on_power, target_type, resolve_targets))
             
             # Recovery interval (only add if not the last repeat)
             if i < repeat - 1:
-                if self._should_use_power(sport):
-                    # Apply buffer to recovery interval
-                    off_power_low_watts, off_power_high_watts = self._apply_power_buffer_watts(off_power)
-                    
-                    # Convert to FIT format
-                    fit_off_power_low = self._convert_power_for_fit(off_power_low_watts)
-                    fit_off_power_high = self._convert_power_for_fit(off_power_high_watts)
-                    
-                    recovery_step = {
-                        'wkt_step_name': f'Interval {i+1} - Recovery',
-                        'intensity': Intensity.REST,
-                        'duration_type': WorkoutStepDuration.TIME,
-                        'duration_value': off_duration * 1000,
-                        'target_type': WorkoutStepTarget.POWER,
-                        'target_value': 0,  # Set to 0 when using custom ranges
-                        'custom_target_value_low': fit_off_power_low,
-                        'custom_target_value_high': fit_off_power_high
-                    }
-                else:
-                    off_hr_zone = self._power_to_heart_rate_zone(off_power)
-                    recovery_step = {
-                        'wkt_step_name': f'Interval {i+1} - Recovery',
-                        'intensity': Intensity.REST,
-                        'duration_type': WorkoutStepDuration.TIME,
-                        'duration_value': off_duration * 1000,
-                        'target_type': WorkoutStepTarget.HEART_RATE,
-                        'target_value': off_hr_zone
-                    }
-                steps.append(recovery_step)
+                steps.append(self._interval_step(f'Interval {i+1} - Recovery', Intensity.REST, off_duration, off_power, target_type, resolve_targets))
         
         return steps
 
-    def _parse_steady_state(self, element, sport='bike'):
-        """Parse steady state step"""
+    def _interval_step(self, step_name, intensity, duration, power, target_type, resolve_targets=True):
+        """Build a single timed work or recovery step of an interval block"""
+        step = WorkoutStep(
+            wkt_step_name=step_name,
+            intensity=intensity,
+            duration_type=WorkoutStepDuration.TIME,
+            duration_value=duration * 1000,
+            target_type=target_type,
+            target_value=0,
+            power_low=power,
+            power_high=power
+        )
+        if resolve_targets:
+            self._assign_targets(step)
+        return step
+
+    def _parse_steady_state(self, element, target_type, resolve_targets=True, first_step_index=0):
+        """Parse steady state step (also used for the legacy SolidState tag)"""
         duration = int(element.get('Duration', 1200))  # Duration in seconds
         power = float(element.get('Power', 0.75))
         
-        if self._should_use_power(sport):
-            # Apply buffer to steady state power
-            power_low_watts, power_high_watts = self._apply_power_buffer_watts(power)
-            
-            # Convert to FIT format
-            fit_power_low = self._convert_power_for_fit(power_low_watts)
-            fit_power_high = self._convert_power_for_fit(power_high_watts)
-            
-            return {
-                'wkt_step_name': 'Steady state',
-                'intensity': Intensity.ACTIVE,
-                'duration_type': WorkoutStepDuration.TIME,
-                'duration_value': duration * 1000,
-                'target_type': WorkoutStepTarget.POWER,
-                'target_value': 0,  # Set to 0 when using custom ranges
-                'custom_target_value_low': fit_power_low,
-                'custom_target_value_high': fit_power_high
-            }
-        else:
-            # Use heart rate zones
-            hr_zone = self._power_to_heart_rate_zone(power)
-            
-            return {
-                'wkt_step_name': 'Steady state',
-                'intensity': Intensity.ACTIVE,
-                'duration_type': WorkoutStepDuration.TIME,
-                'duration_value': duration * 1000,
-                'target_type': WorkoutStepTarget.HEART_RATE,
-                'target_value': hr_zone
-            }
+        step = WorkoutStep(
+            wkt_step_name='Steady state',
+            intensity=Intensity.ACTIVE,
+            duration_type=WorkoutStepDuration.TIME,
+            duration_value=duration * 1000,
+            target_type=target_type,
+            target_value=0,
+            power_low=power,
+            power_high=power
+        )
+        if resolve_targets:
+            self._assign_targets(step)
+        return [step]
+
+    def _parse_ramp(self, element, target_type, resolve_targets=True, first_step_index=0):
+        """
+        Parse ramp step
+        
+        FIT steps can't ramp, so like Warmup and Cooldown the ramp becomes one timed
+        step whose target range spans both ends (lowest to highest, so downward
+        ramps still get a valid range).
+        """
+        duration = int(element.get('Duration', 300))  # Duration in seconds
+        power_start = float(element.get('PowerLow', 0.50))
+        power_end = float(element.get('PowerHigh', 0.75))
+        
+        step = WorkoutStep(
+            wkt_step_name='Ramp',
+            intensity=Intensity.ACTIVE,
+            duration_type=WorkoutStepDuration.TIME,
+            duration_value=duration * 1000,
+            target_type=target_type,
+            target_value=0,
+            power_low=min(power_start, power_end),
+            power_high=max(power_start, power_end)
+        )
+        if resolve_targets:
+            self._assign_targets(step)
+        return [step]
+
+    def _parse_free_ride(self, element, target_type, resolve_targets=True, first_step_index=0):
+        """Parse free ride step: timed, without a target"""
+        duration = int(element.get('Duration', 600))  # Duration in seconds
+        
+        return [WorkoutStep(
+            wkt_step_name='Free ride',
+            intensity=Intensity.ACTIVE,
+            duration_type=WorkoutStepDuration.TIME,
+            duration_value=duration * 1000,
+            target_type=WorkoutStepTarget.OPEN,
+            target_value=0
+        )]
+
+    def _parse_max_effort(self, element, target_type, resolve_targets=True, first_step_index=0):
+        """Parse max effort step: an all-out effort, so timed without a target"""
+        duration = int(element.get('Duration', 60))  # Duration in seconds
+        
+        return [WorkoutStep(
+            wkt_step_name='Max effort',
+            intensity=Intensity.ACTIVE,
+            duration_type=WorkoutStepDuration.TIME,
+            duration_value=duration * 1000,
+            target_type=WorkoutStepTarget.OPEN,
+            target_value=0
+        )]
+
+    # ZWO element tag -> parser. Parsers are called as parser(converter, element, target_type,
+    # resolve_targets, first_step_index) and return the element's steps; other tags are skipped
+    # and counted in the workout's 'skipped_elements'.
+    STEP_PARSERS = {
+        'Warmup': _parse_warmup,
+        'Cooldown': _parse_cooldown,
+        'IntervalsT': _parse_intervals,
+        'SteadyState': _parse_steady_state,
+        'SolidState': _parse_steady_state,
+        'Ramp': _parse_ramp,
+        'FreeRide': _parse_free_ride,
+        'Freeride': _parse_free_ride,
+        'MaxEffort': _parse_max_effort,
+    }
 
     def _power_to_heart_rate_zone(self, power_percentage):
         """Convert power percentage to heart rate zone for running"""
         power_pct = power_percentage * 100  # Convert to percentage (0.5 → 50)
         
-        print(f"    DEBUG: Converting power {power_percentage} ({power_pct}%) to HR zone")
+        targets_logger.debug("    Converting power %s (%s%%) to HR zone", power_percentage, power_pct)
         
         if power_pct <= 55:  # Easy/Recovery effort → Z1
             zone = 1
@@ -370,18 +721,89 @@ class zwoToFitConverter:
         else:  # VO2max+ effort → Z5
             zone = 5
         
-        print(f"    DEBUG: Power {power_pct}% → Zone {zone}")
+        targets_logger.debug("    Power %s%% → Zone %s", power_pct, zone)
         return zone
 
-    def create_fit_workout(self, workout_data, output_path):
-        """Create FIT file from workout data"""
+    def create_fit_workout(self, workout_data, output_path, writer=None, source_path=None):
+        """
+        Create FIT file from workout data
+        
+        Args:
+            workout_data: Workout dict as returned by parse_zwo_file
+            output_path: Path of the .fit file
+            writer: Optional OutputWriter; by default the file is replaced atomically without fsync
+            source_path: The .zwo file the workout came from (for time_created='mtime')
+        """
+        time_created = self.time_created_for(source_path)
+        timer = self.phase_timer
+        if timer is None:
+            fit_bytes = self.encode_fit_workout(workout_data, time_created)
+            (_write_file if writer is None else writer.write)(output_path, fit_bytes)
+        else:
+            with timer.phase('encode'):
+                fit_bytes = self.encode_fit_workout(workout_data, time_created)
+            with timer.phase('write'):
+                (_write_file if writer is None else writer.write)(output_path, fit_bytes)
+        
+        self._log_workout_summary(workout_data, output_path)
+
+    def time_created_for(self, source_path=None):
+        """
+        The file_id time_created of a workout's FIT file, in milliseconds since the Unix epoch
+        
+        Args:
+            source_path: The .zwo file the workout came from, if any
+        """
+        if self.time_created is None:
+            return time_created_now()
+        if self.time_created == 'mtime':
+            if source_path is None:
+                return FIXED_TIME_CREATED
+            try:
+                return round(os.stat(source_path).st_mtime * 1000)
+            except OSError:
+                return FIXED_TIME_CREATED
+        return self.time_created
+
+    def encode_fit_workout(self, workout_data, time_created):
+        """
+        Encode workout data as FIT file bytes with the configured backend
+        
+        Args:
+            workout_data: Workout dict as returned by parse_zwo_file
+            time_created: file_id creation time in milliseconds since the Unix epoch
+            
+        Returns:
+            Encoded FIT file as bytes
+        """
+        if self.backend == 'native':
+            return encode_workout(
+                workout_data['steps'],
+                sport=self.sport_mapping.get(workout_data['sport'], Sport.GENERIC),
+                time_created=time_created,
+                capabilities=WorkoutCapabilities.TCX,
+                file_type=FileType.WORKOUT,
+                manufacturer=Manufacturer.GARMIN,
+                product=OWN_PRODUCT,
+                serial_number=OWN_SERIAL_NUMBER,
+            )
+        return self._encode_with_fit_tool(workout_data, time_created)
+
+    def _encode_with_fit_tool(self, workout_data, time_created):
+        """Encode workout data with fit_tool's FitFileBuilder"""
+        # Imported here so parsing, listing and dry runs don't pay fit_tool's import cost
+        from fit_tool.fit_file_builder import FitFileBuilder
+        from fit_tool.profile.messages.file_id_message import FileIdMessage
+        from fit_tool.profile.messages.workout_message import WorkoutMessage
+        from fit_tool.profile.messages.workout_step_message import WorkoutStepMessage
+        
         # Create file ID message
         file_id_message = FileIdMessage()
         file_id_message.type = FileType.WORKOUT
         file_id_message.manufacturer = Manufacturer.GARMIN
-        file_id_message.product = 0
-        file_id_message.time_created = round(datetime.datetime.now().timestamp() * 1000)
-        file_id_message.serial_number = 0x12345678
+        file_id_message.product = OWN_PRODUCT
+        file_id_message.time_created = time_created
+        file_id_message.serial_number = OWN_SERIAL_NUMBER
 
         # Create workout steps - ensure every step has wkt_step_name
         workout_steps = []
@@ -392,38 +814,38 @@ class zwoToFitConverter:
             step.message_index = i
             
             # REQUIRED: Set step name - ensure it's always present
-            step.wkt_step_name = step_data.get('wkt_step_name', f'Step {i+1}')
+            step.wkt_step_name = step_data.wkt_step_name or f'Step {i+1}'
             
             # REQUIRED: Set duration type
-            step.duration_type = step_data['duration_type']
+            step.duration_type = step_data.duration_type
             
             # REQUIRED: Set duration value
-            step.duration_value = step_data['duration_value']
+            step.duration_value = step_data.duration_value
             
             # REQUIRED: Set target type
-            step.target_type = step_data['target_type']
+            step.target_type = step_data.target_type
             
             # REQUIRED: Set target value (0 for custom ranges, actual value for single targets)
-            step.target_value = step_data['target_value']
+            step.target_value = step_data.target_value
             
             # OPTIONAL: Set custom target range
-            if 'custom_target_value_low' in step_data:
-                step.custom_target_value_low = step_data['custom_target_value_low']
+            if step_data.custom_target_value_low is not None:
+                step.custom_target_value_low = step_data.custom_target_value_low
             
-            if 'custom_target_value_high' in step_data:
-                step.custom_target_value_high = step_data['custom_target_value_high']
+            if step_data.custom_target_value_high is not None:
+                step.custom_target_value_high = step_data.custom_target_value_high
             
             # OPTIONAL: Set intensity
-            if 'intensity' in step_data:
-                step.intensity = step_data['intensity']
+            if step_data.intensity is not None:
+                step.intensity = step_data.intensity
             
             # OPTIONAL: Set notes
-            if 'notes' in step_data:
-                step.notes = step_data['notes']
+            if step_data.notes is not None:
+                step.notes = step_data.notes
             
             # OPTIONAL: Set equipment
-            if 'equipment' in step_data:
-                step.equipment = step_data['equipment']
+            if step_data.equipment is not None:
+                step.equipment = step_data.equipment
             
             workout_steps.append(step)
 
@@ -441,132 +863,1991 @@ class zwoToFitConverter:
         builder.add_all(workout_steps)
 
         fit_file = builder.build()
-        fit_file.to_file(output_path)
-        
-        print(f"FIT file created: {output_path}")
-        print(f"Workout: {workout_data['name']}")
-        print(f"Sport: {workout_data['sport']}")
-        print(f"Total steps: {len(workout_steps)}")
-        print(f"Power format: {'Absolute watts' if self.use_absolute_power else 'FTP percentage'}")
-        print(f"Warmup manual advance: {'Enabled' if self.warmup_manual_advance else 'Disabled'}")
-        print(f"Cooldown manual advance: {'Enabled' if self.cooldown_manual_advance else 'Disabled'}")
+        return fit_file.to_bytes()
+
+    def convert_bytes(self, zwo, time_created=None):
+        """
+        Convert ZWO content to a FIT file entirely in memory
+        
+        Args:
+            zwo: ZWO XML as bytes or str
+            time_created: file_id creation time in milliseconds since the Unix epoch (default:
+                from the converter's time_created setting)
+            
+        Returns:
+            Encoded FIT file as bytes
+        """
+        workout = self.build_workout(load_zwo_source(None, zwo))
+        return self.encode_fit_workout(workout, self.time_created_for() if time_created is None else time_created)
+
+    def convert_fileobj(self, source, destination=None, time_created=None):
+        """
+        Convert ZWO content read from a file object, optionally writing the FIT file to another
+        
+        Args:
+            source: Readable file object (binary or text) with the ZWO XML
+            destination: Optional writable binary file object for the FIT file
+            time_created: file_id creation time in milliseconds since the Unix epoch (default:
+                from the converter's time_created setting)
+            
+        Returns:
+            Encoded FIT file as bytes
+        """
+        fit_bytes = self.convert_bytes(source.read(), time_created)
+        if destination is not None:
+            destination.write(fit_bytes)
+        return fit_bytes
+
+    def decode_fit_workout(self, data, name=None):
+        """
+        Decode a FIT workout file into a workout dict (the reverse of encode_fit_workout)
+        
+        Records are streamed with fit_reader.iter_messages; only workout and
+        workout_step messages are unpacked. Repeat steps are expanded; ZWO has no
+        loop that ends on time, distance, heart rate etc., so the blocks of those
+        other repeat steps are kept once, with a warning. Power targets are turned
+        back into power fractions with this converter's power encoding, FTP and
+        buffer (see _decode_targets).
+        
+        Args:
+            data: The FIT file's content, any bytes-like object
+            name: Workout name to use if the file has none (e.g. the file name)
+        
+        Returns:
+            Workout dict like parse_zwo_file's
+        """
+        from fit_reader import iter_messages
+        
+        workout_name = None
+        sport = 'other'
+        own_file = False
+        records = []
+        for global_number, fields in iter_messages(data, (MESG_FILE_ID, MESG_WORKOUT, MESG_WORKOUT_STEP)):
+            if global_number == MESG_FILE_ID:
+                own_file = (fields.get(1), fields.get(2), fields.get(3)) == (
+                    Manufacturer.GARMIN.value, OWN_PRODUCT, OWN_SERIAL_NUMBER)
+            elif global_number == MESG_WORKOUT:
+                workout_name = fields.get(8, workout_name)
+                sport = ZWO_SPORTS.get(fields.get(4), 'other')
+            else:
+                records.append(fields)
+        records.sort(key=lambda fields: fields.get(254, 0))  # message_index
+        units_per_second = _fit_duration_units(records) if own_file else 1000
+        
+        steps = []
+        starts = []  # Index in steps of each record's first step, for repeat steps to jump back to
+        time, open_duration, repeat = (WorkoutStepDuration.TIME.value, WorkoutStepDuration.OPEN.value,
+                                       WorkoutStepDuration.REPEAT_UNTIL_STEPS_CMPLT.value)
+        for fields in records:
+            starts.append(len(steps))
+            duration_type = fields.get(1, open_duration)
+            if duration_type in _REPEAT_DURATIONS:
+                back_to = fields.get(2, 0)
+                if back_to >= len(starts) - 1:
+                    raise ValueError(f"repeat step {len(starts) - 1} jumps forward to step {back_to}")
+                if duration_type != repeat:
+                    # Its target_value is the loop's end condition, not a repeat count or a target
+                    parse_logger.warning("%s: step %d repeats until %s, which ZWO can't express; steps %d-%d kept once",
+                                         workout_name or name, len(starts) - 1,
+                                         _DURATION_MEMBERS[duration_type].name[len('REPEAT_UNTIL_'):],
+                                         back_to, len(starts) - 2)
+                    continue
+                block = steps[starts[back_to]:]
+                # target_value is how many times the block runs in all; it has already run once
+                if len(steps) + len(block) * (fields.get(4, 1) - 1) > MAX_DECODED_STEPS:
+                    raise ValueError(f"repeat steps expand to more than {MAX_DECODED_STEPS} steps")
+                steps.extend(copy.copy(step) for _ in range(fields.get(4, 1) - 1) for step in block)
+                continue
+            
+            if duration_type == time:
+                duration_value = round(fields.get(2, 0) * 1000 / units_per_second)
+            else:
+                if duration_type != open_duration:
+                    parse_logger.warning("%s: step %d ends on %s, which ZWO can't express; written as open",
+                                         workout_name or name, len(starts) - 1,
+                                         getattr(_DURATION_MEMBERS.get(duration_type), 'name', duration_type))
+                duration_type, duration_value = open_duration, 0
+            step = WorkoutStep(
+                wkt_step_name=fields.get(0, f'Step {len(starts)}'),
+                duration_type=_DURATION_MEMBERS[duration_type],
+                duration_value=duration_value,
+                target_type=_TARGET_MEMBERS.get(fields.get(3)) or WorkoutStepTarget.OPEN,
+                target_value=fields.get(4, 0),
+                custom_target_value_low=fields.get(5),
+                custom_target_value_high=fields.get(6),
+                intensity=_INTENSITY_MEMBERS.get(fields.get(7)) or Intensity.ACTIVE,
+                notes=fields.get(8)
+            )
+            self._decode_targets(step)
+            steps.append(step)
+        
+        return {
+            'name': workout_name or name or 'Unnamed Workout',
+            'description': '',
+            'sport': sport,
+            'steps': steps,
+            'skipped_elements': {}
+        }
+
+    def _decode_targets(self, step):
+        """
+        Recover a decoded step's power fractions from its FIT targets (the reverse of _assign_targets)
+        
+        Custom power ranges undo the power encoding (_convert_power_for_fit) and the
+        buffer, each end rounded to the fewest decimals that encode back to the same
+        value, so converting the result again reproduces the file. A range narrower
+        than the buffer (written by another tool) becomes its middle power. Zone
+        targets get a power inside the zone; other targets get none.
+        """
+        low, high = step.custom_target_value_low, step.custom_target_value_high
+        if step.target_type == WorkoutStepTarget.POWER and low is not None and high is not None:
+            ftp = self.ftp_watts
+            low_watts, high_watts = self._power_from_fit(low), self._power_from_fit(high)
+            step.power_low = _shortest_fraction(self._fit_power_low, low, low_watts / (1 - self.power_buffer_percent) / ftp)
+            step.power_high = _shortest_fraction(self._fit_power_high, high, high_watts / (1 + self.power_buffer_percent) / ftp)
+            if step.power_low > step.power_high and step.intensity not in (Intensity.WARMUP, Intensity.COOLDOWN):
+                step.power_low = step.power_high = round((low_watts + high_watts) / 2 / ftp, 3)
+        elif step.target_type == WorkoutStepTarget.POWER and 1 <= step.target_value <= len(POWER_ZONE_POWER):
+            step.power_low = step.power_high = POWER_ZONE_POWER[step.target_value - 1]
+        elif step.target_type == WorkoutStepTarget.HEART_RATE and low is None and 1 <= step.target_value <= len(HR_ZONE_POWER):
+            step.power_low = step.power_high = HR_ZONE_POWER[step.target_value - 1]
+
+    def _power_from_fit(self, value):
+        """Watts of a FIT-encoded power value (the reverse of _convert_power_for_fit)"""
+        if self.use_absolute_power:
+            return value - 1000
+        return value / 10 / 100 * self.ftp_watts
+
+    def workout_to_zwo(self, workout):
+        """
+        Write a workout dict as ZWO XML
+        
+        Runs of identical work steps separated by identical rest steps (work, rest,
+        work, ...) fold back into IntervalsT; Warmup and Cooldown keep their tags,
+        steps without a power target become FreeRide, power ranges Ramp and the rest
+        SteadyState.
+        
+        Returns:
+            The ZWO file as UTF-8 bytes
+        """
+        # Written as text rather than through ElementTree, which costs more than the decoding
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<workout_file>',
+            f"    <name>{_xml_escape(workout['name'])}</name>",
+            f"    <description>{_xml_escape(workout['description'] or '')}</description>",
+            f"    <sportType>{_xml_escape(workout['sport'])}</sportType>",
+            '    <workout>',
+        ]
+        for tag, attributes in _zwo_elements(workout['steps']):
+            attribute_text = ' '.join(f'{name}="{value}"' for name, value in attributes.items())  # Numbers only
+            lines.append(f'        <{tag} {attribute_text}/>')
+        lines += ['    </workout>', '</workout_file>', '']
+        return '\n'.join(lines).encode('utf-8')
+
+    def fit_to_zwo(self, data, name=None):
+        """
+        Convert a FIT workout file to ZWO XML (see decode_fit_workout and workout_to_zwo)
+        
+        Args:
+            data: The FIT file's content, any bytes-like object
+            name: Workout name to use if the file has none
+        
+        Returns:
+            The ZWO file as UTF-8 bytes
+        """
+        return self.workout_to_zwo(self.decode_fit_workout(data, name))
+
+    def _log_workout_summary(self, workout_data, output_path):
+        """Log the created file (INFO) and a line per workout step (DEBUG)"""
+        encode_logger.info("FIT file created: %s", output_path)
+        if not encode_logger.isEnabledFor(logging.DEBUG):
+            return
+        
+        encode_logger.debug("Workout: %s", workout_data['name'])
+        encode_logger.debug("Sport: %s", workout_data['sport'])
+        encode_logger.debug("Total steps: %d", len(workout_data['steps']))
+        encode_logger.debug("Power format: %s", 'Absolute watts' if self.use_absolute_power else 'FTP percentage')
+        encode_logger.debug("Warmup manual advance: %s", 'Enabled' if self.warmup_manual_advance else 'Disabled')
+        encode_logger.debug("Cooldown manual advance: %s", 'Enabled' if self.cooldown_manual_advance else 'Disabled')
         if self.force_warmup_power is not None:
-            print(f"Forced warmup power: {self.force_warmup_power} ({self.force_warmup_power*100:.0f}%)")
+            encode_logger.debug("Forced warmup power: %s (%.0f%%)", self.force_warmup_power, self.force_warmup_power * 100)
         
-        # Print detailed step information
+        # Log detailed step information
         for i, step_data in enumerate(workout_data['steps'], 1):
-            if step_data['duration_type'] == WorkoutStepDuration.OPEN:
+            if step_data.duration_type == WorkoutStepDuration.REPEAT_UNTIL_STEPS_CMPLT:
+                encode_logger.debug("  Step %d: %s - back to step %d", i, step_data.wkt_step_name, step_data.duration_value + 1)
+                continue
+            elif step_data.duration_type == WorkoutStepDuration.OPEN:
                 duration_text = "Manual LAP"
             else:
-                duration_seconds = step_data['duration_value'] / 1000
+                duration_seconds = step_data.duration_value / 1000
                 duration_minutes = duration_seconds / 60
                 duration_text = f"{duration_minutes:.1f}min"
             
-            if step_data['target_type'] == WorkoutStepTarget.POWER:
-                if 'custom_target_value_low' in step_data and 'custom_target_value_high' in step_data:
+            if step_data.target_type == WorkoutStepTarget.POWER:
+                if step_data.custom_target_value_low is not None and step_data.custom_target_value_high is not None:
                     # Convert back from FIT format for display
                     if self.use_absolute_power:
-                        low_watts = step_data['custom_target_value_low'] - 1000
-                        high_watts = step_data['custom_target_value_high'] - 1000
+                        low_watts = step_data.custom_target_value_low - 1000
+                        high_watts = step_data.custom_target_value_high - 1000
                     else:
-                        low_watts = (step_data['custom_target_value_low'] / 10) * self.ftp_watts / 100
-                        high_watts = (step_data['custom_target_value_high'] / 10) * self.ftp_watts / 100
+                        low_watts = (step_data.custom_target_value_low / 10) * self.ftp_watts / 100
+                        high_watts = (step_data.custom_target_value_high / 10) * self.ftp_watts / 100
                     
                     low_pct = (low_watts / self.ftp_watts) * 100
                     high_pct = (high_watts / self.ftp_watts) * 100
-                    print(f"  Step {i}: {step_data['wkt_step_name']} - {duration_text} - {low_watts:.0f}-{high_watts:.0f}W ({low_pct:.0f}%-{high_pct:.0f}% FTP)")
+                    encode_logger.debug("  Step %d: %s - %s - %.0f-%.0fW (%.0f%%-%.0f%% FTP)", i, step_data.wkt_step_name,
+                                        duration_text, low_watts, high_watts, low_pct, high_pct)
                 else:
-                    watts = step_data['target_value']
+                    watts = step_data.target_value
                     if self.use_absolute_power and watts > 1000:
                         watts -= 1000
                     elif not self.use_absolute_power:
                         watts = (watts / 10) * self.ftp_watts / 100
                     
                     pct = (watts / self.ftp_watts) * 100
-                    print(f"  Step {i}: {step_data['wkt_step_name']} - {duration_text} - {watts:.0f}W ({pct:.0f}% FTP)")
+                    encode_logger.debug("  Step %d: %s - %s - %.0fW (%.0f%% FTP)", i, step_data.wkt_step_name, duration_text, watts, pct)
+            elif step_data.target_type == WorkoutStepTarget.HEART_RATE:
+                encode_logger.debug("  Step %d: %s - %s - HR Zone %s", i, step_data.wkt_step_name, duration_text, step_data.target_value)
             else:
-                print(f"  Step {i}: {step_data['wkt_step_name']} - {duration_text} - HR Zone {step_data['target_value']}")
+                encode_logger.debug("  Step %d: %s - %s - No target", i, step_data.wkt_step_name, duration_text)
 
-    def convert_zwo_to_fit(self, zwo_file_path, output_dir='./'):
-        """Convert single zwo file to FIT file"""
+    def convert_zwo_to_fit(self, zwo_file_path, output_dir='./', writer=None):
+        """Convert single zwo file to FIT file (written through writer, an OutputWriter, if given)"""
         try:
             workout = self.parse_zwo_file(zwo_file_path)
-            
-            # Create output filename
-            safe_name = "".join(c for c in workout['name'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_name = safe_name.replace(' ', '_')
-            output_filename = f"{safe_name}.fit"
-            output_path = os.path.join(output_dir, output_filename)
+            output_path = self._output_path(workout, output_dir)
             
             # Create FIT file
-            self.create_fit_workout(workout, output_path)
+            self.create_fit_workout(workout, output_path, writer, zwo_file_path)
+            return output_path
                 
         except Exception as e:
-            print(f"Error converting {zwo_file_path} to FIT: {e}")
+            encode_logger.debug("Error converting %s to FIT: %s", zwo_file_path, e)
             raise
 
-    def convert_folder(self, zwo_folder_path, fit_folder_path):
-        """Convert all ZWO files in a folder to FIT files"""
+    def _output_path(self, workout, output_dir):
+        """Build the .fit output path from the workout name"""
+        safe_name = "".join(c for c in workout['name'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_name = safe_name.replace(' ', '_')
+        output_filename = f"{safe_name}.fit"
+        return os.path.join(output_dir, output_filename)
+
+    def structure_key(self, workout):
+        """
+        Hashable key of everything the encoders write for a workout except its creation time
+        
+        Workout and step names are not part of the encoded file, so workouts with the
+        same key encode to the same bytes (given the same time_created).
+        """
+        return (self.sport_mapping.get(workout['sport'], Sport.GENERIC), tuple(
+            (step.duration_type, step.duration_value, step.target_type, step.target_value,
+             step.custom_target_value_low, step.custom_target_value_high, step.intensity, step.notes, step.equipment)
+            for step in workout['steps']
+        ))
+
+    def settings_fingerprint(self):
+        """Return every converter setting that affects the encoded FIT output"""
+        return {
+            'ftp_watts': self.ftp_watts,
+            'use_power_for_cycling': self.use_power_for_cycling,
+            'power_buffer_percent': self.power_buffer_percent,
+            'use_absolute_power': self.use_absolute_power,
+            'warmup_manual_advance': self.warmup_manual_advance,
+            'cooldown_manual_advance': self.cooldown_manual_advance,
+            'force_warmup_power': self.force_warmup_power,
+            'compact_intervals': self.compact_intervals,
+            'step_parsers': sorted(self.STEP_PARSERS),  # Newly supported elements change the output
+            'time_created': self.time_created,
+        }
+
+    def convert_folder(self, zwo_folder_path, fit_folder_path, workers=1, incremental=False, batch_targets=False,
+                       dedup=False, writer=None, metrics=None):
+        """
+        Convert all ZWO files in a folder to FIT files
+
+        Args:
+            zwo_folder_path: Folder containing the .zwo files
+            fit_folder_path: Folder where the .fit files are written
+            workers: Number of worker processes; 1 converts in this process, None uses every core
+            incremental: If True, skip files whose ZWO content and converter settings are unchanged
+                since the last run and whose .fit output still exists
+            batch_targets: If True (single process only), parse every file first and compute all
+                step targets in one vectorized pass with assign_targets_batch
+            dedup: If True (single process only), encode each distinct structure_key once and
+                hardlink the .fit files of structurally identical workouts to the first one
+            writer: OutputWriter the .fit files are written through (default: OutputWriter(),
+                atomic with batched fsyncs); it is flushed before returning
+            metrics: Optional metrics.MetricsSink that records this run and exports it when done
+        """
         # Ensure the output directory exists
         os.makedirs(fit_folder_path, exist_ok=True)
         
-        # Find all .zwo files in the source folder
+        # Find all .zwo files in the source folder (sorted so runs are reproducible)
         zwo_pattern = os.path.join(zwo_folder_path, "*.zwo")
-        zwo_files = glob.glob(zwo_pattern)
+        zwo_files = sorted(glob.glob(zwo_pattern))
         
         if not zwo_files:
-            print(f"No .zwo files found in {zwo_folder_path}")
+            batch_logger.warning("No .zwo files found in %s", zwo_folder_path)
+            if metrics is not None:
+                metrics.start(writer, self.parse_cache)  # Replace the previous run's counts with zeros
+                metrics.finish()
             return
         
-        print(f"Found {len(zwo_files)} ZWO files to convert:")
-        for zwo_file in zwo_files:
-            print(f"  - {os.path.basename(zwo_file)}")
+        batch_logger.info("Found %d ZWO files to convert", len(zwo_files))
+        if batch_logger.isEnabledFor(logging.DEBUG):
+            for zwo_file in zwo_files:
+                batch_logger.debug("  - %s", os.path.basename(zwo_file))
+            batch_logger.debug("\n" + "="*60)
         
-        print("\n" + "="*60)
+        # Skip files the build manifest says are already up to date
+        pending_files = zwo_files
+        manifest = None
+        if incremental:
+            manifest = BuildManifest.load(fit_folder_path, self.settings_fingerprint())
+            pending_files = [zwo_file for zwo_file in zwo_files if not manifest.is_up_to_date(zwo_file)]
+            manifest.prune(zwo_files)
+            batch_logger.info("Skipping %d unchanged files", len(zwo_files) - len(pending_files))
         
         # Convert each file
         successful_conversions = 0
         failed_conversions = 0
+        cache_counts = (self.parse_cache.hits, self.parse_cache.misses) if self.parse_cache else None
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        if writer is None:
+            writer = OutputWriter()
+        unchanged_before = writer.unchanged
+        if metrics is not None:
+            metrics.start(writer, self.parse_cache, skipped=len(zwo_files) - len(pending_files))
+        dedup_stats = collections.Counter()
+        if dedup:
+            results = self._convert_files_dedup(pending_files, fit_folder_path, dedup_stats, writer)
+        elif workers > 1 and len(pending_files) > 1:
+            results = self._convert_files_parallel(pending_files, fit_folder_path, workers, writer)
+        elif batch_targets:
+            results = self._convert_files_batched(pending_files, fit_folder_path, writer)
+        else:
+            results = self._convert_files_sequential(pending_files, fit_folder_path, writer)
+        
+        try:
+            for zwo_file, output_path, error, seconds in results:
+                if error is None:
+                    successful_conversions += 1
+                else:
+                    failed_conversions += 1
+                if manifest is not None:
+                    manifest.record(zwo_file, output_path)
+                if metrics is not None:
+                    metrics.record(error, seconds)
+        finally:
+            # Complete the files already written even if the batch was interrupted
+            writer.flush()
+            if metrics is not None:
+                metrics.finish()
+        
+        if manifest is not None:
+            manifest.save()
+        
+        # Summary
+        batch_logger.info("\n" + "="*60)
+        batch_logger.info("CONVERSION SUMMARY:")
+        batch_logger.info("Total files processed: %d", len(zwo_files))
+        batch_logger.info("Successful conversions: %d", successful_conversions)
+        batch_logger.info("Failed conversions: %d", failed_conversions)
+        if incremental:
+            batch_logger.info("Skipped (unchanged): %d", len(zwo_files) - len(pending_files))
+        if writer.skip_unchanged:
+            batch_logger.info("Identical to the existing .fit (not rewritten): %d", writer.unchanged - unchanged_before)
+        if dedup:
+            batch_logger.info("Deduplicated: %d files linked to %d distinct structures, %d bytes and %.1f ms of encoding saved",
+                              dedup_stats['duplicates'], dedup_stats['structures'], dedup_stats['bytes_saved'],
+                              dedup_stats['encode_seconds_saved'] * 1000)
+        elif workers > 1:
+            batch_logger.info("Worker processes: %d", workers)
+        if cache_counts is not None:
+            batch_logger.info("Parse cache: %d hits, %d misses", self.parse_cache.hits - cache_counts[0],
+                              self.parse_cache.misses - cache_counts[1])
+        batch_logger.info("Output directory: %s", fit_folder_path)
+
+    def convert_roster(self, zwo_folder_path, fit_folder_path, roster, writer=None):
+        """
+        Convert every ZWO file in a folder once per athlete of a roster
+        
+        Each file is read and parsed once. Athletes whose STRUCTURE_SETTINGS match share
+        one set of parsed steps, so per athlete only the FIT targets are computed (on a
+        copy of the steps) before the workout is encoded into <fit_folder>/<athlete>/.
+        
+        Args:
+            zwo_folder_path: Folder containing the .zwo files
+            fit_folder_path: Folder receiving one subfolder per athlete
+            roster: List of (athlete name, settings) tuples as returned by load_roster;
+                the settings override this converter's
+            writer: OutputWriter for the .fit files (default: OutputWriter()); flushed before returning
+        """
+        athletes = [(name, self.with_settings(**settings)) for name, settings in roster]
+        if not athletes:
+            batch_logger.warning("Roster has no athletes")
+            return
+        
+        zwo_files = sorted(glob.glob(os.path.join(zwo_folder_path, "*.zwo")))
+        if not zwo_files:
+            batch_logger.warning("No .zwo files found in %s", zwo_folder_path)
+            return
+        
+        batch_logger.info("Found %d ZWO files to convert for %d athletes", len(zwo_files), len(athletes))
         
+        sources = []
+        unreadable = 0
         for zwo_file in zwo_files:
             try:
-                print(f"\nConverting: {os.path.basename(zwo_file)}")
-                self.convert_zwo_to_fit(zwo_file, fit_folder_path)
-                successful_conversions += 1
-                print("-" * 40)
-                
+                sources.append((zwo_file, load_zwo_source(zwo_file)))
             except Exception as e:
-                print(f"Failed to convert {os.path.basename(zwo_file)}: {e}")
-                failed_conversions += 1
+                unreadable += 1
+                batch_logger.error("Failed to read %s: %s", os.path.basename(zwo_file), e)
+        
+        successful_conversions = 0
+        failed_conversions = unreadable * len(athletes)
+        structures = {}
+        if writer is None:
+            writer = OutputWriter()
+        try:
+            for athlete_name, converter in athletes:
+                # Build the untargeted steps once per distinct structure
+                key = tuple(getattr(converter, name) for name in STRUCTURE_SETTINGS)
+                if key not in structures:
+                    workouts = []
+                    for _, source in sources:
+                        try:
+                            workouts.append((converter.build_workout(source, resolve_targets=False), None))
+                        except Exception as e:
+                            workouts.append((None, e))
+                    structures[key] = workouts
+                
+                athlete_folder = os.path.join(fit_folder_path, athlete_name)
+                os.makedirs(athlete_folder, exist_ok=True)
+                batch_logger.debug("\nAthlete: %s (FTP %sW)", athlete_name, converter.ftp_watts)
+                
+                for (zwo_file, _), (workout, error) in zip(sources, structures[key]):
+                    try:
+                        if error is not None:
+                            raise error
+                        steps = [copy.copy(step) if step.target_type is not None else step for step in workout['steps']]
+                        for step in steps:
+                            converter._assign_targets(step)
+                        workout = dict(workout, steps=steps)
+                        converter.create_fit_workout(workout, converter._output_path(workout, athlete_folder), writer,
+                                                     zwo_file)
+                        successful_conversions += 1
+                    except Exception as e:
+                        failed_conversions += 1
+                        batch_logger.error("Failed to convert %s for %s: %s", os.path.basename(zwo_file), athlete_name, e)
+        finally:
+            writer.flush()
         
         # Summary
-        print("\n" + "="*60)
-        print("CONVERSION SUMMARY:")
-        print(f"Total files processed: {len(zwo_files)}")
-        print(f"Successful conversions: {successful_conversions}")
-        print(f"Failed conversions: {failed_conversions}")
-        print(f"Output directory: {fit_folder_path}")
+        batch_logger.info("\n" + "="*60)
+        batch_logger.info("CONVERSION SUMMARY:")
+        batch_logger.info("Total files processed: %d", len(zwo_files))
+        batch_logger.info("Athletes: %d", len(athletes))
+        batch_logger.info("Successful conversions: %d", successful_conversions)
+        batch_logger.info("Failed conversions: %d", failed_conversions)
+        batch_logger.info("Output directory: %s", fit_folder_path)
 
-
-def main():
-    # Initialize converter with your FTP in watts and 5% buffer
-    converter = zwoToFitConverter(
-        ftp_watts=240,  # Your actual FTP
+    def convert_archive(self, input_path, output_path, writer=None):
+        """
+        Convert the .zwo members of a zip/tar bundle straight into an output archive
+        
+        Members are streamed one at a time (read, parse, encode, add to the output) with
+        no temporary extraction, so memory use does not grow with the bundle. Each .fit
+        keeps its member's directory inside the archive, with the FIT file's
+        time_created as its modification time.
+        
+        Args:
+            input_path: .zip or tar archive (any compression) or folder with .zwo files
+            output_path: .zip, .tar, .tar.gz/.tgz, .tar.bz2 or .tar.xz archive to create,
+                or a folder
+            writer: OutputWriter for the .fit files of a folder output (default: OutputWriter())
+        """
+        from archives import ArchiveWriter, iter_members
+        
+        total = successful_conversions = failed_conversions = 0
+        written = set()
+        with ArchiveWriter(output_path, writer if writer is not None else OutputWriter(),
+                           self.time_created_for() / 1000) as archive:
+            for member, data in iter_members(input_path):
+                total += 1
+                batch_logger.debug("\nConverting: %s", member)
+                try:
+                    workout = self.build_workout(load_zwo_source(member, data))
+                    time_created = self.time_created_for()
+                    fit_bytes = self.encode_fit_workout(workout, time_created)
+                    fit_member = self._output_path(workout, posixpath.dirname(member)).replace(os.sep, '/')
+                    if fit_member in written:
+                        raise ValueError(f"{fit_member} was already written by another workout with the same name")
+                    archive.write(fit_member, fit_bytes, time_created / 1000)
+                    written.add(fit_member)
+                    self._log_workout_summary(workout, archive.location(fit_member))
+                    successful_conversions += 1
+                except Exception as e:
+                    failed_conversions += 1
+                    batch_logger.error("Failed to convert %s: %s", member, e)
+        
+        if total == 0:
+            batch_logger.warning("No .zwo files found in %s", input_path)
+            return
+        
+        # Summary
+        batch_logger.info("\n" + "="*60)
+        batch_logger.info("CONVERSION SUMMARY:")
+        batch_logger.info("Total files processed: %d", total)
+        batch_logger.info("Successful conversions: %d", successful_conversions)
+        batch_logger.info("Failed conversions: %d", failed_conversions)
+        batch_logger.info("Output: %s", output_path)
+
+    def convert_fit_folder(self, fit_folder_path, zwo_folder_path, writer=None):
+        """
+        Convert every FIT workout in a folder back to a ZWO file (see fit_to_zwo)
+        
+        Each <name>.fit becomes <name>.zwo; the file name is also the workout name when
+        the FIT file has none.
+        
+        Args:
+            fit_folder_path: Folder containing the .fit files
+            zwo_folder_path: Folder where the .zwo files are written
+            writer: OutputWriter for the .zwo files (default: OutputWriter()); flushed before returning
+        
+        Returns:
+            Number of files that failed to convert
+        """
+        fit_files = sorted(glob.glob(os.path.join(fit_folder_path, "*.fit")))
+        if not fit_files:
+            batch_logger.warning("No .fit files found in %s", fit_folder_path)
+            return 0
+        
+        batch_logger.info("Found %d FIT files to convert", len(fit_files))
+        os.makedirs(zwo_folder_path, exist_ok=True)
+        if writer is None:
+            writer = OutputWriter()
+        
+        failed = 0
+        try:
+            for fit_file in fit_files:
+                name = os.path.splitext(os.path.basename(fit_file))[0]
+                output_path = os.path.join(zwo_folder_path, f"{name}.zwo")
+                try:
+                    writer.write(output_path, self.fit_to_zwo(_read_file(fit_file), name))
+                    encode_logger.info("ZWO file created: %s", output_path)
+                except Exception as e:
+                    failed += 1
+                    batch_logger.error("Failed to convert %s: %s", os.path.basename(fit_file), e)
+        finally:
+            writer.flush()
+        
+        # Summary
+        batch_logger.info("\n" + "="*60)
+        batch_logger.info("CONVERSION SUMMARY:")
+        batch_logger.info("Total files processed: %d", len(fit_files))
+        batch_logger.info("Successful conversions: %d", len(fit_files) - failed)
+        batch_logger.info("Failed conversions: %d", failed)
+        batch_logger.info("Output directory: %s", zwo_folder_path)
+        return failed
+
+    def watch_folder(self, zwo_folder_path, fit_folder_path, debounce=0.05, poll_interval=0.25, use_inotify=True,
+                     stop_event=None, writer=None):
+        """
+        Keep a FIT folder in sync with a ZWO folder until interrupted
+        
+        Starts with an incremental convert_folder, then reconverts .zwo files as they are
+        created or modified and removes the .fit of deleted ones, using the build manifest
+        to know which output belongs to which input. Events for the same file that arrive
+        within `debounce` seconds of each other (an editor's save sequence) are handled
+        once. Every update is logged with its latency from the first event to the
+        written or removed .fit.
+        
+        Args:
+            zwo_folder_path: Folder containing the .zwo files
+            fit_folder_path: Folder where the .fit files are written
+            debounce: Seconds of quiet to wait for before handling a burst of events
+            poll_interval: Rescan interval when inotify is not available
+            use_inotify: If False, always poll
+            stop_event: Optional threading.Event that ends the watch when set
+            writer: OutputWriter for the .fit files (default: OutputWriter()), flushed after
+                every batch of events
+        """
+        from folder_watch import open_watcher
+        
+        # Watch before the initial sync so edits made during it are not missed
+        watcher = open_watcher(zwo_folder_path, '.zwo', poll_interval, use_inotify)
+        if writer is None:
+            writer = OutputWriter()
+        try:
+            self.convert_folder(zwo_folder_path, fit_folder_path, incremental=True, writer=writer)
+            manifest = BuildManifest.load(fit_folder_path, self.settings_fingerprint())
+            batch_logger.info("Watching %s for changes (%s)", zwo_folder_path, watcher.name)
+            
+            while stop_event is None or not stop_event.is_set():
+                events = watcher.read_events(timeout=0.5)
+                if not events:
+                    continue
+                # Debounce, but don't let a file that keeps changing postpone everything else
+                while time.monotonic() - events[0][2] < 10 * debounce:
+                    more = watcher.read_events(timeout=debounce)
+                    if not more:
+                        break
+                    events.extend(more)
+                
+                if any(name is None for name, _, _ in events):
+                    batch_logger.warning("Missed file events, rescanning %s", zwo_folder_path)
+                    self.convert_folder(zwo_folder_path, fit_folder_path, incremental=True, writer=writer)
+                    manifest = BuildManifest.load(fit_folder_path, self.settings_fingerprint())
+                    continue
+                self._sync_watched_files(events, zwo_folder_path, fit_folder_path, manifest, writer)
+        finally:
+            watcher.close()
+
+    def _sync_watched_files(self, events, zwo_folder_path, fit_folder_path, manifest, writer):
+        """Bring the outputs of the files named in a batch of watch events up to date"""
+        first_seen = {}
+        for name, _, timestamp in events:
+            first_seen.setdefault(name, timestamp)
+        
+        for name, timestamp in first_seen.items():
+            zwo_file = os.path.join(zwo_folder_path, name)
+            # Act on the file's current state; a deleted file may already be back
+            if os.path.exists(zwo_file):
+                if manifest.is_up_to_date(zwo_file):
+                    batch_logger.debug("%s unchanged", name)
+                    continue
+                previous = manifest.entries.get(name)
+                _, output_path, error = self._convert_one(zwo_file, fit_folder_path, writer)
+                writer.flush()  # Complete the file before reporting it
+                manifest.record(zwo_file, output_path)
+                if previous is not None and output_path is not None and previous['output'] != os.path.basename(output_path):
+                    self._remove_unused_output(fit_folder_path, previous['output'], manifest)
+                if error is None:
+                    batch_logger.info("Updated %s -> %s (%.1f ms)", name, os.path.basename(output_path),
+                                      (time.monotonic() - timestamp) * 1000)
+            else:
+                entry = manifest.entries.pop(name, None)
+                if entry is not None:
+                    self._remove_unused_output(fit_folder_path, entry['output'], manifest)
+                    batch_logger.info("Removed %s for deleted %s (%.1f ms)", entry['output'], name,
+                                      (time.monotonic() - timestamp) * 1000)
+        manifest.save()
+
+    def _remove_unused_output(self, fit_folder_path, output_name, manifest):
+        """Delete an output file unless another input still produces it"""
+        if any(entry['output'] == output_name for entry in manifest.entries.values()):
+            return
+        try:
+            os.remove(os.path.join(fit_folder_path, output_name))
+        except FileNotFoundError:
+            pass
+
+    def check_folder(self, zwo_folder_path, fit_folder_path=None):
+        """
+        Parse and validate every ZWO file in a folder without encoding or writing anything
+        
+        Args:
+            zwo_folder_path: Folder containing the .zwo files
+            fit_folder_path: If given, log the .fit path each workout would be written to
+                and warn about workouts that would overwrite each other
+            
+        Returns:
+            Number of files that failed to parse
+        """
+        zwo_files = sorted(glob.glob(os.path.join(zwo_folder_path, "*.zwo")))
+        if not zwo_files:
+            batch_logger.warning("No .zwo files found in %s", zwo_folder_path)
+            return 0
+        
+        failed = 0
+        outputs = {}
+        for zwo_file in zwo_files:
+            zwo_name = os.path.basename(zwo_file)
+            try:
+                workout = self.parse_zwo_file(zwo_file)
+            except Exception as e:
+                failed += 1
+                batch_logger.error("Invalid %s: %s", zwo_name, e)
+                continue
+            
+            if fit_folder_path is None:
+                batch_logger.info("%s: %s (%s, %d steps)", zwo_name, workout['name'], workout['sport'], len(workout['steps']))
+                continue
+            output_path = self._output_path(workout, fit_folder_path)
+            if output_path in outputs:
+                batch_logger.warning("%s and %s would both write %s", outputs[output_path], zwo_name, output_path)
+            outputs[output_path] = zwo_name
+            batch_logger.info("%s -> %s", zwo_name, output_path)
+        
+        batch_logger.info("%d files checked, %d invalid", len(zwo_files), failed)
+        return failed
+
+    async def convert_folder_async(self, zwo_folder_path, fit_folder_path, read_concurrency=4, encode_concurrency=1,
+                                   write_concurrency=4, queue_size=16, executor=None, writer=None, metrics=None):
+        """
+        Convert all ZWO files in a folder with an asyncio read -> encode -> write pipeline
+        
+        Reads and writes run in a thread pool so slow (e.g. network) storage is accessed
+        concurrently, while parsing and encoding run in an executor. The stages are
+        connected by queues of at most queue_size files, so a stage that falls behind
+        holds the earlier ones back and memory stays bounded however large the folder.
+        
+        Args:
+            zwo_folder_path: Folder containing the .zwo files
+            fit_folder_path: Folder where the .fit files are written
+            read_concurrency: Number of files read at the same time
+            encode_concurrency: Number of files parsed and encoded at the same time; above 1
+                the default executor is a process pool of that size
+            write_concurrency: Number of files written at the same time
+            queue_size: Maximum files waiting between two stages
+            executor: concurrent.futures executor for parse + encode (default: a single
+                thread, or a process pool if encode_concurrency > 1)
+            writer: OutputWriter for the .fit files (default: OutputWriter()); flushed before returning
+            metrics: Optional metrics.MetricsSink that records this run and exports it when done;
+                a file's latency is its read, parse + encode and write time
+        """
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        os.makedirs(fit_folder_path, exist_ok=True)
+        zwo_files = sorted(glob.glob(os.path.join(zwo_folder_path, "*.zwo")))
+        if not zwo_files:
+            batch_logger.warning("No .zwo files found in %s", zwo_folder_path)
+            if metrics is not None:
+                metrics.start(writer, self.parse_cache)  # Replace the previous run's counts with zeros
+                metrics.finish()
+            return
+        
+        batch_logger.info("Found %d ZWO files to convert", len(zwo_files))
+        
+        loop = asyncio.get_running_loop()
+        pending = list(reversed(zwo_files))
+        encode_queue = asyncio.Queue(queue_size)
+        write_queue = asyncio.Queue(queue_size)
+        errors = {}
+        written = {}
+        
+        def fail(zwo_file, e, seconds):
+            batch_logger.error("Failed to convert %s: %s", os.path.basename(zwo_file), e)
+            errors[zwo_file] = f"{type(e).__name__}: {e}"
+            if metrics is not None:
+                metrics.record(errors[zwo_file], seconds)
+        
+        async def read_stage():
+            while pending:
+                zwo_file = pending.pop()
+                start = time.perf_counter()
+                try:
+                    data = await loop.run_in_executor(io_executor, _read_file, zwo_file)
+                except Exception as e:
+                    fail(zwo_file, e, time.perf_counter() - start)
+                    continue
+                await encode_queue.put((zwo_file, data, time.perf_counter() - start))
+        
+        async def encode_stage():
+            while (item := await encode_queue.get()) is not None:
+                zwo_file, data, seconds = item
+                start = time.perf_counter()
+                try:
+                    workout, fit_bytes, error, messages, cache_counts = await loop.run_in_executor(
+                        executor, _encode_file_worker, self, zwo_file, data)
+                except Exception as e:  # e.g. a broken process pool
+                    fail(zwo_file, e, seconds + time.perf_counter() - start)
+                    continue
+                seconds += time.perf_counter() - start
+                for name, level, message in messages:
+                    logging.getLogger(name).log(level, "%s", message)
+                if cache_counts is not None:
+                    self.parse_cache.hits += cache_counts[0]
+                    self.parse_cache.misses += cache_counts[1]
+                    self.parse_cache.store_deferred(cache_counts[2])
+                if error is not None:
+                    fail(zwo_file, error, seconds)
+                    continue
+                await write_queue.put((zwo_file, workout, fit_bytes, seconds))
+        
+        async def write_stage():
+            while (item := await write_queue.get()) is not None:
+                zwo_file, workout, fit_bytes, seconds = item
+                output_path = self._output_path(workout, fit_folder_path)
+                start = time.perf_counter()
+                try:
+                    await loop.run_in_executor(io_executor, writer.write, output_path, fit_bytes)
+                except Exception as e:
+                    fail(zwo_file, e, seconds + time.perf_counter() - start)
+                    continue
+                self._log_workout_summary(workout, output_path)
+                written[zwo_file] = output_path
+                if metrics is not None:
+                    metrics.record(None, seconds + time.perf_counter() - start)
+        
+        cache_counts = (self.parse_cache.hits, self.parse_cache.misses) if self.parse_cache else None
+        own_executor = executor is None
+        if own_executor:
+            if encode_concurrency > 1:
+                log_levels = {name: logging.getLogger(name).level for name in LOGGER_NAMES}
+                executor = ProcessPoolExecutor(max_workers=encode_concurrency, initializer=_init_worker_logging,
+                                               initargs=(log_levels,))
+            else:
+                executor = ThreadPoolExecutor(max_workers=1)
+        io_executor = ThreadPoolExecutor(max_workers=read_concurrency + write_concurrency)
+        if writer is None:
+            writer = OutputWriter()
+        if metrics is not None:
+            metrics.start(writer, self.parse_cache)
+        try:
+            encoders = [asyncio.create_task(encode_stage()) for _ in range(encode_concurrency)]
+            writers = [asyncio.create_task(write_stage()) for _ in range(write_concurrency)]
+            await asyncio.gather(*(read_stage() for _ in range(read_concurrency)))
+            # Each stage finishes once it gets one end marker per task
+            for _ in encoders:
+                await encode_queue.put(None)
+            await asyncio.gather(*encoders)
+            for _ in writers:
+                await write_queue.put(None)
+            await asyncio.gather(*writers)
+        finally:
+            io_executor.shutdown()
+            if own_executor:
+                executor.shutdown()
+            writer.flush()
+            if metrics is not None:
+                metrics.finish()
+        
+        # Summary
+        batch_logger.info("\n" + "="*60)
+        batch_logger.info("CONVERSION SUMMARY:")
+        batch_logger.info("Total files processed: %d", len(zwo_files))
+        batch_logger.info("Successful conversions: %d", len(written))
+        batch_logger.info("Failed conversions: %d", len(errors))
+        if cache_counts is not None:
+            batch_logger.info("Parse cache: %d hits, %d misses", self.parse_cache.hits - cache_counts[0],
+                              self.parse_cache.misses - cache_counts[1])
+        batch_logger.info("Output directory: %s", fit_folder_path)
+
+    def _convert_files_sequential(self, zwo_files, fit_folder_path, writer):
+        """Convert files one after another, yielding (zwo_file, output_path, error, seconds) tuples"""
+        for zwo_file in zwo_files:
+            start = time.perf_counter()
+            zwo_file, output_path, error = self._convert_one(zwo_file, fit_folder_path, writer)
+            yield zwo_file, output_path, error, time.perf_counter() - start
+
+    def _convert_files_batched(self, zwo_files, fit_folder_path, writer):
+        """
+        Parse every file, compute all targets in one vectorized pass, then encode and write,
+        yielding (zwo_file, output_path, error, seconds) tuples
+        
+        A file's seconds are its parse, encode and write time plus an equal share of the
+        batch target pass.
+        """
+        parsed = []
+        for zwo_file in zwo_files:
+            start = time.perf_counter()
+            try:
+                workout, error = self.parse_zwo_file(zwo_file, resolve_targets=False), None
+            except Exception as e:
+                workout, error = None, e
+            parsed.append((zwo_file, workout, error, time.perf_counter() - start))
+        
+        start = time.perf_counter()
+        self.assign_targets_batch(workout for _, workout, _, _ in parsed if workout is not None)
+        targets_seconds = time.perf_counter() - start
+        if self.phase_timer is not None:
+            self.phase_timer.add('targets (batch)', targets_seconds)
+        targets_share = targets_seconds / len(parsed) if parsed else 0.0
+        
+        for zwo_file, workout, error, parse_seconds in parsed:
+            batch_logger.debug("\nConverting: %s", os.path.basename(zwo_file))
+            start = time.perf_counter() - parse_seconds - targets_share
+            try:
+                if error is not None:
+                    raise error
+                output_path = self._output_path(workout, fit_folder_path)
+                self.create_fit_workout(workout, output_path, writer, zwo_file)
+                batch_logger.debug("-" * 40)
+                yield zwo_file, output_path, None, time.perf_counter() - start
+            except Exception as e:
+                batch_logger.error("Failed to convert %s: %s", os.path.basename(zwo_file), e)
+                yield zwo_file, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+    def _convert_files_dedup(self, zwo_files, fit_folder_path, stats, writer):
+        """
+        Convert files, encoding each distinct structure once, yielding (zwo_file, output_path, error,
+        seconds) tuples
+        
+        A file whose structure_key matches an earlier file's gets a hardlink to that
+        file's output instead (a copy where the filesystem can't link), so with
+        time_created='mtime' it carries the first file's time. Once a later file
+        overwrites that output the structure is encoded afresh. stats counts the
+        distinct structures and the duplicates, bytes and encode time saved.
+        """
+        encoded = {}  # structure key -> (output path, FIT size, encode seconds)
+        owners = {}  # output path -> structure key whose encoded entry points at it
+        for zwo_file in zwo_files:
+            batch_logger.debug("\nConverting: %s", os.path.basename(zwo_file))
+            file_start = time.perf_counter()
+            try:
+                workout = self.parse_zwo_file(zwo_file)
+                output_path = self._output_path(workout, fit_folder_path)
+                key = self.structure_key(workout)
+                original = encoded.get(key)
+                # Whatever lands at output_path replaces the file an earlier entry may link from
+                owner = owners.get(output_path)
+                if owner is not None and owner != key:
+                    del encoded[owner], owners[output_path]
+                if original is None:
+                    start = time.perf_counter()
+                    fit_bytes = self.encode_fit_workout(workout, self.time_created_for(zwo_file))
+                    encode_seconds = time.perf_counter() - start
+                    encoded[key] = (output_path, len(fit_bytes), encode_seconds)
+                    owners[output_path] = key
+                    writer.write(output_path, fit_bytes)
+                    if self.phase_timer is not None:
+                        self.phase_timer.add('encode', encode_seconds)
+                        self.phase_timer.add('write', time.perf_counter() - start - encode_seconds)
+                    stats['structures'] += 1
+                    self._log_workout_summary(workout, output_path)
+                else:
+                    original_path, size, encode_seconds = original
+                    if output_path != original_path and writer.link(original_path, output_path):
+                        stats['bytes_saved'] += size
+                    stats['duplicates'] += 1
+                    stats['encode_seconds_saved'] += encode_seconds
+                    encode_logger.info("FIT file created: %s (same structure as %s)", output_path,
+                                       os.path.basename(original_path))
+                batch_logger.debug("-" * 40)
+                yield zwo_file, output_path, None, time.perf_counter() - file_start
+            except Exception as e:
+                batch_logger.error("Failed to convert %s: %s", os.path.basename(zwo_file), e)
+                yield zwo_file, None, f"{type(e).__name__}: {e}", time.perf_counter() - file_start
+
+    def _convert_files_parallel(self, zwo_files, fit_folder_path, workers, writer):
+        """
+        Convert files in a process pool, yielding (zwo_file, output_path, error, seconds) tuples
+
+        Each worker runs parse + build + encode for one file and captures its log
+        messages; the FIT bytes are written here, through writer. Results come back in
+        input order, so the log is identical whatever order the workers finish in. A
+        file's seconds are the worker's time for it plus the write.
+        """
+        workers = min(workers, len(zwo_files))
+        # A few chunks per worker keeps IPC overhead low without starving the tail of the batch
+        chunksize = max(1, len(zwo_files) // (workers * 4))
+        
+        log_levels = {name: logging.getLogger(name).level for name in LOGGER_NAMES}
+        
+        from concurrent.futures import ProcessPoolExecutor  # Only parallel runs need multiprocessing
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_logging,
+                                 initargs=(log_levels,)) as executor:
+            results = executor.map(_convert_file_worker, [self] * len(zwo_files), zwo_files,
+                                   [fit_folder_path] * len(zwo_files), chunksize=chunksize)
+            for zwo_file, output_path, fit_bytes, error, messages, cache_counts, phase_samples, seconds in results:
+                # Replay the worker's log through this process's handlers
+                for name, level, message in messages:
+                    logging.getLogger(name).log(level, "%s", message)
+                if cache_counts is not None:
+                    self.parse_cache.hits += cache_counts[0]
+                    self.parse_cache.misses += cache_counts[1]
+                    self.parse_cache.store_deferred(cache_counts[2])
+                if phase_samples:
+                    self.phase_timer.merge(phase_samples)
+                if fit_bytes is not None:
+                    start = time.perf_counter()
+                    try:
+                        writer.write(output_path, fit_bytes)
+                        if self.phase_timer is not None:
+                            self.phase_timer.add('write', time.perf_counter() - start)
+                    except Exception as e:
+                        batch_logger.error("Failed to convert %s: %s", os.path.basename(zwo_file), e)
+                        output_path, error = None, f"{type(e).__name__}: {e}"
+                    seconds += time.perf_counter() - start
+                yield zwo_file, output_path, error, seconds
+
+    def _convert_one(self, zwo_file, fit_folder_path, writer=None):
+        """Convert a single file for convert_folder, reporting failures instead of raising"""
+        try:
+            batch_logger.debug("\nConverting: %s", os.path.basename(zwo_file))
+            output_path = self.convert_zwo_to_fit(zwo_file, fit_folder_path, writer)
+            batch_logger.debug("-" * 40)
+            return zwo_file, output_path, None
+            
+        except Exception as e:
+            batch_logger.error("Failed to convert %s: %s", os.path.basename(zwo_file), e)
+            return zwo_file, None, f"{type(e).__name__}: {e}"
+
+
+def _fit_duration_units(step_records):
+    """
+    Raw duration_time units per second of a FIT file's workout_step records
+    
+    Only called for files with this converter's file_id (see decode_fit_workout);
+    every other file uses the profile's milliseconds. The FIT profile stores
+    milliseconds, but this converter's encoders scale its step durations (already in
+    milliseconds) by the profile's 1000 again, while files from earlier versions hold
+    milliseconds. The two are told apart by every timed step being a whole number of
+    those microseconds, so an earlier version's file whose timed steps are all
+    multiples of 1000 s decodes 1000x too short.
+    """
+    durations = [fields.get(2, 0) for fields in step_records if fields.get(1) == WorkoutStepDuration.TIME.value]
+    if durations and all(duration and duration % 1000000 == 0 for duration in durations):
+        return 1000000
+    return 1000
+
+
+def _shortest_fraction(encode, value, exact):
+    """exact rounded to the fewest decimals (2 to 4) that encode() maps to value"""
+    for digits in (2, 3, 4):
+        fraction = round(exact, digits)
+        if encode(fraction) == value:
+            return fraction
+    return round(exact, 4)
+
+
+def _xml_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _zwo_number(value):
+    """Format a ZWO attribute value without a trailing .0"""
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _zwo_elements(steps):
+    """Yield (tag, attributes) ZWO elements for decoded steps, folding work/rest runs into IntervalsT"""
+    def key(step):
+        return step.duration_type, step.duration_value, step.power_low, step.power_high, step.intensity
+    
+    def is_interval_step(step, intensities):
+        return (step.duration_type == WorkoutStepDuration.TIME and step.power_low is not None
+                and step.power_low == step.power_high and step.intensity in intensities)
+    
+    i = 0
+    while i < len(steps):
+        work = steps[i]
+        if (i + 2 < len(steps) and is_interval_step(work, (Intensity.ACTIVE, Intensity.INTERVAL))
+                and is_interval_step(steps[i + 1], (Intensity.REST, Intensity.RECOVERY)) and key(steps[i + 2]) == key(work)):
+            rest = steps[i + 1]
+            repeat = 2
+            i += 3
+            while i + 1 < len(steps) and key(steps[i]) == key(rest) and key(steps[i + 1]) == key(work):
+                repeat += 1
+                i += 2
+            yield 'IntervalsT', {
+                'Repeat': str(repeat),
+                'OnDuration': _zwo_number(work.duration_value / 1000),
+                'OffDuration': _zwo_number(rest.duration_value / 1000),
+                'OnPower': _zwo_number(work.power_low),
+                'OffPower': _zwo_number(rest.power_low),
+            }
+            continue
+        
+        i += 1
+        duration = work.duration_value / 1000 if work.duration_type == WorkoutStepDuration.TIME else OPEN_STEP_SECONDS
+        attributes = {'Duration': _zwo_number(duration)}
+        if work.power_low is None:
+            yield 'FreeRide', attributes
+        elif work.intensity in (Intensity.WARMUP, Intensity.COOLDOWN):
+            attributes.update(PowerLow=_zwo_number(work.power_low), PowerHigh=_zwo_number(work.power_high))
+            yield 'Warmup' if work.intensity == Intensity.WARMUP else 'Cooldown', attributes
+        elif work.power_low != work.power_high:
+            attributes.update(PowerLow=_zwo_number(work.power_low), PowerHigh=_zwo_number(work.power_high))
+            yield 'Ramp', attributes
+        else:
+            attributes['Power'] = _zwo_number(work.power_low)
+            yield 'SteadyState', attributes
+
+
+def _table_lookup(table, power, grid, compute):
+    """
+    Return compute(power) from a target table indexed by power * grid, computing and
+    storing missing entries; powers off the grid (or beyond the table) are computed directly
+    """
+    index = round(power * grid) if 0 <= power <= TARGET_GRID_MAX else -1
+    if index < 0 or index / grid != power:
+        return compute(power)
+    value = table[index]
+    if value is None:
+        value = table[index] = compute(power)
+    return value
+
+
+@functools.lru_cache(maxsize=64)
+def _converter_for_profile(profile_items):
+    return zwoToFitConverter(**dict(profile_items))
+
+
+def convert_bytes(zwo, **profile):
+    """
+    Convert ZWO content (bytes or str) to FIT file bytes without touching the filesystem
+    
+    Args:
+        zwo: ZWO XML as bytes or str
+        **profile: zwoToFitConverter keyword arguments (ftp_watts, backend, ...); converters
+            are reused between calls with the same profile
+    """
+    return _converter_for_profile(tuple(sorted(profile.items()))).convert_bytes(zwo)
+
+
+def convert_fileobj(source, destination=None, **profile):
+    """File object variant of convert_bytes; see zwoToFitConverter.convert_fileobj"""
+    return _converter_for_profile(tuple(sorted(profile.items()))).convert_fileobj(source, destination)
+
+
+def fit_to_zwo(data, name=None, **profile):
+    """
+    Convert FIT workout bytes to ZWO XML bytes without touching the filesystem
+    
+    Args:
+        data: The FIT file's content, any bytes-like object
+        name: Workout name to use if the file has none
+        **profile: zwoToFitConverter keyword arguments; the power settings (ftp_watts,
+            power_buffer_percent, use_absolute_power) must match the ones the file was written with
+    """
+    return _converter_for_profile(tuple(sorted(profile.items()))).fit_to_zwo(data, name)
+
+
+def verify_fit_folder(fit_folder_path):
+    """
+    Check that every .fit file in a folder is well formed (see fit_reader.verify_fit)
+    
+    Returns:
+        Number of invalid files
+    """
+    from fit_reader import verify_folder  # Only verification needs the reader
+    
+    start = time.perf_counter()
+    results = verify_folder(fit_folder_path)
+    elapsed = time.perf_counter() - start
+    if not results:
+        batch_logger.warning("No .fit files found in %s", fit_folder_path)
+        return 0
+    
+    failed = 0
+    for fit_file, problem in results:
+        if problem is not None:
+            failed += 1
+            batch_logger.error("Invalid %s: %s", os.path.basename(fit_file), problem)
+        else:
+            batch_logger.debug("%s: OK", os.path.basename(fit_file))
+    
+    batch_logger.info("%d files verified, %d invalid (%.0f files/s)", len(results), failed,
+                      len(results) / elapsed if elapsed else 0)
+    return failed
+
+
+def parse_time_created(value):
+    """
+    Turn a --time-created value into zwoToFitConverter's time_created setting
+    
+    Args:
+        value: 'now', 'mtime', 'fixed' or a Unix time in seconds
+    """
+    if value == 'now':
+        return None
+    if value == 'mtime':
+        return 'mtime'
+    if value == 'fixed':
+        return FIXED_TIME_CREATED
+    try:
+        return round(float(value) * 1000)
+    except ValueError:
+        raise ValueError(f"Invalid time_created {value!r}, expected now, mtime, fixed or a Unix time in seconds")
+
+
+def load_roster(roster_path):
+    """
+    Read athlete profiles from a JSON roster file
+    
+    The file holds a list of objects (or {"athletes": [...]}), each with a "name" and
+    any of ATHLETE_SETTINGS, e.g. {"name": "alice", "ftp_watts": 265, "power_buffer_percent": 3}.
+    
+    Returns:
+        List of (athlete name, settings dict) tuples
+    
+    Raises:
+        ValueError: If the file isn't valid JSON, the athletes aren't a list, an entry
+            isn't an object, a name is missing or repeated, or an entry has a setting
+            outside ATHLETE_SETTINGS or a value athlete_settings.check_setting rejects
+    """
+    import json
+    from athlete_settings import check_setting
+    
+    with open(roster_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('athletes', [])
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a list of athletes, got {data!r}")
+    
+    roster = []
+    names = set()
+    for entry in data:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Roster entries must be JSON objects, got {entry!r}")
+        settings = dict(entry)
+        name = str(settings.pop('name', '')).strip()
+        # The name becomes the athlete's output folder
+        if not name or name in names or name in ('.', '..') or '/' in name or os.sep in name:
+            raise ValueError(f"Roster entries need a unique name usable as a folder name, got {name!r}")
+        unknown = set(settings) - set(ATHLETE_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings for athlete {name!r}: {', '.join(sorted(unknown))}")
+        try:
+            settings = {key: check_setting(key, value) for key, value in settings.items()}
+        except ValueError as e:
+            raise ValueError(f"Athlete {name!r}: {e}") from None
+        names.add(name)
+        roster.append((name, settings))
+    return roster
+
+
+# Durability levels of OutputWriter
+DURABILITY_LEVELS = ('none', 'batch', 'full')
+
+# A batch of at least this many files is made durable with one os.sync() where the platform has it
+OS_SYNC_MIN_FILES = 256
+
+# Temporary files another writer left behind are removed once they are this old
+STALE_TEMP_SECONDS = 3600
+
+_TEMP_NAME = re.compile(r'^\..+\.\d+-\d+\.tmp$')
+
+
+class OutputWriter:
+    """
+    Write output files atomically
+    
+    Each file is written to a temporary file in the same folder and renamed over its
+    final path, so a crash or Ctrl-C never leaves a truncated .fit behind. The
+    durability level decides what survives a power loss:
+    
+        none: no fsync; files are renamed into place right away
+        batch: renames wait until batch_size files are pending, max_delay seconds have
+            passed since the oldest of them was written, or flush(); then each file is
+            fsynced (one os.sync() instead for batches of OS_SYNC_MIN_FILES or more,
+            where available), they are renamed and each output folder is fsynced once
+        full: every file and its folder are fsynced before write() returns
+    
+    The first write to a folder removes temporary files that crashed runs left there
+    (older than STALE_TEMP_SECONDS).
+    
+    With skip_unchanged, a file that already holds exactly the new bytes (or already
+    is the requested hardlink) is left alone, so unchanged outputs keep their mtime
+    and inode and sync tools see no change. Pair it with a deterministic
+    time_created, or every encoding differs.
+    
+    Thread safe. Call flush() (or use as a context manager) to complete pending files.
+    """
+    
+    def __init__(self, durability='batch', batch_size=64, skip_unchanged=False, max_delay=1.0):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability {durability!r}, expected one of {DURABILITY_LEVELS}")
+        self.durability = durability
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.skip_unchanged = skip_unchanged
+        self.pending = []  # (temporary path, final path) renamed by the next flush
+        self.pending_since = None  # time.monotonic() of the oldest pending file
+        self.folders = set()  # Folders already swept for stale temporary files
+        self.syncs = 0
+        self.bytes_written = 0  # By write(); links add none
+        self.unchanged = 0  # Writes and links skipped by skip_unchanged
+        self.lock = threading.Lock()
+    
+    def _open_folder(self, path):
+        """Sweep path's folder for stale temporary files the first time it is written to"""
+        folder = os.path.dirname(path)
+        with self.lock:
+            if folder in self.folders:
+                return
+            self.folders.add(folder)
+        _remove_stale_temps(folder)
+    
+    def write(self, path, data):
+        """Write data to path"""
+        self._open_folder(path)
+        if self.skip_unchanged and self._is_unchanged(path, data):
+            return
+        self._commit(_write_temp(path, data, fsync=self.durability == 'full'), path)
+        with self.lock:
+            self.bytes_written += len(data)
+    
+    def _is_unchanged(self, path, data):
+        """Count and return True if path already holds data and no pending write will replace it"""
+        with self.lock:
+            if any(pending_path == path for _, pending_path in self.pending):
+                return False
+        try:
+            if os.stat(path).st_size != len(data):
+                return False
+            with open(path, 'rb') as f:
+                if f.read() != data:
+                    return False
+        except OSError:
+            return False
+        with self.lock:
+            self.unchanged += 1
+        return True
+    
+    def link(self, source_path, link_path):
+        """
+        Make link_path a hardlink to the file written to source_path (a copy where the
+        filesystem can't link)
+        
+        Returns:
+            True if linked, False if copied
+        """
+        self._open_folder(link_path)
+        with self.lock:
+            # Link the temporary file if source_path is still waiting to be renamed
+            source = next((tmp_path for tmp_path, path in reversed(self.pending) if path == source_path), source_path)
+            if (self.skip_unchanged and source == source_path and _same_file(source_path, link_path)
+                    and not any(path == link_path for _, path in self.pending)):
+                self.unchanged += 1
+                return True
+            tmp_path = _temp_path(link_path)
+            try:
+                os.link(source, tmp_path)
+                linked = True
+            except OSError:
+                with open(source, 'rb') as f:
+                    data = f.read()
+                tmp_path = _write_temp(link_path, data, fsync=self.durability == 'full')
+                linked = False
+        self._commit(tmp_path, link_path)
+        return linked
+    
+    def _commit(self, tmp_path, path):
+        if self.durability != 'batch':
+            os.replace(tmp_path, path)
+            if self.durability == 'full':
+                _fsync_folder(os.path.dirname(path))
+                self.syncs += 1
+            return
+        with self.lock:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append((tmp_path, path))
+            if (len(self.pending) < self.batch_size
+                    and (self.max_delay is None or time.monotonic() - self.pending_since < self.max_delay)):
+                return
+        self.flush()
+    
+    def flush(self):
+        """Make every pending file durable and rename it into place"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if not pending:
+                return
+            if len(pending) >= OS_SYNC_MIN_FILES and hasattr(os, 'sync'):
+                os.sync()  # One call for the whole batch instead of a call per file
+            else:
+                for tmp_path, _ in pending:
+                    _fsync_file(tmp_path)
+            for tmp_path, path in pending:
+                os.replace(tmp_path, path)
+            for folder in {os.path.dirname(path) for _, path in pending}:
+                _fsync_folder(folder)
+            self.syncs += 1
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BuildManifest:
+    """
+    Persistent record of which ZWO inputs produced which FIT outputs
+
+    Stored as JSON next to the output folder (``./fit`` -> ``./fit.manifest.json``).
+    Each entry is keyed by a SHA-256 of the ZWO bytes plus the converter settings
+    fingerprint, so changing either the file or any output-affecting setting
+    invalidates it.
+    """
+    VERSION = 1
+
+    def __init__(self, path, fit_folder_path, settings, entries=None):
+        self.path = path
+        import json  # json and hashlib only load on the --incremental path
+        self.fit_folder_path = fit_folder_path
+        self.settings_blob = json.dumps(settings, sort_keys=True).encode('utf-8')
+        self.entries = entries if entries is not None else {}
+        self._pending_keys = {}
+
+    @staticmethod
+    def path_for(fit_folder_path):
+        """Return the manifest path that sits next to the given output folder"""
+        folder = os.path.normpath(fit_folder_path)
+        return f"{folder}.manifest.json"
+
+    @classmethod
+    def load(cls, fit_folder_path, settings):
+        """Load the manifest for an output folder, starting empty if it is missing or unreadable"""
+        import json
+        path = cls.path_for(fit_folder_path)
+        entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == cls.VERSION:
+                entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+        return cls(path, fit_folder_path, settings, entries)
+
+    def build_key(self, zwo_file):
+        """Hash the ZWO bytes together with the converter settings"""
+        import hashlib
+        digest = hashlib.sha256(self.settings_blob)
+        with open(zwo_file, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def is_up_to_date(self, zwo_file):
+        """Return True if the file's last output was built from identical input and still exists"""
+        key = self.build_key(zwo_file)
+        self._pending_keys[zwo_file] = key
+        entry = self.entries.get(os.path.basename(zwo_file))
+        if entry is None or entry.get('key') != key:
+            return False
+        return os.path.exists(os.path.join(self.fit_folder_path, entry['output']))
+
+    def record(self, zwo_file, output_path):
+        """Store the result of a conversion; failed conversions (no output) are forgotten"""
+        name = os.path.basename(zwo_file)
+        key = self._pending_keys.pop(zwo_file, None)
+        if output_path is None or key is None:
+            self.entries.pop(name, None)
+        else:
+            self.entries[name] = {'key': key, 'output': os.path.basename(output_path)}
+
+    def prune(self, zwo_files):
+        """Drop entries for inputs that no longer exist"""
+        present = {os.path.basename(zwo_file) for zwo_file in zwo_files}
+        for name in list(self.entries):
+            if name not in present:
+                del self.entries[name]
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run never leaves it half written"""
+        import json
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed, FTP-independent workouts
+    
+    Entries are keyed by the file's absolute path, size, mtime_ns and SHA-256 of its
+    content, plus the converter settings that shape the step list (STRUCTURE_SETTINGS).
+    They hold the workout with its steps' power fractions but without FIT targets, so
+    one entry serves every FTP, buffer and power format. Each entry is a marshal blob
+    of plain tuples in its own file; an entry's mtime is its last use, and once the
+    cache grows past max_bytes the least recently used entries are evicted down to
+    EVICT_TO of the limit.
+    
+    A pickled copy (as sent to pool workers) reads entries but only collects new ones;
+    the parent stores them with store_deferred, so the size accounting and eviction
+    happen in one place instead of rescanning the cache in every worker task.
+    """
+    VERSION = 2
+    SUFFIX = '.wkt'
+    EVICT_TO = 0.8
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None  # Measured on the first store
+        self._deferred = None  # (entry path, blob) list in pickled copies
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_total_bytes'] = None
+        state['_deferred'] = []
+        return state
+
+    def take_deferred(self):
+        """Return the entries a pickled copy collected instead of storing, and start over"""
+        if not self._deferred:
+            return []
+        deferred, self._deferred = self._deferred, []
+        return deferred
+
+    def store_deferred(self, deferred):
+        """Store entries returned by a pickled copy's take_deferred"""
+        for entry_path, blob in deferred:
+            self._store(entry_path, blob)
+
+    def load_workout(self, zwo_file, converter, data=None):
+        """
+        Return the workout for zwo_file as parse_zwo_file(resolve_targets=False) would,
+        from the cache if possible (data: the file's bytes, if already read)
+        """
+        import hashlib
+        import json
+        if data is None:
+            with open(zwo_file, 'rb') as f:
+                data = f.read()
+                stat = os.fstat(f.fileno())
+        else:
+            stat = os.stat(zwo_file)
+        structure = [getattr(converter, name) for name in STRUCTURE_SETTINGS]
+        key = hashlib.sha256(json.dumps([os.path.abspath(zwo_file), stat.st_size, stat.st_mtime_ns, structure]).encode('utf-8'))
+        key.update(hashlib.sha256(data).digest())
+        entry_path = os.path.join(self.cache_dir, key.hexdigest() + self.SUFFIX)
+        
+        try:
+            with open(entry_path, 'rb') as f:
+                record = marshal.loads(f.read())
+            if record[0] == self.VERSION:
+                os.utime(entry_path)  # Mark as recently used
+                self.hits += 1
+                workout = _workout_from_record(record)
+                _warn_skipped_elements(workout)
+                return workout
+        except (OSError, EOFError, ValueError, TypeError, IndexError):
+            pass
+        
+        self.misses += 1
+        workout = converter.build_workout(load_zwo_source(zwo_file, data), resolve_targets=False)
+        blob = marshal.dumps(_workout_to_record(workout, self.VERSION))
+        if self._deferred is not None:
+            self._deferred.append((entry_path, blob))
+        else:
+            self._store(entry_path, blob)
+        return workout
+
+    def _store(self, entry_path, blob):
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, entry_path)
+        
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._total_bytes += len(blob)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        """Yield (mtime_ns, size, path) of every cache entry"""
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    yield stat.st_mtime_ns, stat.st_size, entry.path
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is below EVICT_TO of max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Evicted by another process
+            total -= size
+        self._total_bytes = total
+
+
+def _workout_to_record(workout, version):
+    """Flatten a workout dict into plain tuples for marshal (enums stored by value)"""
+    steps = tuple(
+        (step.wkt_step_name, step.duration_type.value, step.duration_value,
+         step.target_type.value if step.target_type is not None else None, step.target_value,
+         step.custom_target_value_low, step.custom_target_value_high,
+         step.intensity.value if step.intensity is not None else None,
+         step.notes, step.equipment, step.power_low, step.power_high)
+        for step in workout['steps']
+    )
+    return (version, workout['name'], workout['description'], workout['sport'], steps,
+            tuple(workout['skipped_elements'].items()))
+
+
+# Value -> member lookups for the enums in cache records and decoded FIT files (None stays None)
+_DURATION_MEMBERS = {member.value: member for member in WorkoutStepDuration}
+_TARGET_MEMBERS = {None: None, **{member.value: member for member in WorkoutStepTarget}}
+_INTENSITY_MEMBERS = {None: None, **{member.value: member for member in Intensity}}
+
+# Raw values of the duration types that make a workout_step a loop back to an earlier step
+_REPEAT_DURATIONS = frozenset(member.value for member in WorkoutStepDuration if member.name.startswith('REPEAT_'))
+
+
+def _workout_from_record(record):
+    """Rebuild a workout dict from _workout_to_record's tuples"""
+    _, name, description, sport, step_records, skipped = record
+    steps = [
+        WorkoutStep(step_name, _DURATION_MEMBERS[duration_type], duration_value, _TARGET_MEMBERS[target_type],
+                    target_value, target_low, target_high, _INTENSITY_MEMBERS[intensity], notes, equipment,
+                    power_low, power_high)
+        for (step_name, duration_type, duration_value, target_type, target_value, target_low, target_high,
+             intensity, notes, equipment, power_low, power_high) in step_records
+    ]
+    return {'name': name, 'description': description, 'sport': sport, 'steps': steps, 'skipped_elements': dict(skipped)}
+
+
+def _init_worker_logging(log_levels):
+    """Process pool initializer: mirror the parent's log levels and collect messages instead of printing"""
+    for name, level in log_levels.items():
+        logging.getLogger(name).setLevel(level)
+    root = logging.getLogger('zwo2fit')
+    root.handlers.clear()
+    root.addHandler(_RecordCollector())
+    root.propagate = False
+
+
+class _CapturingWriter:
+    """Stands in for an OutputWriter in pool workers: keeps the FIT bytes for the parent to write"""
+    data = None
+    
+    def write(self, path, data):
+        self.data = data
+
+
+def _convert_file_worker(converter, zwo_file, fit_folder_path):
+    """
+    Process pool entry point: convert one file without writing it and return its result,
+    FIT bytes, captured log messages, the (hits, misses, deferred entries) it added to
+    the parse cache, its phase timings (None without a phase timer) and the seconds it took
+    """
+    start = time.perf_counter()
+    collector = logging.getLogger('zwo2fit').handlers[0]
+    collector.messages = []
+    cache = converter.parse_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    writer = _CapturingWriter()
+    zwo_file, output_path, error = converter._convert_one(zwo_file, fit_folder_path, writer)
+    cache_counts = (cache.hits - hits, cache.misses - misses, cache.take_deferred()) if cache is not None else None
+    phase_samples = None
+    if converter.phase_timer is not None:
+        phase_samples = converter.phase_timer.take()
+        phase_samples.pop('write', None)  # Only captured here; the parent times the real write
+    return (zwo_file, output_path, writer.data, error, collector.messages, cache_counts, phase_samples,
+            time.perf_counter() - start)
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_file(path, data):
+    """
+    Replace path with data atomically (no fsync)
+    
+    Renaming a new file over the old one also leaves other hardlinks to it unchanged.
+    """
+    os.replace(_write_temp(path, data), path)
+
+
+_temp_counter = itertools.count()
+
+
+def _temp_path(path):
+    """A unique hidden temporary file name next to path"""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.{os.getpid()}-{next(_temp_counter)}.tmp")
+
+
+def _write_temp(path, data, fsync=False):
+    """Write data to a new temporary file next to path and return its path"""
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        # Never leave a partial file behind, including on Ctrl-C
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path
+
+
+def _same_file(path, other_path):
+    try:
+        return os.path.samefile(path, other_path)
+    except OSError:
+        return False
+
+
+def _fsync_file(path):
+    """Make a written file's data durable"""
+    fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))  # Windows can only fsync writable files
+    try:
+        getattr(os, 'fdatasync', os.fsync)(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove_stale_temps(folder):
+    """Remove temporary files older than STALE_TEMP_SECONDS that crashed writers left in folder"""
+    cutoff = time.time() - STALE_TEMP_SECONDS
+    try:
+        entries = list(os.scandir(folder or '.'))
+    except OSError:
+        return  # Not created yet
+    for entry in entries:
+        if not _TEMP_NAME.match(entry.name):
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _fsync_folder(folder):
+    """Make the renames in a folder durable"""
+    try:
+        fd = os.open(folder or '.', os.O_RDONLY)
+    except OSError:
+        return  # Platforms that can't open folders (Windows) can't fsync them either
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _encode_file_worker(converter, zwo_file, data):
+    """
+    Executor entry point for convert_folder_async: parse and encode one file's bytes
+    
+    Returns:
+        (workout, FIT bytes, exception or None, captured log messages, parse cache
+        (hits, misses, deferred entries) added); messages are only captured in pool
+        processes, threads log directly
+    """
+    handlers = logging.getLogger('zwo2fit').handlers
+    collector = handlers[0] if handlers and isinstance(handlers[0], _RecordCollector) else None
+    if collector is not None:
+        collector.messages = []
+    cache = converter.parse_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    
+    workout = fit_bytes = error = None
+    try:
+        workout = converter.parse_zwo_file(zwo_file, data=data)
+        fit_bytes = converter.encode_fit_workout(workout, converter.time_created_for(zwo_file))
+    except Exception as e:
+        error = e
+    
+    cache_counts = (cache.hits - hits, cache.misses - misses, cache.take_deferred()) if cache is not None else None
+    return workout, fit_bytes, error, collector.messages if collector is not None else [], cache_counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Zwift ZWO workouts to Garmin FIT workouts")
+    parser.add_argument('--zwo-folder', default='./zwo', help="Folder (or .zip/.tar bundle) containing .zwo files")
+    parser.add_argument('--fit-folder', default='./fit',
+                        help="Folder where .fit files will be saved (or a .zip/.tar[.gz|.bz2|.xz] archive to create)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU core)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Skip ZWO files unchanged since the last run (uses <fit-folder>.manifest.json)")
+    parser.add_argument('--backend', choices=BACKENDS, default='fit_tool',
+                        help="FIT encoder backend (native produces identical bytes, faster)")
+    parser.add_argument('--compact-intervals', action='store_true',
+                        help="Write IntervalsT as a FIT repeat step instead of expanding every repeat")
+    parser.add_argument('--async-pipeline', action='store_true',
+                        help="Overlap file reads, encoding (-j processes) and writes with an asyncio pipeline")
+    parser.add_argument('--poll', action='store_true', help="With --watch, poll the folder instead of using inotify")
+    parser.add_argument('--debounce-ms', type=float, default=50,
+                        help="With --watch, wait this long for a burst of saves to settle (default 50)")
+    parser.add_argument('--cache-dir', help="Reuse parsed workouts from this on-disk cache")
+    parser.add_argument('--cache-size', type=float, default=64, metavar='MB',
+                        help="Evict least recently used cache entries beyond this size (default 64)")
+    parser.add_argument('--batch-targets', action='store_true',
+                        help="Compute all step targets in one vectorized NumPy pass (single process)")
+    parser.add_argument('--durability', choices=DURABILITY_LEVELS, default='batch',
+                        help="fsync policy for .fit files, which are always replaced atomically: none, "
+                             "batch (one sync per --fsync-batch files, default) or full (every file)")
+    parser.add_argument('--fsync-batch', type=int, default=64, metavar='N',
+                        help="With --durability batch, files made durable per sync (default 64)")
+    parser.add_argument('--fsync-max-delay', type=float, default=1.0, metavar='SECONDS',
+                        help="With --durability batch, longest a written file waits to be renamed into place (default 1)")
+    parser.add_argument('--time-created', default='now', metavar='{now,mtime,fixed,UNIX_SECONDS}',
+                        help="FIT creation time: now (default), the .zwo file's mtime, a fixed 2020-01-01, "
+                             "or the given Unix time; all but now make the output deterministic")
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help="Don't rewrite .fit files whose content would not change (use with --time-created)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Encode structurally identical workouts once and hardlink their .fit files (single process)")
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help="Write run metrics (files/s, latency histogram, bytes, cache, failures) as a Prometheus textfile")
+    parser.add_argument('--metrics-jsonl', metavar='PATH', help="Append run metrics to PATH as JSON lines")
+    parser.add_argument('--metrics-interval', type=float, metavar='SECONDS',
+                        help="Also export the metrics every SECONDS during a run (default: only at the end)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time every conversion phase and print a p50/p95/max table per phase")
+    parser.add_argument('--profile-cprofile', metavar='PATH', help="Write cProfile stats for the run to PATH (pstats format)")
+    parser.add_argument('--profile-memory', metavar='PATH',
+                        help="Trace allocations with tracemalloc and write the peak and top allocation sites to PATH")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--list', action='store_true', help="List the workouts in --zwo-folder without converting")
+    mode.add_argument('--dry-run', action='store_true',
+                      help="Validate every workout and show the .fit files that would be written")
+    mode.add_argument('--verify', action='store_true',
+                      help="Check that every .fit file in --fit-folder is well formed (header, records, CRCs, step count)")
+    mode.add_argument('--to-zwo', metavar='ZWO_FOLDER',
+                      help="Convert the .fit workouts in --fit-folder back to .zwo files in ZWO_FOLDER")
+    mode.add_argument('--watch', action='store_true',
+                      help="Keep converting: reconvert changed .zwo files and remove .fit files of deleted ones")
+    mode.add_argument('--roster', metavar='ROSTER_JSON',
+                      help="Convert for every athlete in this JSON roster into <fit-folder>/<athlete>/")
+    mode.add_argument('--serve', metavar='[HOST:]PORT',
+                      help="Run a local HTTP service: POST ZWO to /convert for FIT bytes, GET /metrics for counters")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help="Only report failed conversions")
+    verbosity.add_argument('-v', '--verbose', action='count', default=0,
+                           help="Log each converted file; repeat (-vv) for every step and target")
+    args = parser.parse_args(argv)
+    if args.metrics_prom or args.metrics_jsonl:
+        modes = (('--list', args.list), ('--dry-run', args.dry_run), ('--verify', args.verify),
+                 ('--to-zwo', args.to_zwo), ('--watch', args.watch), ('--roster', args.roster), ('--serve', args.serve))
+        for flag, value in modes:
+            if value:
+                parser.error(f"--metrics-prom/--metrics-jsonl record folder conversions and can't be used with {flag}")
+    
+    configure_logging(-1 if args.quiet else args.verbose)
+    try:
+        time_created = parse_time_created(args.time_created)
+    except ValueError as e:
+        parser.error(str(e))
+    roster = None
+    if args.roster:
+        try:
+            roster = load_roster(args.roster)
+        except (OSError, ValueError) as e:
+            parser.error(f"--roster {args.roster}: {e}")
+    
+    # Initialize converter with your FTP in watts and 5% buffer
+    profile = dict(
+        ftp_watts=240,  # Your actual FTP
         use_power_for_cycling=True,
         power_buffer_percent=5,  # ±5% buffer on all power targets
         use_absolute_power=True,  # Set to True for absolute watts, False for FTP percentages
         warmup_manual_advance=True,  # Warmup steps wait for LAP button press
         cooldown_manual_advance=False,  # Cooldown steps use timed duration (change to True if desired)
-        force_warmup_power=0.5  # Force all warmups to 50% effort (Z1 recovery)
+        force_warmup_power=0.5,  # Force all warmups to 50% effort (Z1 recovery)
+        backend=args.backend,
+        compact_intervals=args.compact_intervals,
+        time_created=time_created,
     )
     
-    # Define source and destination folders
-    zwo_folder = './zwo'  # Folder containing .zwo files
-    fit_folder = './fit'  # Folder where .fit files will be saved
+    if args.verify:
+        return 1 if verify_fit_folder(args.fit_folder) else 0
+    
+    if args.serve:
+        import service
+        host, _, port = args.serve.rpartition(':')
+        # -j 1 (the default) converts in the request threads; more keeps a warm process pool
+        workers = 0 if args.jobs == 1 else args.jobs or os.cpu_count() or 1
+        service.serve(host or '127.0.0.1', int(port), profile, workers=workers, converter_class=zwoToFitConverter)
+        return 0
+    
+    phase_timer = None
+    if args.profile:
+        from profiling import PhaseTimer
+        phase_timer = PhaseTimer()
+    converter = zwoToFitConverter(
+        **profile,
+        parse_cache=ParseCache(args.cache_dir, int(args.cache_size * 1024 * 1024)) if args.cache_dir else None,
+        phase_timer=phase_timer
+    )
+    
+    if args.profile_cprofile or args.profile_memory:
+        from profiling import ProfileCapture
+        with ProfileCapture(args.profile_cprofile, args.profile_memory):
+            result = _run_conversion(converter, args, roster)
+    else:
+        result = _run_conversion(converter, args, roster)
+    
+    if phase_timer is not None:
+        from profiling import format_phase_table
+        batch_logger.info("\nPHASE TIMES:")
+        for line in format_phase_table(phase_timer):
+            batch_logger.info("%s", line)
+    return result
+
+
+def _run_conversion(converter, args, roster=None):
+    """Run the conversion mode main() was asked for and return the exit status (roster: the loaded --roster)"""
+    
+    writer = OutputWriter(args.durability, args.fsync_batch, skip_unchanged=args.skip_unchanged,
+                          max_delay=args.fsync_max_delay)
+    
+    if args.list or args.dry_run:
+        failed = converter.check_folder(args.zwo_folder, args.fit_folder if args.dry_run else None)
+        return 1 if failed else 0
+    
+    if args.to_zwo:
+        return 1 if converter.convert_fit_folder(args.fit_folder, args.to_zwo, writer) else 0
+    
+    if args.watch:
+        try:
+            converter.watch_folder(args.zwo_folder, args.fit_folder, debounce=args.debounce_ms / 1000,
+                                   use_inotify=not args.poll, writer=writer)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    
+    if args.roster:
+        converter.convert_roster(args.zwo_folder, args.fit_folder, roster, writer)
+        return 0
+    
+    # Only archives are files or end in an archive suffix; check that before importing zipfile/tarfile
+    if os.path.isfile(args.zwo_folder) or args.fit_folder.lower().endswith(('.zip', '.tar', '.tgz', '.gz', '.bz2', '.xz')):
+        from archives import is_archive_path
+        if is_archive_path(args.zwo_folder) or is_archive_path(args.fit_folder):
+            converter.convert_archive(args.zwo_folder, args.fit_folder, writer)
+            return 0
+    
+    metrics = None
+    if args.metrics_prom or args.metrics_jsonl:
+        from metrics import MetricsSink
+        metrics = MetricsSink(args.metrics_prom, args.metrics_jsonl, args.metrics_interval)
+    
+    if args.async_pipeline:
+        import asyncio
+        asyncio.run(converter.convert_folder_async(args.zwo_folder, args.fit_folder,
+                                                   encode_concurrency=args.jobs or os.cpu_count() or 1, writer=writer,
+                                                   metrics=metrics))
+        return 0
     
     # Convert all ZWO files in the folder
-    converter.convert_folder(zwo_folder, fit_folder)
+    converter.convert_folder(args.zwo_folder, args.fit_folder, workers=args.jobs or None,
+                             incremental=args.incremental, batch_targets=args.batch_targets, dedup=args.dedup,
+                             writer=writer, metrics=metrics)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
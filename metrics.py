@@ -0,0 +1,179 @@
+"""
+Machine-readable metrics for convert_folder runs
+
+A MetricsSink passed to convert_folder (or convert_folder_async) counts the files converted, failed (by
+exception type), skipped and left unchanged, the bytes written, the parse cache
+hits and misses, and a histogram of per-file latency. It exports them when the
+run ends, and every `interval` seconds during a long run, as:
+
+    - a Prometheus textfile (for node_exporter's textfile collector), replaced atomically
+    - JSON lines appended to a file, one object per export
+
+Latency is the time spent converting each file (parse, encode and write), as
+measured by whichever process or stage did the work, so it excludes time a file
+waited in a queue or behind other files.
+"""
+import bisect
+import collections
+import json
+import os
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+METRIC_PREFIX = 'zwo2fit'
+
+
+class MetricsSink:
+    """
+    Collects one conversion run's metrics and writes them to files
+
+    Args:
+        prometheus_path: Prometheus textfile to (re)write, or None
+        jsonl_path: JSON lines file to append to, or None
+        interval: If set, also export every interval seconds while the run is going
+    """
+
+    def __init__(self, prometheus_path=None, jsonl_path=None, interval=None):
+        self.prometheus_path = prometheus_path
+        self.jsonl_path = jsonl_path
+        self.interval = interval
+        self.start(None, None)
+
+    def start(self, writer, parse_cache, skipped=0):
+        """
+        Begin a run, resetting every count
+
+        Args:
+            writer: OutputWriter whose bytes_written the run adds to
+            parse_cache: The converter's ParseCache, or None
+            skipped: Files skipped as unchanged (incremental runs)
+        """
+        self.writer = writer
+        self.parse_cache = parse_cache
+        self.bytes_base = writer.bytes_written if writer is not None else 0
+        self.unchanged_base = writer.unchanged if writer is not None else 0
+        self.cache_base = (parse_cache.hits, parse_cache.misses) if parse_cache is not None else (0, 0)
+        self.converted = 0
+        self.failed = 0
+        self.skipped = skipped
+        self.failures = collections.Counter()  # exception type -> count
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.started = self.last_export = time.monotonic()
+
+    def record(self, error=None, latency=0.0):
+        """
+        Count one file's result
+
+        Args:
+            error: None if it converted, else convert_folder's "ExceptionType: message"
+            latency: Seconds spent converting the file
+        """
+        now = time.monotonic()
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        if error is None:
+            self.converted += 1
+        else:
+            self.failed += 1
+            self.failures[error.split(':', 1)[0]] += 1
+        if self.interval is not None and now - self.last_export >= self.interval:
+            self.export(final=False)
+
+    def finish(self):
+        """End the run and export its final metrics"""
+        self.export(final=True)
+
+    def snapshot(self, final=True):
+        """The run's metrics so far as a JSON-serializable dict"""
+        elapsed = time.monotonic() - self.started
+        processed = self.converted + self.failed
+        cache = self.parse_cache
+        hits, misses = (cache.hits - self.cache_base[0], cache.misses - self.cache_base[1]) if cache else (0, 0)
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.bucket_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'timestamp': round(time.time(), 3),
+            'final': final,
+            'elapsed_seconds': round(elapsed, 6),
+            'files': {'converted': self.converted, 'failed': self.failed, 'skipped': self.skipped},
+            'files_per_second': round(processed / elapsed, 3) if elapsed else 0.0,
+            'bytes_written': (self.writer.bytes_written - self.bytes_base) if self.writer is not None else 0,
+            'files_unchanged': (self.writer.unchanged - self.unchanged_base) if self.writer is not None else 0,
+            'parse_cache': {'hits': hits, 'misses': misses},
+            'failures': dict(self.failures),
+            'latency_seconds': {
+                'buckets': buckets,
+                'sum': round(self.latency_sum, 6),
+                'count': processed,
+                'max': round(self.latency_max, 6),
+            },
+        }
+
+    def export(self, final=True):
+        """Write the current snapshot to the configured files"""
+        self.last_export = time.monotonic()
+        snapshot = self.snapshot(final)
+        if self.prometheus_path:
+            _replace_file(self.prometheus_path, format_prometheus(snapshot))
+        if self.jsonl_path:
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(snapshot, separators=(',', ':')) + '\n')
+        return snapshot
+
+
+def format_prometheus(snapshot):
+    """Render a MetricsSink snapshot in the Prometheus text exposition format"""
+    p = METRIC_PREFIX
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {p}_{name} {help_text}")
+        lines.append(f"# TYPE {p}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{p}_{name}{labels} {value}")
+
+    metric('files_total', 'counter', "Files processed in the current run, by result",
+           [(f'{{result="{result}"}}', count) for result, count in snapshot['files'].items()])
+    metric('failures_total', 'counter', "Failed conversions in the current run, by exception type",
+           [(f'{{exception="{_escape_label(name)}"}}', count) for name, count in sorted(snapshot['failures'].items())])
+    metric('bytes_written_total', 'counter', "Bytes of .fit files written in the current run",
+           [('', snapshot['bytes_written'])])
+    metric('files_unchanged_total', 'counter', "Converted files left alone because their content was unchanged",
+           [('', snapshot['files_unchanged'])])
+    metric('parse_cache_hits_total', 'counter', "Parse cache hits in the current run",
+           [('', snapshot['parse_cache']['hits'])])
+    metric('parse_cache_misses_total', 'counter', "Parse cache misses in the current run",
+           [('', snapshot['parse_cache']['misses'])])
+    metric('files_per_second', 'gauge', "Files processed per second in the current run",
+           [('', snapshot['files_per_second'])])
+    metric('run_duration_seconds', 'gauge', "Time since the current run started",
+           [('', snapshot['elapsed_seconds'])])
+    metric('run_in_progress', 'gauge', "1 while a run is going, 0 once it finished",
+           [('', 0 if snapshot['final'] else 1)])
+    metric('last_export_timestamp_seconds', 'gauge', "Unix time of this export",
+           [('', snapshot['timestamp'])])
+    latency = snapshot['latency_seconds']
+    metric('file_latency_seconds', 'histogram', "Time to convert each file",
+           [(f'_bucket{{le="{bound}"}}', count) for bound, count in latency['buckets'].items()]
+           + [('_sum', latency['sum']), ('_count', latency['count'])])
+    return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _replace_file(path, text):
+    """Write text to path atomically, so a collector never reads half a file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,132 @@
+"""
+Per-phase timing and optional cProfile/tracemalloc capture for conversions
+
+A zwoToFitConverter given a PhaseTimer records how long each file spends in every
+phase (read, xml, steps, targets, encode, write); phase_table() turns the samples
+into p50/p95/max rows. Without a timer the converter takes its usual code paths,
+so profiling costs nothing when it is off.
+
+ProfileCapture wraps a whole run and writes cProfile stats (pstats format, for
+`python -m pstats` or snakeviz) and/or the top tracemalloc allocation sites to files.
+"""
+import collections
+import contextlib
+import time
+
+# Columns of phase_table(), in milliseconds except count
+PHASE_COLUMNS = ('phase', 'count', 'total', 'p50', 'p95', 'max')
+
+
+class PhaseTimer:
+    """Durations per phase name, in seconds, in the order the phases were first seen"""
+
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+
+    def __getstate__(self):
+        # Pool workers get an empty timer and send their samples back with each result
+        return {}
+
+    def __setstate__(self, state):
+        self.samples = collections.defaultdict(list)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of a with block as one sample of phase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.samples[name].append(seconds)
+
+    def merge(self, samples):
+        """Add samples taken elsewhere (a {phase: [seconds]} dict, as returned by take)"""
+        for name, durations in samples.items():
+            self.samples[name].extend(durations)
+
+    def take(self):
+        """Return the samples as a plain dict and start over"""
+        samples = dict(self.samples)
+        self.samples.clear()
+        return samples
+
+
+def phase_table(timer):
+    """
+    Summarize a PhaseTimer
+
+    Returns:
+        One (phase, count, total ms, p50 ms, p95 ms, max ms) tuple per phase
+    """
+    rows = []
+    for name, durations in timer.samples.items():
+        if not durations:
+            continue
+        durations = sorted(durations)
+
+        def percentile(p):
+            return durations[min(len(durations) - 1, int(p * len(durations)))] * 1000
+        rows.append((name, len(durations), sum(durations) * 1000, percentile(0.50), percentile(0.95),
+                     durations[-1] * 1000))
+    return rows
+
+
+def format_phase_table(timer):
+    """phase_table() as aligned text lines, with each phase's share of the total time"""
+    rows = phase_table(timer)
+    grand_total = sum(row[2] for row in rows) or 1
+    lines = [f"{'phase':<16} {'count':>7} {'total ms':>10} {'share':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name, count, total, p50, p95, maximum in rows:
+        lines.append(f"{name:<16} {count:>7d} {total:>10.1f} {total / grand_total:>6.1%} "
+                     f"{p50:>9.3f} {p95:>9.3f} {maximum:>9.3f}")
+    return lines
+
+
+class ProfileCapture:
+    """
+    Context manager that profiles its body with cProfile and/or tracemalloc
+
+    Args:
+        cprofile_path: If set, cProfile stats are dumped here (pstats format)
+        tracemalloc_path: If set, the peak traced memory and the top allocation
+            sites still alive at the end are written here as text
+        top: Number of allocation sites to write
+    """
+
+    def __init__(self, cprofile_path=None, tracemalloc_path=None, top=25):
+        self.cprofile_path = cprofile_path
+        self.tracemalloc_path = tracemalloc_path
+        self.top = top
+        self.profiler = None
+
+    def __enter__(self):
+        # Imported here so runs without profiling don't load either module
+        if self.tracemalloc_path:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile_path:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.cprofile_path)
+            self.profiler = None
+        if self.tracemalloc_path:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats = snapshot.statistics('lineno')
+            with open(self.tracemalloc_path, 'w', encoding='utf-8') as f:
+                f.write(f"Traced memory: {current / 1024:.1f} KiB at exit, {peak / 1024:.1f} KiB peak\n")
+                f.write(f"Top {min(self.top, len(stats))} allocation sites alive at exit:\n")
+                for stat in stats[:self.top]:
+                    f.write(f"{stat}\n")
+        return False
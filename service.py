@@ -0,0 +1,260 @@
+"""
+Local HTTP conversion service for zwoToFitConverter
+
+Keeps converters (and optionally a process pool) warm so a request only pays for
+parsing and encoding, not for starting Python and importing fit_tool.
+
+    POST /convert[?ftp_watts=250&power_buffer_percent=3&...]   body: ZWO XML -> FIT bytes
+    GET  /metrics                                             JSON throughput/latency counters
+    GET  /health                                              "ok"
+
+Query parameters override the service's base converter profile for one request;
+any of main.ATHLETE_SETTINGS plus backend are accepted.
+
+The converter class is passed in (main passes its zwoToFitConverter), so running
+`python main.py --serve` doesn't import main a second time.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from athlete_settings import check_setting
+
+logger = logging.getLogger('zwo2fit.batch')
+
+
+def _flag(value):
+    return value.lower() in ('1', 'true', 'yes')
+
+
+# Query string -> typed value for the profile overrides accepted as query parameters;
+# athlete settings are then validated by athlete_settings.check_setting
+PARAM_PARSERS = {
+    'ftp_watts': float,
+    'power_buffer_percent': float,
+    'use_power_for_cycling': _flag,
+    'use_absolute_power': _flag,
+    'warmup_manual_advance': _flag,
+    'cooldown_manual_advance': _flag,
+    'compact_intervals': _flag,
+    'force_warmup_power': lambda value: None if value.lower() in ('', 'none') else float(value),
+    'backend': str,
+}
+
+# Largest accepted request body; ZWO files are a few KB
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+# Small workout converted once per worker at startup so every import and cache is warm
+WARMUP_ZWO = (b'<workout_file><name>warmup</name><sportType>bike</sportType><workout>'
+              b'<Warmup Duration="300" PowerLow="0.5" PowerHigh="0.7"/>'
+              b'<IntervalsT Repeat="2" OnDuration="60" OffDuration="60" OnPower="1.0" OffPower="0.5"/>'
+              b'</workout></workout_file>')
+
+
+@functools.lru_cache(maxsize=64)
+def _converter(converter_class, profile_items):
+    return converter_class(**dict(profile_items))
+
+
+def _warm_worker(converter_class, profile_items):
+    """Process pool initializer: convert a tiny workout so the first request is as fast as the rest"""
+    _converter(converter_class, profile_items).convert_bytes(WARMUP_ZWO)
+
+
+def _convert_in_worker(converter_class, zwo, profile_items):
+    return _converter(converter_class, profile_items).convert_bytes(zwo)
+
+
+class ServiceMetrics:
+    """Thread-safe request counters with latency percentiles over the most recent requests"""
+
+    def __init__(self, window=1024):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.conversions = 0
+        self.failures = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, ok, bytes_in, bytes_out, latency):
+        with self.lock:
+            self.requests += 1
+            if ok:
+                self.conversions += 1
+            else:
+                self.failures += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = time.monotonic() - self.started
+            snapshot = {
+                'uptime_seconds': round(uptime, 3),
+                'requests': self.requests,
+                'conversions': self.conversions,
+                'failures': self.failures,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'requests_per_second': round(self.requests / uptime, 3) if uptime else 0.0,
+            }
+        if latencies:
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+            snapshot['latency_ms'] = {
+                'p50': round(percentile(0.50), 3),
+                'p95': round(percentile(0.95), 3),
+                'p99': round(percentile(0.99), 3),
+                'max': round(latencies[-1] * 1000, 3),
+                'window': len(latencies),
+            }
+        return snapshot
+
+
+class ConversionService:
+    """
+    Conversion backend of the HTTP service
+
+    Args:
+        profile: Base zwoToFitConverter keyword arguments for every request
+        workers: Size of the process pool; 0 converts in the request threads
+        converter_class: The zwoToFitConverter class (default: main's)
+    """
+
+    def __init__(self, profile=None, workers=0, converter_class=None):
+        if converter_class is None:
+            from main import zwoToFitConverter as converter_class
+        self.converter_class = converter_class
+        self.profile = dict(profile or {})
+        self.metrics = ServiceMetrics()
+        self.executor = None
+        profile_items = tuple(sorted(self.profile.items()))
+        if workers > 0:
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker,
+                                                initargs=(converter_class, profile_items))
+            # Start every worker now rather than on the first requests
+            list(self.executor.map(_convert_in_worker, [converter_class] * workers, [WARMUP_ZWO] * workers,
+                                   [profile_items] * workers))
+        else:
+            _warm_worker(converter_class, profile_items)
+
+    def request_profile(self, query):
+        """Merge query parameter overrides into the base profile (ValueError if invalid)"""
+        profile = dict(self.profile)
+        for name, value in parse_qsl(query, keep_blank_values=True):
+            if name not in PARAM_PARSERS:
+                raise ValueError(f"Unknown parameter {name!r}")
+            try:
+                value = PARAM_PARSERS[name](value)
+            except ValueError:
+                raise ValueError(f"{name}: Expected a number, got {value!r}") from None
+            profile[name] = value if name == 'backend' else check_setting(name, value)
+        _converter(self.converter_class, tuple(sorted(profile.items())))  # Rejects an unknown backend
+        return profile
+
+    def convert(self, zwo, profile):
+        profile_items = tuple(sorted(profile.items()))
+        if self.executor is None:
+            return _convert_in_worker(self.converter_class, zwo, profile_items)
+        return self.executor.submit(_convert_in_worker, self.converter_class, zwo, profile_items).result()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'zwo2fit'
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't wait for delayed ACKs
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/metrics':
+            self._send(200, json.dumps(self.server.service.metrics.snapshot()).encode('utf-8'), 'application/json')
+        elif path == '/health':
+            self._send(200, b'ok\n', 'text/plain')
+        else:
+            self._send(404, b'not found\n', 'text/plain')
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self._send(404, b'not found\n', 'text/plain')
+            return
+
+        service = self.server.service
+        length = self.headers.get('Content-Length')
+        # The body can't be skipped without a valid length, so these close the connection
+        if length is None:
+            self._reject(411, b'Content-Length required\n')
+            return
+        if not (length.isascii() and length.isdigit()):
+            self._reject(400, b'invalid Content-Length\n')
+            return
+        if int(length) > MAX_BODY_BYTES:
+            self._reject(413, b'request body too large\n')
+            return
+        zwo = self.rfile.read(int(length))
+
+        try:
+            fit_bytes = service.convert(zwo, service.request_profile(url.query))
+        except Exception as e:
+            # Malformed XML or settings are the client's fault, anything else is ours
+            status = 400 if isinstance(e, (ValueError, SyntaxError)) else 500
+            self._send(status, f"{type(e).__name__}: {e}\n".encode('utf-8'), 'text/plain')
+            service.metrics.record(False, len(zwo), 0, time.perf_counter() - start)
+            return
+        self._send(200, fit_bytes, 'application/octet-stream')
+        service.metrics.record(True, len(zwo), len(fit_bytes), time.perf_counter() - start)
+
+    def _reject(self, status, message):
+        self.close_connection = True
+        self._send(status, message, 'text/plain')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host='127.0.0.1', port=8080, profile=None, workers=0, converter_class=None):
+    """
+    Create (but don't start) the HTTP server; port 0 picks a free port
+
+    Call serve_forever() to run it, and shutdown() then server_close() and
+    service.close() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), ConversionRequestHandler)
+    server.daemon_threads = True
+    server.service = ConversionService(profile, workers, converter_class)
+    return server
+
+
+def serve(host='127.0.0.1', port=8080, profile=None, workers=0, converter_class=None):
+    """Run the service until interrupted"""
+    server = make_server(host, port, profile, workers, converter_class)
+    logger.warning("Serving ZWO to FIT conversions on http://%s:%d/convert", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()